@@ -0,0 +1,105 @@
+################################################################
+# Blend value benchmark
+#
+# Times reading the blend_ao opacity channel of a mesh the way the opacity
+# analysis does (API 2.0 arrays handed to NumPy in one call) against the
+# API 1.0 read with one Python call per vertex it replaced, for the UV set
+# (FBX, USD) and the color set (Alembic). Run it with mayapy, or with --fake
+# on a plain Python install against benchmarks/fakemaya:
+#
+#   mayapy benchmarks/blend_values.py [-v 250000] [-r 5]
+
+import argparse
+import os.path as path
+import sys
+import time
+
+benchmarkDir = path.dirname(path.abspath(__file__))
+pluginDir = path.join(path.dirname(benchmarkDir), "plug-ins")
+if (pluginDir not in sys.path):
+	sys.path.append(pluginDir)
+
+BLEND_SET = "blend_ao"
+
+
+################################################################
+# Meshes
+
+def MakeMesh(vertices, fake):
+	# a mesh shape with about vertices vertices and a blend_ao UV set and color set
+	if (fake):
+		from maya._scene import scene
+		transform = scene.CreateNode("transform", "blendBench", notify = False)
+		shape = scene.CreateNode("mesh", "blendBenchShape", transform, notify = False)
+		shape.attrs["uvSets"] = { BLEND_SET : [[1.0, 0.8]] * vertices }
+		shape.attrs["colorSets"] = { BLEND_SET : [[1.0, 0.8, 0.0]] * vertices }
+		return shape.name
+
+	import maya.cmds as mc
+	side = max(1, int(vertices ** 0.5) - 1)
+	transform = mc.polyPlane(subdivisionsX = side, subdivisionsY = side, constructionHistory = False)[0]
+	shape = mc.listRelatives(transform, shapes = True)[0]
+	mc.polyUVSet(shape, create = True, uvSet = BLEND_SET)
+	mc.polyCopyUV(shape, uvSetNameInput = "map1", uvSetName = BLEND_SET)
+	mc.polyColorSet(shape, create = True, colorSet = BLEND_SET)
+	mc.polyColorPerVertex(shape, rgb = (1.0, 0.8, 0.0))
+	return shape
+
+
+################################################################
+# Reads
+
+def ReadPerVertex(mesh, blendInTexcoord):
+	# the API 1.0 read: one Python call per vertex
+	import numpy
+	import maya.OpenMaya as OpenMaya
+
+	selection = OpenMaya.MSelectionList()
+	selection.add(mesh)
+	dagPath = OpenMaya.MDagPath()
+	selection.getDagPath(0, dagPath)
+	fnMesh = OpenMaya.MFnMesh(dagPath)
+	if (blendInTexcoord):
+		uArray = OpenMaya.MFloatArray()
+		vArray = OpenMaya.MFloatArray()
+		fnMesh.getUVs(uArray, vArray, BLEND_SET)
+		return numpy.fromiter((uArray[index] for index in range(uArray.length())), numpy.float32, uArray.length())
+	aColors = OpenMaya.MColorArray()
+	fnMesh.getColors(aColors, BLEND_SET)
+	return numpy.fromiter((aColors[index].r for index in range(aColors.length())), numpy.float32, aColors.length())
+
+def Best(function, repeat):
+	aTimes = []
+	for run in range(repeat):
+		start = time.perf_counter()
+		function()
+		aTimes.append(time.perf_counter() - start)
+	return min(aTimes)
+
+def main():
+	parser = argparse.ArgumentParser(description = "Time the blend_ao reads of the opacity analysis")
+	parser.add_argument("-v", "--vertices", type = int, default = 250000, help = "vertices of the mesh")
+	parser.add_argument("-r", "--repeat", type = int, default = 5, help = "runs per read, the best one is reported")
+	parser.add_argument("--fake", action = "store_true", help = "use benchmarks/fakemaya instead of mayapy")
+	args = parser.parse_args()
+
+	if (args.fake):
+		sys.path.insert(0, path.join(benchmarkDir, "fakemaya"))
+	else:
+		import maya.standalone
+		maya.standalone.initialize(name = "python")
+	from speedtree.opacity import ReadBlendValues
+
+	mesh = MakeMesh(args.vertices, args.fake)
+	for label, blendInTexcoord in (("UV set", 1), ("color set", 0)):
+		count = len(ReadBlendValues(mesh, blendInTexcoord))
+		perVertex = Best(lambda: ReadPerVertex(mesh, blendInTexcoord), args.repeat)
+		bulk = Best(lambda: ReadBlendValues(mesh, blendInTexcoord), args.repeat)
+		print("%-10s %8d values   per vertex %8.1f ms   bulk %8.1f ms   %5.1fx" % (label, count, perVertex * 1000.0, bulk * 1000.0, perVertex / max(bulk, 1e-9)))
+
+	if (not args.fake):
+		maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+	main()
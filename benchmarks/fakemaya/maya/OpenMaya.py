@@ -0,0 +1,691 @@
+################################################################
+# Recording maya.OpenMaya stand-in
+#
+# Just enough of the Maya Python API 1.0 for the SpeedTree importer, backed by
+# the fake scene in maya._scene.
+
+import os.path as path
+
+from maya._scene import scene, Node, SHAPE_TYPES
+
+
+def Record(name):
+	scene.Record("OpenMaya." + name)
+
+
+################################################################
+# MFn
+
+class MFn(object):
+	kInvalid = 0
+	kDependencyNode = 4
+	kDagNode = 107
+	kTransform = 110
+	kShape = 248
+	kMesh = 296
+	kSet = 459
+	kShadingEngine = 320
+	kLodGroup = 764
+	kGPUCache = 1000
+	kNumericAttribute = 2000
+	kEnumAttribute = 2001
+	kTypedAttribute = 2002
+
+TYPE_FUNCTION_SETS = {
+	"transform" : (MFn.kDagNode, MFn.kTransform),
+	"lodGroup" : (MFn.kDagNode, MFn.kTransform, MFn.kLodGroup),
+	"mesh" : (MFn.kDagNode, MFn.kShape, MFn.kMesh),
+	"gpuCache" : (MFn.kDagNode, MFn.kShape, MFn.kGPUCache),
+	"mayaUsdProxyShape" : (MFn.kDagNode, MFn.kShape),
+	"locator" : (MFn.kDagNode, MFn.kShape),
+	"shadingEngine" : (MFn.kSet, MFn.kShadingEngine),
+	"objectSet" : (MFn.kSet,),
+}
+
+
+################################################################
+# MObject
+
+class MObject(object):
+	def __init__(self, node = None):
+		if (isinstance(node, MObject)):
+			node = node.node
+		self.node = node
+
+	def isNull(self):
+		return self.node == None
+
+	def hasFn(self, fn):
+		if (self.node == None):
+			return False
+		return fn == MFn.kDependencyNode or fn in TYPE_FUNCTION_SETS.get(self.node.type, ())
+
+	def apiType(self):
+		if (self.node == None):
+			return MFn.kInvalid
+		return TYPE_FUNCTION_SETS.get(self.node.type, (MFn.kDependencyNode,))[-1]
+
+	def __eq__(self, other):
+		return isinstance(other, MObject) and self.node is other.node
+
+	def __hash__(self):
+		return id(self.node)
+
+class MObjectHandle(object):
+	def __init__(self, obj = None):
+		self.obj = MObject(obj)
+
+	def isValid(self):
+		return self.obj.node != None and self.obj.node.alive
+
+	def isAlive(self):
+		return self.isValid()
+
+	def object(self):
+		return self.obj
+
+	def hashCode(self):
+		return id(self.obj.node)
+
+
+################################################################
+# MFnDependencyNode
+
+class MFnDependencyNode(object):
+	def __init__(self, obj = None):
+		self.obj = MObject(obj)
+
+	def setObject(self, obj):
+		self.obj = MObject(obj)
+
+	def name(self):
+		Record("MFnDependencyNode.name")
+		return self.obj.node.name
+
+	def typeName(self):
+		return self.obj.node.type
+
+	def hasAttribute(self, attr):
+		Record("MFnDependencyNode.hasAttribute")
+		return self.obj.node.HasAttribute(attr)
+
+	def attribute(self, attr):
+		return MObject(None) if not self.obj.node.HasAttribute(attr) else AttributeObject(attr)
+
+	def findPlug(self, attr, wantNetworkedPlug = False):
+		Record("MFnDependencyNode.findPlug")
+		if (isinstance(attr, AttributeObject)):
+			attr = attr.attrName
+		if (not self.obj.node.HasAttribute(attr)):
+			raise RuntimeError("(kInvalidParameter): No such attribute " + attr)
+		return MPlug(self.obj.node, attr)
+
+class MFnDagNode(MFnDependencyNode):
+	def isIntermediateObject(self):
+		return bool(self.obj.node.attrs.get("intermediateObject", False))
+
+	def partialPathName(self):
+		return self.obj.node.name
+
+class MFnMesh(MFnDagNode):
+	def __init__(self, obj = None):
+		MFnDagNode.__init__(self, MObject(obj.nodeRef) if isinstance(obj, MDagPath) else obj)
+
+	def getUVSetNames(self, aNames):
+		Record("MFnMesh.getUVSetNames")
+		aNames.extend(sorted(self.obj.node.attrs.get("uvSets", { })))
+
+	def getUVs(self, uArray, vArray, uvSet = None):
+		Record("MFnMesh.getUVs")
+		for u, v in self.obj.node.attrs.get("uvSets", { }).get(uvSet, []):
+			uArray.append(u)
+			vArray.append(v)
+
+	def getColorSetNames(self, aNames):
+		Record("MFnMesh.getColorSetNames")
+		aNames.extend(sorted(self.obj.node.attrs.get("colorSets", { })))
+
+	def getColors(self, aColors, colorSet = None):
+		Record("MFnMesh.getColors")
+		for color in self.obj.node.attrs.get("colorSets", { }).get(colorSet, []):
+			aColors.append(MColor(*color))
+
+class AttributeObject(MObject):
+	def __init__(self, attrName):
+		MObject.__init__(self, None)
+		self.attrName = attrName
+
+	def isNull(self):
+		return False
+
+
+################################################################
+# MPlug
+
+class MPlug(object):
+	def __init__(self, node = None, attr = ""):
+		self.nodeRef = node
+		self.attr = attr
+
+	def isNull(self):
+		return self.nodeRef == None
+
+	def node(self):
+		return MObject(self.nodeRef)
+
+	def name(self):
+		return self.nodeRef.name + "." + self.attr
+
+	def partialName(self, *args):
+		return self.attr
+
+	def child(self, index):
+		if (isinstance(index, AttributeObject)):
+			return MPlug(self.nodeRef, self.attr + "." + index.attrName)
+		suffix = ("R", "G", "B") if not self.attr.endswith(("Input", "input1", "input2")) else ("X", "Y", "Z")
+		return MPlug(self.nodeRef, self.attr + "." + self.attr.split(".")[-1] + suffix[index])
+
+	def numChildren(self):
+		return 3
+
+	def attribute(self):
+		return AttributeObject(self.attr.split(".")[-1].split("[")[0])
+
+	def elementByLogicalIndex(self, index):
+		return MPlug(self.nodeRef, self.attr + "[" + str(index) + "]")
+
+	def isConnected(self):
+		return self.attr in self.nodeRef.inputs or self.attr in self.nodeRef.outputs
+
+	def connectedTo(self, array, asDestination, asSource):
+		if (asDestination and self.attr in self.nodeRef.inputs):
+			source, sourceAttr = self.nodeRef.inputs[self.attr]
+			array.append(MPlug(source, sourceAttr))
+		if (asSource):
+			for destination, destinationAttr in self.nodeRef.outputs.get(self.attr, []):
+				array.append(MPlug(destination, destinationAttr))
+		return len(array) > 0
+
+	def getExistingArrayAttributeIndices(self, indices):
+		prefix = self.attr + "["
+		for attr in list(self.nodeRef.inputs) + list(self.nodeRef.outputs) + list(self.nodeRef.attrs):
+			if (attr.startswith(prefix)):
+				index = int(attr[len(prefix):].split("]")[0])
+				if (index not in indices):
+					indices.append(index)
+		return len(indices)
+
+	def asString(self):
+		return scene.GetAttr(self.name())
+
+	def setString(self, value):
+		scene.SetAttr(self.name(), value)
+
+	def asDouble(self):
+		return float(scene.GetAttr(self.name()))
+
+	def asInt(self):
+		return int(scene.GetAttr(self.name()))
+
+	def asBool(self):
+		return bool(scene.GetAttr(self.name()))
+
+class MFnNumericData(object):
+	kBoolean = 1
+	kInt = 7
+	kFloat = 11
+	kDouble = 12
+
+class MFnNumericAttribute(object):
+	def __init__(self, attribute = None):
+		self.attribute = attribute
+
+	def unitType(self):
+		return MFnNumericData.kDouble
+
+class MPlugArray(list):
+	def length(self):
+		return len(self)
+
+class MIntArray(list):
+	def length(self):
+		return len(self)
+
+class MFloatArray(list):
+	def length(self):
+		return len(self)
+
+class MStringArray(list):
+	def length(self):
+		return len(self)
+
+class MColor(object):
+	def __init__(self, r = 0.0, g = 0.0, b = 0.0, a = 1.0):
+		self.r = r
+		self.g = g
+		self.b = b
+		self.a = a
+
+class MColorArray(list):
+	def length(self):
+		return len(self)
+
+
+################################################################
+# MDagPath
+
+class MDagPath(object):
+	def __init__(self, other = None):
+		self.nodeRef = other.nodeRef if isinstance(other, MDagPath) else None
+
+	@staticmethod
+	def getAPathTo(obj, dagPath = None):
+		Record("MDagPath.getAPathTo")
+		if (dagPath == None):
+			dagPath = MDagPath()
+		dagPath.nodeRef = MObject(obj).node
+		return dagPath
+
+	def isValid(self):
+		return self.nodeRef != None and self.nodeRef.alive
+
+	def node(self):
+		return MObject(self.nodeRef)
+
+	def transform(self):
+		node = self.nodeRef
+		return MObject(node if node.type not in SHAPE_TYPES else node.parent)
+
+	def fullPathName(self):
+		return self.nodeRef.FullPath()
+
+	def partialPathName(self):
+		return self.nodeRef.name
+
+	def apiType(self):
+		return MObject(self.nodeRef).apiType()
+
+	def hasFn(self, fn):
+		return MObject(self.nodeRef).hasFn(fn)
+
+	def childCount(self):
+		return len(self.nodeRef.children)
+
+	def child(self, index):
+		return MObject(self.nodeRef.children[index])
+
+	def push(self, obj):
+		self.nodeRef = MObject(obj).node
+
+	def pop(self, count = 1):
+		for i in range(count):
+			self.nodeRef = self.nodeRef.parent
+
+	def numberOfShapesDirectlyBelow(self, *args):
+		Record("MDagPath.numberOfShapesDirectlyBelow")
+		return len([child for child in self.nodeRef.children if child.type in SHAPE_TYPES])
+
+	def extendToShapeDirectlyBelow(self, index):
+		Record("MDagPath.extendToShapeDirectlyBelow")
+		shapes = [child for child in self.nodeRef.children if child.type in SHAPE_TYPES]
+		self.nodeRef = shapes[index]
+
+	def extendToShape(self):
+		self.extendToShapeDirectlyBelow(0)
+
+
+################################################################
+# MItDag
+
+class MItDag(object):
+	kDepthFirst = 0
+	kBreadthFirst = 1
+
+	def __init__(self, traversal = 0, filter = MFn.kInvalid):
+		self.filter = filter
+		self.items = []
+		self.index = 0
+
+	def reset(self, root, traversal = 0, filter = None):
+		if (filter != None):
+			self.filter = filter
+		node = root.nodeRef if isinstance(root, MDagPath) else MObject(root).node
+		self.items = []
+		stack = [node]
+		while (stack):
+			current = stack.pop(0 if traversal == MItDag.kBreadthFirst else -1)
+			if (self.filter == MFn.kInvalid or MObject(current).hasFn(self.filter)):
+				self.items.append(current)
+			children = list(current.children)
+			if (traversal == MItDag.kBreadthFirst):
+				stack.extend(children)
+			else:
+				stack.extend(reversed(children))
+		self.index = 0
+
+	def isDone(self):
+		return self.index >= len(self.items)
+
+	def next(self):
+		Record("MItDag.next")
+		self.index += 1
+
+	def currentItem(self):
+		return MObject(self.items[self.index])
+
+	def getPath(self, dagPath):
+		dagPath.nodeRef = self.items[self.index]
+
+	def prune(self):
+		node = self.items[self.index]
+		descendants = set()
+		stack = list(node.children)
+		while (stack):
+			child = stack.pop()
+			descendants.add(id(child))
+			stack.extend(child.children)
+		self.items = self.items[:self.index + 1] + [item for item in self.items[self.index + 1:] if id(item) not in descendants]
+
+
+################################################################
+# MSelectionList
+
+class MSelectionList(object):
+	def __init__(self):
+		self.items = []
+
+	def add(self, name, *args):
+		if (isinstance(name, (MObject, MDagPath))):
+			node = name.nodeRef if isinstance(name, MDagPath) else name.node
+			self.items.append((node, None))
+			return
+		node = scene.Get(name)
+		attr = name.split(".", 1)[1] if "." in name else None
+		self.items.append((node, attr))
+
+	def length(self):
+		return len(self.items)
+
+	def getDependNode(self, index, obj):
+		obj.node = self.items[index][0]
+
+	def getDagPath(self, index, dagPath, *args):
+		dagPath.nodeRef = self.items[index][0]
+
+	def getPlug(self, index, plug):
+		plug.nodeRef, plug.attr = self.items[index]
+
+
+################################################################
+# MDGModifier
+
+class MDGModifier(object):
+	def __init__(self):
+		self.operations = []
+		self.done = False
+
+	def createNode(self, nodeType, *args):
+		Record("MDGModifier.createNode")
+		# like Maya the node exists right away, it only joins the graph in doIt
+		obj = MObject(Node(nodeType[0].lower() + nodeType[1:] + "1", nodeType))
+		obj.node.alive = False
+		self.operations.append(("create", obj.node))
+		return obj
+
+	def renameNode(self, obj, name):
+		self.operations.append(("rename", MObject(obj).node, name))
+
+	def deleteNode(self, obj):
+		self.operations.append(("delete", MObject(obj).node))
+
+	def connect(self, source, destination):
+		Record("MDGModifier.connect")
+		self.operations.append(("connect", source, destination))
+
+	def disconnect(self, source, destination):
+		self.operations.append(("disconnect", source, destination))
+
+	def newPlugValueDouble(self, plug, value):
+		Record("MDGModifier.newPlugValue")
+		self.operations.append(("set", plug, float(value)))
+
+	def newPlugValueFloat(self, plug, value):
+		Record("MDGModifier.newPlugValue")
+		self.operations.append(("set", plug, float(value)))
+
+	def newPlugValueInt(self, plug, value):
+		Record("MDGModifier.newPlugValue")
+		self.operations.append(("set", plug, int(value)))
+
+	def newPlugValueBool(self, plug, value):
+		Record("MDGModifier.newPlugValue")
+		self.operations.append(("set", plug, bool(value)))
+
+	def newPlugValueString(self, plug, value):
+		Record("MDGModifier.newPlugValue")
+		self.operations.append(("set", plug, str(value)))
+
+	def commandToExecute(self, command):
+		self.operations.append(("command", command))
+
+	def doIt(self):
+		Record("MDGModifier.doIt")
+		for operation in self.operations:
+			kind = operation[0]
+			if (kind == "create"):
+				node = operation[1]
+				node.alive = True
+				node.name = scene.UniqueName(node.name)
+				scene.nodes[node.name] = node
+				scene.counters["nodesCreated"] += 1
+				for callback, clientData in list(scene.nodeAddedCallbacks.values()):
+					callback(node, clientData)
+			elif (kind == "rename"):
+				scene.Rename(operation[1], operation[2])
+			elif (kind == "delete"):
+				scene.Delete(operation[1])
+			elif (kind == "connect"):
+				source, destination = operation[1], operation[2]
+				scene.Connect(source.nodeRef, source.attr, destination.nodeRef, destination.attr)
+			elif (kind == "disconnect"):
+				source, destination = operation[1], operation[2]
+				scene.Disconnect(source.nodeRef, source.attr, destination.nodeRef, destination.attr)
+			elif (kind == "set"):
+				plug, value = operation[1], operation[2]
+				plug.nodeRef.attrs[plug.attr] = value
+				scene.counters["setAttr"] += 1
+		self.done = True
+
+	def undoIt(self):
+		for operation in reversed(self.operations):
+			if (operation[0] == "create" and operation[1].alive):
+				scene.Delete(operation[1])
+		self.done = False
+
+class MDagModifier(MDGModifier):
+	def createNode(self, nodeType, parent = None):
+		obj = MDGModifier.createNode(self, nodeType)
+		if (parent != None and not MObject(parent).isNull()):
+			obj.node.parent = MObject(parent).node
+		return obj
+
+	def reparentNode(self, obj, parent = None):
+		self.operations.append(("reparent", MObject(obj).node, MObject(parent).node))
+
+
+################################################################
+# Messages
+
+class MMessage(object):
+	@staticmethod
+	def removeCallback(callbackId):
+		scene.nodeAddedCallbacks.pop(callbackId, None)
+		scene.nodeRemovedCallbacks.pop(callbackId, None)
+		scene.sceneCallbacks = [callback for callback in scene.sceneCallbacks if callback[0] != callbackId]
+
+	@staticmethod
+	def removeCallbacks(callbackIds):
+		for callbackId in callbackIds:
+			MMessage.removeCallback(callbackId)
+
+class MDGMessage(object):
+	@staticmethod
+	def addNodeAddedCallback(function, nodeType = "dependNode", clientData = None):
+		callbackId = scene.nextCallbackId
+		scene.nextCallbackId += 1
+		scene.nodeAddedCallbacks[callbackId] = (lambda node, data: function(MObject(node), data), clientData)
+		return callbackId
+
+	@staticmethod
+	def addNodeRemovedCallback(function, nodeType = "dependNode", clientData = None):
+		callbackId = scene.nextCallbackId
+		scene.nextCallbackId += 1
+		scene.nodeRemovedCallbacks[callbackId] = (lambda node, data: function(MObject(node), data), clientData)
+		return callbackId
+
+class MSceneMessage(object):
+	kBeforeNew = 1
+	kBeforeOpen = 2
+	kBeforeSoftwareRender = 3
+	kAfterSoftwareRender = 4
+	kAfterNew = 5
+	kAfterOpen = 6
+	kAfterImport = 7
+	kBeforeSave = 8
+	kAfterSave = 9
+	kBeforeExport = 10
+	kAfterExport = 11
+
+	@staticmethod
+	def addCallback(message, function, clientData = None):
+		callbackId = scene.nextCallbackId
+		scene.nextCallbackId += 1
+		scene.sceneCallbacks.append((callbackId, message, function))
+		return callbackId
+
+
+################################################################
+# MArgList / MSyntax / MArgDatabase
+
+class MArgList(list):
+	def length(self):
+		return len(self)
+
+	def asString(self, index):
+		return str(self[index])
+
+class MSyntax(object):
+	kNoArg = 0
+	kBoolean = 1
+	kLong = 2
+	kDouble = 3
+	kString = 4
+	kStringObjects = 5
+
+	def __init__(self):
+		self.flags = { }	# short and long name -> (short name, argument count)
+		self.objectType = None
+		self.minObjects = 0
+
+	def addFlag(self, shortName, longName, *types):
+		for name in (shortName, longName):
+			self.flags[name] = (shortName, len([argType for argType in types if argType != MSyntax.kNoArg]))
+
+	def setObjectType(self, objectType, *args):
+		self.objectType = objectType
+
+	def setMinObjects(self, count):
+		self.minObjects = count
+
+	def enableQuery(self, *args):
+		pass
+
+	def enableEdit(self, *args):
+		pass
+
+class MArgDatabase(object):
+	def __init__(self, syntax, argList):
+		self.values = { }	# short flag name -> arguments
+		self.objects = []
+		index = 0
+		while (index < len(argList)):
+			arg = str(argList[index])
+			if (arg in syntax.flags):
+				shortName, count = syntax.flags[arg]
+				self.values[shortName] = [argList[index + 1 + offset] for offset in range(count)]
+				index += 1 + count
+			elif (arg.startswith("-")):
+				raise RuntimeError("Invalid flag " + arg)
+			else:
+				self.objects.append(arg)
+				index += 1
+		if (len(self.objects) < syntax.minObjects):
+			raise RuntimeError("Too few objects")
+		self.syntax = syntax
+
+	def Short(self, name):
+		return self.syntax.flags[name][0] if name in self.syntax.flags else name
+
+	def isFlagSet(self, name):
+		return self.Short(name) in self.values
+
+	def flagArgumentString(self, name, index):
+		return str(self.values[self.Short(name)][index])
+
+	def flagArgumentBool(self, name, index):
+		return bool(self.values[self.Short(name)][index])
+
+	def getObjects(self, aObjects):
+		aObjects.extend(self.objects)
+
+
+################################################################
+# MGlobal / MFileIO
+
+class MGlobal(object):
+	messages = []
+
+	@staticmethod
+	def displayInfo(message):
+		MGlobal.messages.append(("info", message))
+
+	@staticmethod
+	def displayWarning(message):
+		MGlobal.messages.append(("warning", message))
+
+	@staticmethod
+	def displayError(message):
+		MGlobal.messages.append(("error", message))
+
+	@staticmethod
+	def mayaState():
+		return 1
+
+	kInteractive = 0
+	kBatch = 1
+
+class MFileIO(object):
+	@staticmethod
+	def getFileTypes(fileTypes):
+		fileTypes.extend(["mayaAscii", "mayaBinary", "FBX", "Alembic", "USD Import"])
+
+	@staticmethod
+	def importFile(filename, *args):
+		Record("MFileIO.importFile")
+		scene.ImportMesh(filename, "fbx")
+
+class MFileObject(object):
+	def __init__(self, filename = ""):
+		self.filename = filename
+
+	def setRawFullName(self, filename):
+		self.filename = filename
+
+	def expandedFullName(self):
+		return self.filename
+
+	def resolvedFullName(self):
+		return self.filename
+
+	def expandedPath(self):
+		return path.dirname(self.filename) + "/"
@@ -0,0 +1,55 @@
+################################################################
+# Recording maya.OpenMayaMPx stand-in
+
+from maya._scene import scene
+
+
+class MPxFileTranslator(object):
+	kImportAccessMode = 1
+	kOpenAccessMode = 2
+
+	def __init__(self):
+		pass
+
+class MPxCommand(object):
+	def __init__(self):
+		self.syntaxObject = None
+
+	def isUndoable(self):
+		return False
+
+	def syntax(self):
+		return self.syntaxObject
+
+	@staticmethod
+	def setResult(result):
+		scene.commandResult = result
+
+	@staticmethod
+	def clearResult():
+		scene.commandResult = None
+
+	@staticmethod
+	def appendToResult(result):
+		if (not isinstance(scene.commandResult, list)):
+			scene.commandResult = []
+		scene.commandResult.append(result)
+
+def asMPxPtr(obj):
+	return obj
+
+class MFnPlugin(object):
+	def __init__(self, obj = None, vendor = "", version = "", apiVersion = ""):
+		pass
+
+	def registerFileTranslator(self, name, pixmap, creator, optionsScript = None, defaultOptions = None, requiresFullMel = False):
+		scene.translators[name] = (creator, optionsScript, defaultOptions)
+
+	def deregisterFileTranslator(self, name):
+		scene.translators.pop(name, None)
+
+	def registerCommand(self, name, creator, syntaxCreator = None):
+		scene.commands[name] = (creator, syntaxCreator)
+
+	def deregisterCommand(self, name):
+		scene.commands.pop(name, None)
@@ -0,0 +1,8 @@
+################################################################
+# Fake maya package
+#
+# Recording stand-ins for maya.cmds, maya.mel, maya.OpenMaya, maya.api.OpenMaya and
+# maya.OpenMayaMPx, so the SpeedTree importer can run and be measured on a
+# plain Python install. Put benchmarks/fakemaya in front of sys.path to use
+# them; maya._scene.scene holds the fake scene, the counted calls and the
+# node counters, Reset() empties it like file -new.
@@ -0,0 +1,331 @@
+################################################################
+# Fake Maya scene
+#
+# A tiny in-memory dependency graph behind the recording maya.cmds /
+# maya.OpenMaya stand-ins. It only knows what the SpeedTree importer needs:
+# named nodes with a type, a DAG parent, plain attribute values and plug to
+# plug connections. Every command that reaches it is counted in calls.
+
+import collections
+import json
+import os.path as path
+import re
+
+
+################################################################
+# Node types
+
+MATERIAL_TYPES = set(["lambert", "phong", "blinn", "standardSurface", "surfaceShader", "usdPreviewSurface",
+					"aiStandardSurface", "aiTwoSided", "VRayMtl", "VRayMtl2Sided", "VRayBumpMtl",
+					"PxrSurface", "RedshiftMaterial"])
+SET_TYPES = set(["objectSet", "shadingEngine"])
+SHAPE_TYPES = set(["mesh", "gpuCache", "mayaUsdProxyShape", "locator"])
+DAG_TYPES = set(["transform", "lodGroup"]) | SHAPE_TYPES
+
+# attributes that exist on every shape, mtoa and friends add the ai* ones
+SHAPE_ATTRIBUTES = set(["visibility", "instObjGroups", "displayColors", "doubleSided", "aiOpaque", "aiExportColors",
+						"aiExportTangents", "aiSubdivType", "aiSubdivIterations", "cacheFileName", "filePath", "primPath"])
+
+ATTRIBUTE_DEFAULTS = {
+	"uvTilingMode" : 0,
+	"fileTextureName" : "",
+	"colorSpace" : "sRGB",
+	"ignoreColorSpaceFileRules" : False,
+	"invert" : False,
+	"repeatU" : 1.0,
+	"repeatV" : 1.0,
+	"offsetU" : 0.0,
+	"offsetV" : 0.0,
+	"rotateFrame" : 0.0,
+	"visibility" : True,
+	"aiOpaque" : True,
+	"aiExportColors" : False,
+	"displayColors" : True,
+	"doubleSided" : True,
+	"outSizeX" : 1024.0,
+	"outSizeY" : 1024.0,
+}
+
+# MSceneMessage.kAfterNew, Reset() sends it
+AFTER_NEW = 5
+
+DEFAULT_NODES = [("time1", "time"), ("lambert1", "lambert"), ("standardSurface1", "standardSurface"),
+				("initialShadingGroup", "shadingEngine"), ("initialParticleSE", "shadingEngine"),
+				("defaultShaderList1", "shaderList"), ("defaultTextureList1", "textureList"),
+				("defaultRenderUtilityList1", "renderUtilityList"), ("defaultColorMgtGlobals", "colorManagementGlobals"),
+				("defaultRenderGlobals", "renderGlobals"), ("hardwareRenderingGlobals", "hardwareRenderingGlobals")]
+
+
+################################################################
+# Node
+
+class Node(object):
+	__slots__ = ("name", "type", "attrs", "parent", "children", "alive", "dynamic", "inputs", "outputs")
+
+	def __init__(self, name, nodeType, parent = None):
+		self.name = name
+		self.type = nodeType
+		self.attrs = { }
+		self.parent = parent
+		self.children = []
+		self.alive = True
+		self.dynamic = set()
+		self.inputs = { }	# attribute -> (source node, source attribute)
+		self.outputs = { }	# attribute -> [(destination node, destination attribute)]
+
+	def IsDag(self):
+		return self.type in DAG_TYPES
+
+	def FullPath(self):
+		node = self
+		parts = []
+		while (node != None):
+			parts.append(node.name)
+			node = node.parent
+		return "|" + "|".join(reversed(parts))
+
+	def HasAttribute(self, attr):
+		if (attr in self.dynamic):
+			return True
+		# the importer's own tags are dynamic attributes
+		if (attr.startswith("speedTree")):
+			return False
+		if (self.type in SHAPE_TYPES):
+			return attr in SHAPE_ATTRIBUTES
+		if (self.type in ("transform", "lodGroup")):
+			return attr not in SHAPE_ATTRIBUTES or attr == "visibility"
+		# every other node type is assumed to have whatever the importer asks for
+		# mental ray attributes (miMaterialShader and friends) are gone
+		return not re.match(r"^mi[A-Z]", attr)
+
+
+################################################################
+# Scene
+
+class Scene(object):
+	def __init__(self):
+		# session state, kept by Reset() like plug-ins stay loaded over file -new
+		self.plugins = set(["fbxmaya", "AbcImport", "mayaUsdPlugin", "mtoa", "vrayformaya", "RenderMan_for_Maya", "redshift4maya"])
+		self.commands = { }	# command name -> (creator, syntax creator)
+		self.translators = { }	# file translator name -> (creator, options script, default options)
+		self.nodeAddedCallbacks = { }
+		self.nodeRemovedCallbacks = { }
+		self.sceneCallbacks = []	# (id, message, function)
+		self.nextCallbackId = 1
+		self.Reset()
+
+	def Reset(self):
+		# like file -new, handles to the old nodes go stale
+		for node in getattr(self, "nodes", { }).values():
+			node.alive = False
+		self.nodes = collections.OrderedDict()
+		self.calls = collections.Counter()
+		self.selection = []
+		self.counters = collections.defaultdict(int)
+		self.refreshSuspended = False
+		self.undoChunks = 0
+		self.undoQueue = []
+		self.commandResult = None
+		for name, nodeType in DEFAULT_NODES:
+			self.CreateNode(nodeType, name, notify = False)
+		for callbackId, message, function in list(self.sceneCallbacks):
+			if (message == AFTER_NEW):
+				function(None)
+
+	def Record(self, command):
+		self.calls[command] += 1
+
+	# --- nodes
+
+	def UniqueName(self, base):
+		if (base not in self.nodes):
+			return base
+		match = re.match(r"^(.*?)(\d*)$", base)
+		stem = match.group(1)
+		index = int(match.group(2)) if match.group(2) else 1
+		while (stem + str(index) in self.nodes):
+			index += 1
+		return stem + str(index)
+
+	def CreateNode(self, nodeType, name = None, parent = None, notify = True):
+		if (not name):
+			name = nodeType[0].lower() + nodeType[1:] + "1"
+		name = self.UniqueName(name)
+		parentNode = self.Get(parent) if parent else None
+		node = Node(name, nodeType, parentNode)
+		if (parentNode != None):
+			parentNode.children.append(node)
+		self.nodes[name] = node
+		self.counters["nodesCreated"] += 1
+		if (notify):
+			for callback, clientData in list(self.nodeAddedCallbacks.values()):
+				callback(node, clientData)
+		return node
+
+	def Get(self, name):
+		node = self.Find(name)
+		if (node == None):
+			raise RuntimeError("No object matches name: " + str(name))
+		return node
+
+	def Find(self, name):
+		if (name == None):
+			return None
+		if (isinstance(name, Node)):
+			return name if name.alive else None
+		name = str(name).split(".")[0]
+		if (name.startswith("|")):
+			name = name.split("|")[-1]
+		return self.nodes.get(name)
+
+	def Rename(self, node, newName):
+		newName = self.UniqueName(newName) if newName != node.name else newName
+		oldName = node.name
+		del self.nodes[oldName]
+		node.name = newName
+		self.nodes[newName] = node
+		self.selection = [newName if name == oldName else name for name in self.selection]
+		return newName
+
+	def Delete(self, node):
+		if (not node.alive):
+			return
+		for child in list(node.children):
+			self.Delete(child)
+		for attr in list(node.inputs):
+			source, sourceAttr = node.inputs[attr]
+			self.Disconnect(source, sourceAttr, node, attr)
+		for attr in list(node.outputs):
+			for destination, destinationAttr in list(node.outputs[attr]):
+				self.Disconnect(node, attr, destination, destinationAttr)
+		if (node.parent != None):
+			node.parent.children.remove(node)
+		node.alive = False
+		del self.nodes[node.name]
+		self.selection = [name for name in self.selection if name != node.name]
+		self.counters["nodesDeleted"] += 1
+		for callback, clientData in list(self.nodeRemovedCallbacks.values()):
+			callback(node, clientData)
+
+	# --- attributes
+
+	def SetAttr(self, plug, value):
+		nodeName, attr = plug.split(".", 1)
+		node = self.Get(nodeName)
+		node.attrs[attr] = value
+		self.counters["setAttr"] += 1
+
+	def GetAttr(self, plug):
+		nodeName, attr = plug.split(".", 1)
+		node = self.Get(nodeName)
+		if (attr in node.attrs):
+			return node.attrs[attr]
+		return ATTRIBUTE_DEFAULTS.get(attr.split(".")[-1], 0)
+
+	# --- connections
+
+	def SplitPlug(self, plug):
+		nodeName, attr = plug.split(".", 1)
+		return self.Get(nodeName), attr
+
+	def Connect(self, source, sourceAttr, destination, destinationAttr, force = False):
+		if (destinationAttr in destination.inputs):
+			if (destination.inputs[destinationAttr] == (source, sourceAttr)):
+				return
+			if (not force):
+				raise RuntimeError("Destination already connected: " + destination.name + "." + destinationAttr)
+			oldSource, oldAttr = destination.inputs[destinationAttr]
+			self.Disconnect(oldSource, oldAttr, destination, destinationAttr)
+		destination.inputs[destinationAttr] = (source, sourceAttr)
+		source.outputs.setdefault(sourceAttr, []).append((destination, destinationAttr))
+		self.counters["connectAttr"] += 1
+
+	def ConnectPlugs(self, sourcePlug, destinationPlug, force = False):
+		source, sourceAttr = self.SplitPlug(sourcePlug)
+		destination, destinationAttr = self.SplitPlug(destinationPlug)
+		self.Connect(source, sourceAttr, destination, destinationAttr, force)
+
+	def Disconnect(self, source, sourceAttr, destination, destinationAttr):
+		if (destination.inputs.get(destinationAttr) == (source, sourceAttr)):
+			del destination.inputs[destinationAttr]
+			source.outputs[sourceAttr].remove((destination, destinationAttr))
+			if (not source.outputs[sourceAttr]):
+				del source.outputs[sourceAttr]
+
+	def Connections(self, node, source = True, destination = True, attr = None):
+		# (attribute of this node, other node, other attribute, other node is the source)
+		result = []
+		if (source):
+			for nodeAttr, (other, otherAttr) in node.inputs.items():
+				if (attr == None or AttrMatches(nodeAttr, attr)):
+					result.append((nodeAttr, other, otherAttr, True))
+		if (destination):
+			for nodeAttr, aOthers in node.outputs.items():
+				if (attr == None or AttrMatches(nodeAttr, attr)):
+					for other, otherAttr in aOthers:
+						result.append((nodeAttr, other, otherAttr, False))
+		return result
+
+	# --- sets
+
+	def SetMembers(self, sg):
+		return [other for nodeAttr, other, otherAttr, isSource in self.Connections(sg, destination = False, attr = "dagSetMembers")]
+
+	def AddToSet(self, node, sg):
+		# a shape belongs to one shading engine at a time
+		shape = node
+		if (node.type == "transform"):
+			shapes = [child for child in node.children if child.type in SHAPE_TYPES]
+			if (not shapes):
+				return
+			shape = shapes[0]
+		for nodeAttr, other, otherAttr, isSource in self.Connections(shape, source = False, attr = "instObjGroups"):
+			if (otherAttr.startswith("dagSetMembers")):
+				self.Disconnect(shape, nodeAttr, other, otherAttr)
+		index = 0
+		while ("dagSetMembers[" + str(index) + "]" in sg.inputs):
+			index += 1
+		self.Connect(shape, "instObjGroups[0]", sg, "dagSetMembers[" + str(index) + "]")
+
+	# --- mesh import
+
+	def ImportMesh(self, filename, mode = "fbx", options = ""):
+		# the synthetic mesh files are json: {"objects" : [{"name", "material", "parent"}]}
+		with open(filename) as stream:
+			spec = json.load(stream)
+		self.counters["meshImports"] += 1
+		created = { }
+		materialSets = { }
+		for obj in spec["objects"]:
+			parent = created.get(obj.get("parent"))
+			transform = self.CreateNode("transform", obj["name"], parent)
+			created[obj["name"]] = transform
+			if (not obj.get("material")):
+				continue
+			shape = self.CreateNode("mesh", obj.get("shape", transform.name + "Shape"), transform)
+			shape.attrs["uvSets"] = obj.get("uvSets", { })
+			shape.attrs["colorSets"] = obj.get("colorSets", { })
+			materialName = obj["material"]
+			if (mode == "abc"):
+				continue
+			if ("shadingMode=[[none" in options):
+				continue
+			if (materialName not in materialSets):
+				materialType = "usdPreviewSurface" if (mode == "usd" and "displayColor" not in options) else "lambert"
+				material = self.CreateNode(materialType, materialName)
+				sg = self.CreateNode("shadingEngine", material.name + "SG")
+				self.Connect(material, "outColor", sg, "surfaceShader")
+				if (mode == "fbx" or materialType == "usdPreviewSurface"):
+					for channel in spec.get("textures", { }).get(materialName, []):
+						texFile = self.CreateNode("file", materialName + "_" + channel)
+						self.Connect(texFile, "outColor", material, channel[0].lower() + channel[1:])
+				materialSets[materialName] = sg
+			self.AddToSet(shape, materialSets[materialName])
+		return list(created.values())
+
+
+def AttrMatches(name, attr):
+	return name == attr or name.startswith(attr + "[") or name.startswith(attr + ".")
+
+
+scene = Scene()
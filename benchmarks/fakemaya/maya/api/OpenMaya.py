@@ -0,0 +1,72 @@
+################################################################
+# Recording maya.api.OpenMaya stand-in
+#
+# The few Maya Python API 2.0 calls the SpeedTree importer makes, the bulk
+# mesh reads of speedtree/opacity.py, backed by the fake scene in
+# maya._scene. Arrays are plain lists, like the sequences API 2.0 returns.
+
+from maya._scene import scene
+
+
+def Record(name):
+	scene.Record("api.OpenMaya." + name)
+
+
+################################################################
+# MFn
+
+class MFn(object):
+	kMesh = 296
+
+
+################################################################
+# MSelectionList, MDagPath
+
+class MDagPath(object):
+	def __init__(self, node = None):
+		self.nodeRef = node
+
+	def hasFn(self, fnType):
+		return fnType == MFn.kMesh and self.nodeRef.type == "mesh"
+
+class MSelectionList(object):
+	def __init__(self):
+		self.items = []
+
+	def add(self, name):
+		self.items.append(scene.Get(name))
+		return self
+
+	def getDagPath(self, index):
+		return MDagPath(self.items[index])
+
+
+################################################################
+# MFnMesh
+
+class MFloatArray(list):
+	pass
+
+class MColorArray(list):
+	pass
+
+class MFnMesh(object):
+	def __init__(self, dagPath):
+		self.node = dagPath.nodeRef
+
+	def getUVSetNames(self):
+		Record("MFnMesh.getUVSetNames")
+		return sorted(self.node.attrs.get("uvSets", { }))
+
+	def getUVs(self, uvSet = None):
+		Record("MFnMesh.getUVs")
+		aUVs = self.node.attrs.get("uvSets", { }).get(uvSet, [])
+		return MFloatArray(u for u, v in aUVs), MFloatArray(v for u, v in aUVs)
+
+	def getColorSetNames(self):
+		Record("MFnMesh.getColorSetNames")
+		return sorted(self.node.attrs.get("colorSets", { }))
+
+	def getColors(self, colorSet = None):
+		Record("MFnMesh.getColors")
+		return MColorArray(tuple(color) + (1.0,) * (4 - len(color)) for color in self.node.attrs.get("colorSets", { }).get(colorSet, []))
@@ -0,0 +1,427 @@
+################################################################
+# Recording maya.cmds stand-in
+#
+# Implements the commands the SpeedTree importer uses on top of the fake
+# scene in maya._scene, and counts every call in scene.calls.
+
+import fnmatch
+import functools
+import os.path as path
+
+import maya.OpenMaya as OpenMaya
+from maya._scene import scene, Node, DEFAULT_NODES, MATERIAL_TYPES, SET_TYPES, SHAPE_TYPES, DAG_TYPES
+
+
+def Recorded(function):
+	@functools.wraps(function)
+	def wrapper(*args, **kwargs):
+		scene.Record(function.__name__)
+		return function(*args, **kwargs)
+	return wrapper
+
+def Flag(kwargs, *names, **default):
+	for name in names:
+		if (name in kwargs):
+			return kwargs[name]
+	return default.get("default", None)
+
+def Flatten(args):
+	result = []
+	for arg in args:
+		if (isinstance(arg, (list, tuple, set))):
+			result.extend(Flatten(arg))
+		elif (arg != None):
+			result.append(arg)
+	return result
+
+def Names(nodes, long = False):
+	return [node.FullPath() if (long and node.IsDag()) else node.name for node in nodes]
+
+def ListOrNone(result):
+	return result if result else None
+
+
+################################################################
+# Nodes
+
+@Recorded
+def shadingNode(nodeType, **kwargs):
+	node = scene.CreateNode(nodeType, Flag(kwargs, "name", "n"))
+	if (Flag(kwargs, "isColorManaged", "icm")):
+		for attr in ("cmEnabled", "configFileEnabled", "configFilePath", "workingSpaceName"):
+			scene.ConnectPlugs("defaultColorMgtGlobals." + attr, node.name + "." + {"cmEnabled" : "colorManagementEnabled",
+				"configFileEnabled" : "colorManagementConfigFileEnabled", "configFilePath" : "colorManagementConfigFilePath",
+				"workingSpaceName" : "workingSpace"}[attr])
+	return node.name
+
+@Recorded
+def createNode(nodeType, **kwargs):
+	parent = Flag(kwargs, "parent", "p")
+	return scene.CreateNode(nodeType, Flag(kwargs, "name", "n"), parent).name
+
+@Recorded
+def objExists(name):
+	name = str(name)
+	node = scene.Find(name)
+	if (node == None):
+		return False
+	if ("." in name):
+		return node.HasAttribute(name.split(".", 1)[1].split("[")[0].split(".")[0])
+	return True
+
+@Recorded
+def nodeType(name, **kwargs):
+	return scene.Get(name).type
+
+@Recorded
+def rename(old, new, **kwargs):
+	return scene.Rename(scene.Get(old), new)
+
+@Recorded
+def delete(*args, **kwargs):
+	for name in Flatten(args):
+		node = scene.Find(name)
+		if (node != None):
+			scene.Delete(node)
+
+@Recorded
+def ls(*args, **kwargs):
+	if (Flag(kwargs, "selection", "sl")):
+		nodes = [scene.Get(name) for name in scene.selection]
+	elif (args and Flatten(args)):
+		nodes = []
+		for name in Flatten(args):
+			if ("*" in str(name)):
+				nodes.extend(MatchPattern(str(name)))
+			else:
+				node = scene.Find(name)
+				if (node != None):
+					nodes.append(node)
+	elif (args):
+		return []
+	else:
+		nodes = list(scene.nodes.values())
+
+	if (Flag(kwargs, "defaultNodes", "dn")):
+		aDefaults = set(name for name, nodeType in DEFAULT_NODES)
+		nodes = [node for node in nodes if node.name in aDefaults]
+	if (Flag(kwargs, "materials", "mat")):
+		nodes = [node for node in nodes if node.type in MATERIAL_TYPES]
+	if (Flag(kwargs, "sets")):
+		nodes = [node for node in nodes if node.type in SET_TYPES]
+	if (Flag(kwargs, "transforms", "tr")):
+		nodes = [node for node in nodes if node.type in ("transform", "lodGroup")]
+	if (Flag(kwargs, "dag")):
+		nodes = [node for node in nodes if node.IsDag()]
+	if (Flag(kwargs, "shapes")):
+		nodes = [node for node in nodes if node.type in SHAPE_TYPES]
+	nodeTypes = Flag(kwargs, "type", "typ")
+	if (nodeTypes):
+		if (not isinstance(nodeTypes, (list, tuple))):
+			nodeTypes = [nodeTypes]
+		nodes = [node for node in nodes if node.type in nodeTypes]
+	return Names(nodes, Flag(kwargs, "long", "l"))
+
+def MatchPattern(pattern):
+	if ("." in pattern):
+		nodePattern, attr = pattern.split(".", 1)
+		return [node for node in scene.nodes.values() if fnmatch.fnmatchcase(node.name, nodePattern) and attr in node.dynamic]
+	return [node for node in scene.nodes.values() if fnmatch.fnmatchcase(node.name, pattern)]
+
+@Recorded
+def select(*args, **kwargs):
+	if (Flag(kwargs, "clear", "cl")):
+		scene.selection = []
+		return
+	names = [scene.Get(name).name for name in Flatten(args)]
+	if (Flag(kwargs, "add")):
+		scene.selection.extend(name for name in names if name not in scene.selection)
+	else:
+		scene.selection = names
+	scene.counters["selectionChanges"] += 1
+
+@Recorded
+def listRelatives(*args, **kwargs):
+	nodes = [scene.Get(name) for name in Flatten(args)] or [scene.Get(name) for name in scene.selection]
+	result = []
+	for node in nodes:
+		if (Flag(kwargs, "parent", "p")):
+			if (node.parent != None):
+				result.append(node.parent)
+			continue
+		if (Flag(kwargs, "allDescendents", "ad")):
+			stack = list(node.children)
+			while (stack):
+				child = stack.pop()
+				result.append(child)
+				stack.extend(child.children)
+		else:
+			result.extend(node.children)
+	if (Flag(kwargs, "shapes", "s")):
+		result = [node for node in result if node.type in SHAPE_TYPES]
+	nodeTypes = Flag(kwargs, "type", "typ")
+	if (nodeTypes):
+		if (not isinstance(nodeTypes, (list, tuple))):
+			nodeTypes = [nodeTypes]
+		result = [node for node in result if node.type in nodeTypes]
+	return ListOrNone(Names(result, Flag(kwargs, "fullPath", "f")))
+
+
+################################################################
+# Attributes
+
+@Recorded
+def setAttr(plug, *values, **kwargs):
+	if (len(values) == 1):
+		value = values[0]
+	else:
+		value = tuple(values)
+	node, attr = scene.SplitPlug(plug)
+	if (Flag(kwargs, "type") == "string" and not isinstance(value, str)):
+		raise RuntimeError("setAttr: string expected for " + plug)
+	scene.SetAttr(plug, value)
+
+@Recorded
+def getAttr(plug, **kwargs):
+	value = scene.GetAttr(plug)
+	if (isinstance(value, tuple)):
+		return [value]
+	return value
+
+@Recorded
+def addAttr(*args, **kwargs):
+	node = scene.Get(Flatten(args)[0]) if args else scene.Get(scene.selection[0])
+	node.dynamic.add(Flag(kwargs, "longName", "ln"))
+
+@Recorded
+def deleteAttr(plug, **kwargs):
+	node, attr = scene.SplitPlug(plug)
+	node.dynamic.discard(attr)
+	node.attrs.pop(attr, None)
+
+@Recorded
+def attributeQuery(attr, **kwargs):
+	node = scene.Get(Flag(kwargs, "node", "n"))
+	if (Flag(kwargs, "exists", "ex")):
+		return node.HasAttribute(attr)
+	return None
+
+@Recorded
+def connectAttr(source, destination, **kwargs):
+	scene.ConnectPlugs(source, destination, Flag(kwargs, "force", "f", default = False))
+
+@Recorded
+def disconnectAttr(source, destination, **kwargs):
+	sourceNode, sourceAttr = scene.SplitPlug(source)
+	destinationNode, destinationAttr = scene.SplitPlug(destination)
+	scene.Disconnect(sourceNode, sourceAttr, destinationNode, destinationAttr)
+
+@Recorded
+def connectionInfo(plug, **kwargs):
+	node, attr = scene.SplitPlug(plug)
+	if (Flag(kwargs, "sourceFromDestination", "sfd")):
+		if (attr in node.inputs):
+			source, sourceAttr = node.inputs[attr]
+			return source.name + "." + sourceAttr
+		return ""
+	return ""
+
+@Recorded
+def listConnections(*args, **kwargs):
+	source = Flag(kwargs, "source", "s", default = True)
+	destination = Flag(kwargs, "destination", "d", default = True)
+	plugs = Flag(kwargs, "plugs", "p")
+	connections = Flag(kwargs, "connections", "c")
+	shapes = Flag(kwargs, "shapes", "sh")
+	nodeTypes = Flag(kwargs, "type", "t")
+	result = []
+	for name in Flatten(args):
+		node = scene.Get(name)
+		attr = str(name).split(".", 1)[1] if "." in str(name) else None
+		for nodeAttr, other, otherAttr, isSource in scene.Connections(node, source, destination, attr):
+			if (nodeTypes and other.type != nodeTypes):
+				continue
+			otherName = other.name
+			if (not shapes and not plugs and other.type in SHAPE_TYPES and other.parent != None):
+				otherName = other.parent.name
+			if (connections):
+				result.append(node.name + "." + nodeAttr)
+			result.append(otherName + "." + otherAttr if plugs else otherName)
+	return ListOrNone(result)
+
+@Recorded
+def listHistory(*args, **kwargs):
+	result = []
+	seen = set()
+	stack = [scene.Get(name) for name in Flatten(args)]
+	while (stack):
+		node = stack.pop()
+		if (node.name in seen):
+			continue
+		seen.add(node.name)
+		if (Flag(kwargs, "pruneDagObjects", "pdo") and node.IsDag()):
+			continue
+		result.append(node.name)
+		for attr, (source, sourceAttr) in node.inputs.items():
+			if (source.type not in ("colorManagementGlobals", "time")):
+				stack.append(source)
+	return result
+
+@Recorded
+def defaultNavigation(**kwargs):
+	source = Flag(kwargs, "source", "s")
+	destination = Flag(kwargs, "destination", "d")
+	for sourceAttr, destinationAttr in PLACE2D_CONNECTIONS:
+		scene.ConnectPlugs(source + "." + sourceAttr, destination + "." + destinationAttr)
+
+PLACE2D_CONNECTIONS = [("outUV", "uvCoord"), ("outUvFilterSize", "uvFilterSize"), ("coverage", "coverage"),
+						("translateFrame", "translateFrame"), ("rotateFrame", "rotateFrame"), ("mirrorU", "mirrorU"),
+						("mirrorV", "mirrorV"), ("stagger", "stagger"), ("wrapU", "wrapU"), ("wrapV", "wrapV"),
+						("repeatUV", "repeatUV"), ("offset", "offset"), ("rotateUV", "rotateUV"), ("noiseUV", "noiseUV"),
+						("vertexUvOne", "vertexUvOne"), ("vertexUvTwo", "vertexUvTwo"), ("vertexUvThree", "vertexUvThree"),
+						("vertexCameraOne", "vertexCameraOne")]
+
+
+################################################################
+# Sets, display and selection
+
+@Recorded
+def sets(*args, **kwargs):
+	members = Flatten(args) or list(scene.selection)
+	forceElement = Flag(kwargs, "forceElement", "fe")
+	if (forceElement):
+		sg = scene.Get(forceElement)
+		for name in members:
+			scene.AddToSet(scene.Get(name), sg)
+		return None
+	if (Flag(kwargs, "query", "q")):
+		return ListOrNone(Names(scene.SetMembers(scene.Get(members[0]))))
+	node = scene.CreateNode("shadingEngine" if Flag(kwargs, "renderable", "r") else "objectSet", Flag(kwargs, "name", "n"))
+	return node.name
+
+@Recorded
+def polyOptions(*args, **kwargs):
+	names = Flatten(args) or list(scene.selection)
+	for name in names:
+		node = scene.Get(name)
+		shapes = [node] if node.type == "mesh" else [child for child in node.children if child.type == "mesh"]
+		for shape in shapes:
+			if ("colorShadedDisplay" in kwargs or "cs" in kwargs):
+				shape.attrs["displayColors"] = Flag(kwargs, "colorShadedDisplay", "cs")
+
+@Recorded
+def refresh(**kwargs):
+	if ("suspend" in kwargs or "su" in kwargs):
+		scene.refreshSuspended = Flag(kwargs, "suspend", "su")
+	elif (Flag(kwargs, "query", "q")):
+		return scene.refreshSuspended
+
+@Recorded
+def ogs(**kwargs):
+	if (Flag(kwargs, "pause")):
+		scene.refreshSuspended = not scene.refreshSuspended
+
+@Recorded
+def undoInfo(**kwargs):
+	if (Flag(kwargs, "openChunk", "ock")):
+		scene.undoChunks += 1
+	if (Flag(kwargs, "query", "q")):
+		return True
+
+@Recorded
+def about(**kwargs):
+	if (Flag(kwargs, "batch", "b")):
+		return True
+	return ""
+
+@Recorded
+def pluginInfo(name, **kwargs):
+	return name in scene.plugins
+
+@Recorded
+def loadPlugin(name, **kwargs):
+	scene.plugins.add(path.splitext(path.basename(name))[0])
+
+@Recorded
+def duplicate(*args, **kwargs):
+	result = []
+	for name in Flatten(args):
+		node = scene.Get(name)
+		copy = scene.CreateNode(node.type, node.name, node.parent.name if node.parent else None)
+		copy.attrs.update(node.attrs)
+		result.append(copy.name)
+	return result
+
+@Recorded
+def instance(*args, **kwargs):
+	result = []
+	for name in Flatten(args):
+		node = scene.Get(name)
+		copy = scene.CreateNode("transform", node.name, node.parent.name if node.parent else None)
+		copy.attrs["instanceOf"] = node.name
+		result.append(copy.name)
+	return result
+
+@Recorded
+def group(*args, **kwargs):
+	node = scene.CreateNode("transform", Flag(kwargs, "name", "n") or "group1")
+	for name in Flatten(args):
+		child = scene.Get(name)
+		if (child.parent != None):
+			child.parent.children.remove(child)
+		child.parent = node
+		node.children.append(child)
+	return node.name
+
+@Recorded
+def parent(*args, **kwargs):
+	names = Flatten(args)
+	newParent = scene.Get(names[-1])
+	for name in names[:-1]:
+		child = scene.Get(name)
+		if (child.parent != None):
+			child.parent.children.remove(child)
+		child.parent = newParent
+		newParent.children.append(child)
+	return names[:-1]
+
+@Recorded
+def lodGroup(*args, **kwargs):
+	return None
+
+@Recorded
+def xform(*args, **kwargs):
+	return [0.0] * 16 if Flag(kwargs, "query", "q") else None
+
+@Recorded
+def workspace(*args, **kwargs):
+	return "/tmp"
+
+@Recorded
+def file(*args, **kwargs):
+	if (Flag(kwargs, "query", "q") and Flag(kwargs, "sceneName", "sn")):
+		return ""
+	if (Flag(kwargs, "query", "q") and Flag(kwargs, "modified", "mf")):
+		return False
+	return None
+
+
+def __getattr__(name):
+	# commands registered by plug-ins
+	if (name in scene.commands):
+		def command(*args, **kwargs):
+			scene.Record(name)
+			creator, syntaxCreator = scene.commands[name]
+			instance = creator()
+			# flags come in as "-name value" like Maya passes them to doIt()
+			aArgs = OpenMaya.MArgList(Flatten(args))
+			for flag, value in kwargs.items():
+				aArgs.extend(["-" + flag] + ([] if value is True else [value]))
+			if (syntaxCreator != None):
+				instance.syntaxObject = syntaxCreator()
+			instance.doIt(aArgs)
+			if (instance.isUndoable()):
+				scene.undoQueue.append(instance)
+			return scene.commandResult
+		return command
+	raise AttributeError(name)
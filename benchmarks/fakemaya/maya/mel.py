@@ -0,0 +1,24 @@
+################################################################
+# Recording maya.mel stand-in
+
+import re
+
+from maya._scene import scene
+
+
+def eval(command):
+	scene.Record("mel.eval")
+	command = command.strip()
+	quoted = re.findall(r'"((?:[^"\\]|\\.)*)"', command)
+	if (command.startswith("AbcImport")):
+		return scene.ImportMesh(quoted[-1], "abc", command)
+	if (command.startswith("file ") and "-import" in command):
+		mode = "usd" if "USD Import" in command else "fbx"
+		options = ""
+		match = re.search(r'-options "([^"]*)"', command)
+		if (match):
+			options = match.group(1)
+		return scene.ImportMesh(quoted[-1], mode, options)
+	if (command.startswith("FBXProperty") or command.startswith("source") or command.startswith("global proc")):
+		return None
+	return None
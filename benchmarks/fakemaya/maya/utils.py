@@ -0,0 +1,21 @@
+################################################################
+# maya.utils stand-in
+#
+# executeDeferred() queues the call like Maya does until the main thread is
+# idle, processIdleEvents() runs what is queued.
+
+import threading
+
+deferred = []
+lock = threading.Lock()
+
+def executeDeferred(function, *args, **kwargs):
+	with lock:
+		deferred.append((function, args, kwargs))
+
+def processIdleEvents():
+	with lock:
+		aCalls = list(deferred)
+		del deferred[:]
+	for function, args, kwargs in aCalls:
+		function(*args, **kwargs)
@@ -0,0 +1,102 @@
+################################################################
+# Graph backend benchmark
+#
+# Times building the shading networks of a synthetic tree with the
+# "commands" and the "modifier" graph backends, for every renderer whose
+# plug-in can be loaded, and prints how many operations of each kind the
+# renderer's mapping table runs per material. Run it with mayapy:
+#
+#   mayapy benchmarks/graph_backends.py [-n 50] [-r 5]
+
+import argparse
+import collections
+import os.path as path
+import sys
+import time
+
+pluginDir = path.join(path.dirname(path.dirname(path.abspath(__file__))), "plug-ins")
+if (pluginDir not in sys.path):
+	sys.path.append(pluginDir)
+
+
+################################################################
+# Synthetic materials
+
+def MakeMaterials(count):
+	from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial
+
+	aMaterials = []
+	for index in range(count):
+		material = SpeedTreeMaterial("Bench" + str(index) + "_Mat", index % 2, (index % 3) == 0)
+		# a handful of images shared between materials like on a real tree
+		material.maps["Color"] = SpeedTreeMap(file = "bark_" + str(index % 4) + "_Color.png")
+		material.maps["Normal"] = SpeedTreeMap(file = "bark_" + str(index % 4) + "_Normal.png")
+		material.maps["Gloss"] = SpeedTreeMap(0.3, 0.3, 0.3)
+		if (index % 2):
+			material.maps["Opacity"] = SpeedTreeMap(file = "leaf_Opacity.png")
+			material.maps["SubsurfaceAmount"] = SpeedTreeMap(0.5, 0.5, 0.5)
+			material.maps["SubsurfaceColor"] = SpeedTreeMap(file = "leaf_Subsurface.png")
+		aMaterials.append(material)
+	return aMaterials
+
+
+################################################################
+# Benchmark
+
+def TimeBackend(translatorClass, backend, aMaterials):
+	import maya.cmds as mc
+	from speedtree.graph import GRAPH_BACKENDS
+	from speedtree.textures import TextureCache
+
+	mc.file(new = True, force = True)
+	translator = translatorClass()
+	translator.graph = GRAPH_BACKENDS[backend]()
+	translator.textureCache = TextureCache(False, translator.graph.Exists)
+	start = time.perf_counter()
+	for material in aMaterials:
+		translator.CreateMaterial(material, [], 1)
+	translator.graph.Commit()
+	return time.perf_counter() - start
+
+def main():
+	parser = argparse.ArgumentParser(description = "Compare the SpeedTree graph backends")
+	parser.add_argument("-n", "--materials", type = int, default = 50, help = "materials per tree")
+	parser.add_argument("-r", "--repeat", type = int, default = 5, help = "runs per backend, the best one is reported")
+	args = parser.parse_args()
+
+	import maya.standalone
+	maya.standalone.initialize(name = "python")
+	import maya.cmds as mc
+
+	mc.loadPlugin(path.join(pluginDir, "SpeedTreeImporter.py"), quiet = True)
+	import SpeedTreeImporter
+	from speedtree.batch import TRANSLATORS
+
+	aMaterials = MakeMaterials(args.materials)
+	for subclass in SpeedTreeImporter.SpeedTreeImporterTranslatorBase.__subclasses__():
+		renderer = [plugin for description, plugin in TRANSLATORS.values() if description == subclass.description]
+		try:
+			if (renderer):
+				mc.loadPlugin(renderer[0], quiet = True)
+		except RuntimeError:
+			print(subclass.description + ": renderer not available, skipped")
+			continue
+
+		aTimes = { }
+		for backend in ("commands", "modifier"):
+			aTimes[backend] = min(TimeBackend(subclass, backend, aMaterials) for run in range(args.repeat))
+		print("%-24s commands %8.1f ms   modifier %8.1f ms   %5.2fx" % (subclass.description,
+				aTimes["commands"] * 1000.0, aTimes["modifier"] * 1000.0, aTimes["commands"] / max(aTimes["modifier"], 1e-9)))
+
+		# what the mapping table asks for per material
+		plan = subclass().MaterialPlan()
+		cost = collections.Counter()
+		for material in aMaterials:
+			cost.update(plan.Cost(material))
+		print("    operations per material: " + ", ".join("%s %.1f" % (kind, count / float(len(aMaterials))) for kind, count in sorted(cost.items())))
+
+	maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+	main()
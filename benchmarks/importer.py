@@ -0,0 +1,147 @@
+################################################################
+# Importer benchmark
+#
+# Imports a synthetic tree with every translator of the plug-in against the
+# recording maya stand-ins in benchmarks/fakemaya, so it runs with a plain
+# Python on any box. For each translator and each size of the scene the tree
+# is imported into, it reports the wall time of reader(), the Maya calls it
+# made and the nodes it created, then how time and calls grow with the scene:
+#
+#   python benchmarks/importer.py [-n 50] [-s 0,1000,10000] [-r 3] [--calls]
+#
+# --json writes the results, --baseline compares the calls against results
+# written earlier and exits with 1 when a translator makes more of them.
+# Compare runs with the same tree and backend options: the call counts do not
+# depend on the box, the times only compare between runs on the same one.
+
+import argparse
+import collections
+import contextlib
+import io
+import json
+import os.path as path
+import shutil
+import sys
+import tempfile
+import time
+
+benchmarkDir = path.dirname(path.abspath(__file__))
+pluginDir = path.join(path.dirname(benchmarkDir), "plug-ins")
+for directory in (pluginDir, path.join(benchmarkDir, "fakemaya")):
+	if (directory in sys.path):
+		sys.path.remove(directory)
+	sys.path.insert(0, directory)
+
+from synthetic import MakeTree, PopulateScene
+
+
+################################################################
+# Benchmark
+
+def ImportTree(translatorClass, stmatFile, sceneNodes, backend):
+	import maya.OpenMaya as OpenMaya
+	import maya.OpenMayaMPx as OpenMayaMPx
+	from maya._scene import scene
+
+	scene.Reset()
+	PopulateScene(sceneNodes)
+	translator = translatorClass()
+	translator.options.parseCache = False
+	translator.options.stats = False
+	translator.options.graphBackend = backend
+	output = io.StringIO()
+	start = time.perf_counter()
+	with contextlib.redirect_stdout(output):
+		translator.reader(OpenMaya.MFileObject(stmatFile), "", OpenMayaMPx.MPxFileTranslator.kImportAccessMode)
+	seconds = time.perf_counter() - start
+	return { "seconds" : seconds,
+			"calls" : sum(scene.calls.values()),
+			"nodes" : scene.counters["nodesCreated"],
+			"commands" : dict(scene.calls),
+			"errors" : [line for line in output.getvalue().splitlines() if "ERROR" in line] }
+
+def Slope(aPoints):
+	# least squares slope of (x, y) points
+	if (len(aPoints) < 2):
+		return 0.0
+	meanX = sum(x for x, y in aPoints) / float(len(aPoints))
+	meanY = sum(y for x, y in aPoints) / float(len(aPoints))
+	variance = sum((x - meanX) ** 2 for x, y in aPoints)
+	if (variance == 0):
+		return 0.0
+	return sum((x - meanX) * (y - meanY) for x, y in aPoints) / variance
+
+def Compare(results, baseline):
+	# translators and scene sizes whose call count went up since the baseline
+	aRegressions = []
+	for description, aSizes in sorted(results.items()):
+		for size, result in sorted(aSizes.items(), key = lambda item: int(item[0])):
+			before = baseline.get(description, { }).get(size)
+			if (before != None and result["calls"] > before["calls"]):
+				aCommands = []
+				for command, count in sorted(result["commands"].items()):
+					if (count > before["commands"].get(command, 0)):
+						aCommands.append("%s +%d" % (command, count - before["commands"].get(command, 0)))
+				aRegressions.append("%s, scene %s: %d calls, was %d (%s)" % (description, size, result["calls"], before["calls"], ", ".join(aCommands)))
+	return aRegressions
+
+def main():
+	parser = argparse.ArgumentParser(description = "Benchmark the SpeedTree translators against the recording maya stand-ins")
+	parser.add_argument("-n", "--materials", type = int, default = 50, help = "materials per tree")
+	parser.add_argument("-m", "--maps", type = int, default = 4, help = "maps per material")
+	parser.add_argument("-i", "--images", type = int, default = 4, help = "distinct images per map")
+	parser.add_argument("-o", "--objects", type = int, default = 1, help = "objects per material")
+	parser.add_argument("-f", "--format", choices = ("fbx", "usd", "abc"), default = "fbx", help = "mesh format")
+	parser.add_argument("-s", "--scene", default = "0,1000,10000", help = "comma separated sizes of the scene before the import, in nodes")
+	parser.add_argument("-r", "--repeat", type = int, default = 3, help = "runs per size, the best one is reported")
+	parser.add_argument("-b", "--backend", choices = ("commands", "modifier"), default = "modifier", help = "graph backend")
+	parser.add_argument("--calls", action = "store_true", help = "print the calls per command")
+	parser.add_argument("--json", default = None, help = "write the results to this file")
+	parser.add_argument("--baseline", default = None, help = "results of an earlier run to compare the calls with")
+	args = parser.parse_args()
+
+	import SpeedTreeImporter
+	SpeedTreeImporter.initializePlugin(None)
+
+	aSizes = [int(size) for size in args.scene.split(",") if size.strip()]
+	directory = tempfile.mkdtemp(prefix = "speedtree_bench_")
+	try:
+		stmatFile = MakeTree(directory, args.materials, args.maps, images = args.images, objects = args.objects, extension = "." + args.format)
+		results = collections.OrderedDict()
+		for subclass in SpeedTreeImporter.SpeedTreeImporterTranslatorBase.__subclasses__():
+			aResults = collections.OrderedDict()
+			for size in aSizes:
+				aRuns = [ImportTree(subclass, stmatFile, size, args.backend) for run in range(max(1, args.repeat))]
+				aResults[str(size)] = min(aRuns, key = lambda result: result["seconds"])
+			results[subclass.description] = aResults
+
+			print(subclass.description)
+			for size, result in aResults.items():
+				print("    scene %8s nodes   %9.1f ms   %7d calls   %6d nodes created" % (size, result["seconds"] * 1000.0, result["calls"], result["nodes"]))
+				for error in result["errors"]:
+					print("        " + error)
+				if (args.calls):
+					for command, count in sorted(result["commands"].items(), key = lambda item: -item[1]):
+						print("        %-40s %7d" % (command, count))
+			if (len(aSizes) > 1):
+				timeSlope = Slope([(int(size), result["seconds"] * 1000.0) for size, result in aResults.items()])
+				callSlope = Slope([(int(size), result["calls"]) for size, result in aResults.items()])
+				print("    per 1000 scene nodes: %+.2f ms, %+.1f calls" % (timeSlope * 1000.0, callSlope * 1000.0))
+	finally:
+		shutil.rmtree(directory, ignore_errors = True)
+		SpeedTreeImporter.uninitializePlugin(None)
+
+	if (args.json):
+		with open(args.json, "w") as stream:
+			json.dump(results, stream, indent = 2)
+	if (args.baseline):
+		with open(args.baseline) as stream:
+			aRegressions = Compare(results, json.load(stream))
+		for regression in aRegressions:
+			print("SpeedTree REGRESSION: " + regression)
+		return 1 if aRegressions else 0
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
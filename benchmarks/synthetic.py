@@ -0,0 +1,106 @@
+################################################################
+# Synthetic trees and scenes
+#
+# Writes .stmat files of any size together with the mesh file the fake maya
+# package imports for them (JSON: the objects, the material each one uses
+# and the textures the mesh importer brings along) and empty stand-ins for
+# the images, so the texture resolver finds them, and fills the fake scene
+# with the nodes an artist's scene already holds before the import. All of it
+# is seeded so two runs build the same tree.
+
+import json
+import os
+import os.path as path
+import random
+
+
+################################################################
+# Trees
+
+# in the order MakeTree adds them, maps = 3 gives Color, Normal and Gloss
+MAP_NAMES = ("Color", "Normal", "Gloss", "Opacity", "SubsurfaceColor", "SubsurfaceAmount")
+
+# maps the FBX and USD importers make file nodes for on their own materials
+MESH_TEXTURES = ("Color", "Normal", "Opacity")
+
+BLEND_SET = "blend_ao"
+BLEND_VERTICES = 64
+
+def MakeTree(directory, materials = 50, maps = 4, files = 0.75, images = 4, objects = 1, extension = ".fbx", name = "tree", seed = 1, opaque = 0.5):
+	# materials    materials in the .stmat
+	# maps         maps per material, the first ones of MAP_NAMES
+	# files        share of the maps that are images, the rest are constants
+	# images       distinct images per map, fewer images make more identical materials
+	# objects      objects per material
+	# opaque       share of the vertex opacity materials whose blend_ao is 1.0 on every vertex
+	rng = random.Random(seed)
+	if (not path.isdir(directory)):
+		os.makedirs(directory)
+
+	aMaterials = []
+	aObjects = []
+	aTextures = { }
+	aImages = set()
+	for index in range(materials):
+		materialName = name + str(index) + "_Mat"
+		aMaps = []
+		for mapName in MAP_NAMES[:maps]:
+			if (rng.random() < files):
+				image = "%s_%d_%s.png" % (name, rng.randrange(images), mapName)
+				aImages.add(image)
+				aMaps.append('<Map Name="%s" File="%s"/>' % (mapName, image))
+				if (mapName in MESH_TEXTURES):
+					aTextures.setdefault(materialName, []).append(mapName)
+			else:
+				value = round(rng.random(), 2)
+				aMaps.append('<Map Name="%s" ColorR="%s" ColorG="%s" ColorB="%s"/>' % (mapName, value, value, value))
+		vertexOpacity = rng.random() < 0.3
+		aMaterials.append('<Material Name="%s" TwoSided="%d" VertexOpacity="%d" UserData="">%s</Material>' %
+						(materialName, rng.random() < 0.5, vertexOpacity, "".join(aMaps)))
+		# blend_ao holds the vertex opacity in U and the ambient occlusion in V
+		blend = 1.0 if (rng.random() < opaque) else 0.5
+		for objectIndex in range(objects):
+			objectName = name + str(index) + ("_" + str(objectIndex) if objectIndex else "")
+			obj = { "name" : objectName, "shape" : objectName + "_Shape", "material" : materialName }
+			if (vertexOpacity):
+				obj["uvSets"] = { BLEND_SET : [[1.0, 0.8]] * (BLEND_VERTICES - 1) + [[blend, 0.8]] }
+			aObjects.append(obj)
+
+	for image in aImages:
+		if (not path.isfile(path.join(directory, image))):
+			open(path.join(directory, image), "wb").close()
+
+	meshFile = name + extension
+	with open(path.join(directory, meshFile), "w") as stream:
+		json.dump({ "objects" : aObjects, "textures" : aTextures }, stream)
+	stmatFile = path.join(directory, name + ".stmat")
+	with open(stmatFile, "w") as stream:
+		stream.write('<?xml version="1.0" encoding="UTF-8"?>\n<Materials Mesh="%s">\n%s\n</Materials>\n' % (meshFile, "\n".join(aMaterials)))
+	return stmatFile
+
+
+################################################################
+# Scenes
+
+# nodes PopulateScene makes per asset: transform, mesh, lambert, shading group, file, place2dTexture
+NODES_PER_ASSET = 6
+
+def PopulateScene(nodes, name = "existing"):
+	# fill the fake scene with about nodes nodes of shaded, textured meshes, without counting them
+	from maya._scene import scene
+
+	for index in range(nodes // NODES_PER_ASSET):
+		prefix = name + str(index)
+		transform = scene.CreateNode("transform", prefix, notify = False)
+		shape = scene.CreateNode("mesh", prefix + "Shape", transform, notify = False)
+		material = scene.CreateNode("lambert", prefix + "_Mat", notify = False)
+		sg = scene.CreateNode("shadingEngine", prefix + "_MatSG", notify = False)
+		texFile = scene.CreateNode("file", prefix + "_Color", notify = False)
+		placement = scene.CreateNode("place2dTexture", prefix + "_place2dTexture", notify = False)
+		texFile.attrs["fileTextureName"] = prefix + "_Color.png"
+		scene.Connect(placement, "outUV", texFile, "uvCoord")
+		scene.Connect(texFile, "outColor", material, "color")
+		scene.Connect(material, "outColor", sg, "surfaceShader")
+		scene.AddToSet(shape, sg)
+	scene.calls.clear()
+	scene.counters.clear()
@@ -21,37 +21,60 @@ import maya.cmds as mc
 import maya.mel as mel
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
-import xml.dom.minidom as xmldom
 import os.path as path
+import re
 import sys
 
-
-################################################################
-# class SpeedTreeMaterial
-
-class SpeedTreeMap:
-	def __init__(self, red = 1.0, green = 1.0, blue = 1.0, file = ""):
-		self.red = red
-		self.green = green
-		self.blue = blue
-		self.file = file
-
-class SpeedTreeMaterial:
-	def __init__(self, name, twoSided = False, vertexOpacity = False, userData = ""):
-		self.shader = None
-		self.name = name
-		self.twoSided = twoSided
-		self.vertexOpacity = vertexOpacity
-		self.userData = userData
-		self.maps = { }
+# the support modules live in the speedtree folder next to this file
+pluginDir = path.dirname(path.abspath(__file__))
+if (pluginDir not in sys.path):
+	sys.path.append(pluginDir)
+
+from speedtree.mapping import MaterialPlan, Rule, Node, Texture, Set, Connect, ShapeFlag, Result
+from speedtree.mapping import FILE, VALUE, RED, INVERSE_RED, RGB, MAP_FILE, TWO_SIDED, BLEND_IN_TEXCOORD, SHADER, TEXTURE, UTILITY
+from speedtree.library import GetShaderLibrary, ReleaseShaderLibrary
+from speedtree.graph import CommandGraph, GRAPH_BACKENDS, COMMIT_COMMAND, SpeedTreeCommitGraphCommand
+from speedtree.filters import ImportFilter, DeleteMembers
+from speedtree.instances import INSTANCING_MODES, SourceKey, FindImport, TagImport, InstanceImport
+from speedtree.lods import ParseLods, LodLevels, DropLods, BuildLodGroup, LodRoots
+from speedtree.meshproxy import CreateMeshProxy, ProxySets, ShadeMeshProxy, EXPAND_COMMAND, SpeedTreeExpandCommand
+from speedtree.opacity import GetOpacityAnalyzer
+from speedtree.options import ImportOptions
+from speedtree.optionsui import OPTIONS_SCRIPT, MEL_OPTIONS_SCRIPT
+from speedtree.parsecache import GetParseCache
+from speedtree.proxies import GetProxyTextures, ReleaseProxyTextures
+from speedtree.resolver import TextureResolver
+from speedtree.scene import SceneDelta, SuspendRefresh, ListMeshTransforms, ListRootTransforms
+from speedtree.session import RegisterTranslators, IMPORT_COMMAND, SpeedTreeImportCommand
+from speedtree.shapes import ShapeFlags
+from speedtree.stats import ImportStats, DefaultLogFile
+from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial, ParseMaterialFile
+from speedtree.textureprep import TexturePreparer, FindTool
+from speedtree.texturememory import TextureMemory, TagTextureMemory, Summary
+from speedtree.textures import TextureCache, DEFAULT_UV_TRANSFORM
+
+# the number Maya adds to a name that is already in the scene, before or after the SG of a shading group
+NUMBERED_NAME = re.compile(r"(SG)?\d+(SG)?$")
 
 
 ################################################################
 # SpeedTreeImporterTranslatorBase
 
 class SpeedTreeImporterTranslatorBase(OpenMayaMPx.MPxFileTranslator):
+	# the Rules CreateMaterial builds the shading network from, see speedtree/mapping.py
+	mapping = []
 	def __init__(self):
 		OpenMayaMPx.MPxFileTranslator.__init__(self)
+		self.options = ImportOptions()
+		self.textureCache = TextureCache()
+		self.graph = CommandGraph()
+		self.shapeFlags = ShapeFlags()
+		self.texturePrep = None
+		self.proxies = None
+		self.proxyFiles = []
+		self.directory = ""
+		self.resolver = None
+		self.session = None	# the ImportSession of a multi-file import, see speedtree/session.py
 	def haveWriteMethod(self):
 		return False
 	def haveReadMethod(self):
@@ -65,14 +88,53 @@ class SpeedTreeImporterTranslatorBase(OpenMayaMPx.MPxFileTranslator):
 	def writer(self, fileObject, optionString, accessMode):
 		pass
 
-	def CreateFileTexture(self, filename, colorManagement = True):
-		texFile = mc.shadingNode("file", asTexture = True, isColorManaged = colorManagement)
-		if (filename.find("<UDIM>") > -1):
-			mc.setAttr(texFile + ".uvTilingMode", 3)
-			filename = filename.replace("<UDIM>", "1001")
-		mc.setAttr(texFile + ".fileTextureName", filename, type = "string")
-		tex2dPlacement = mc.shadingNode("place2dTexture", asUtility = True)
-		mc.defaultNavigation(connectToExisting=True, source=tex2dPlacement, destination=texFile)
+	def ResolveTexture(self, filename):
+		# the path of an image that is not read through a file node, found like CreateFileTexture finds them
+		if (self.resolver != None):
+			return self.resolver.Resolve(filename)[0] or filename
+		return filename
+
+	def CreateFileTexture(self, filename, colorSpace = None, ignoreFileRules = False, invert = False, colorManagement = True):
+		# relative paths are found from the .stmat, UDIM sets start at their first tile, missing images keep their path
+		aTiles = None
+		missing = False
+		if (self.resolver != None):
+			resolved, aTiles = self.resolver.Resolve(filename)
+			missing = (resolved == None)
+			filename = resolved or filename
+
+		# maps that share an image and its settings share one file node
+		key = self.textureCache.FileKey(filename, colorSpace, ignoreFileRules, invert, colorManagement)
+		texFile = self.textureCache.FindFile(key)
+		if (texFile != None):
+			return texFile
+
+		texFile = self.graph.ShadingNode("file", asTexture = True, isColorManaged = colorManagement)
+		# the viewport shows a downscaled copy once a worker has made it, UDIM sets keep their tiles
+		if (self.proxies != None and not missing):
+			proxy = self.proxies.Submit(filename if path.isabs(filename) else path.join(self.directory, filename), self.options.proxyScale)
+			if (proxy != None):
+				self.proxyFiles.append((texFile, proxy))
+		udim = (filename.find("<UDIM>") > -1)
+		if (udim):
+			self.graph.SetAttr(texFile + ".uvTilingMode", 3)
+			filename = filename.replace("<UDIM>", str(aTiles[0]) if aTiles else "1001")
+		# a prepared texture is assigned once it is converted, right before the commit, UDIM sets keep their tiles
+		if (udim or missing or self.texturePrep == None or not self.texturePrep.Submit(texFile, filename, colorSpace)):
+			self.graph.SetAttr(texFile + ".fileTextureName", filename, type = "string")
+		if (colorSpace):
+			self.graph.SetAttr(texFile + ".colorSpace", colorSpace, type = "string")
+		if (ignoreFileRules):
+			self.graph.SetAttr(texFile + ".ignoreColorSpaceFileRules", 1)
+		if (invert):
+			self.graph.SetAttr(texFile + ".invert", True)
+
+		# and all of them share one placement while the uv transform is the same
+		tex2dPlacement = self.textureCache.FindPlacement(DEFAULT_UV_TRANSFORM)
+		if (tex2dPlacement == None):
+			tex2dPlacement = self.graph.ShadingNode("place2dTexture", asUtility = True)
+			self.textureCache.AddPlacement(tex2dPlacement, DEFAULT_UV_TRANSFORM)
+		self.graph.DefaultNavigation(tex2dPlacement, texFile)
 		'''mc.connectAttr(tex2dPlacement + ".outUV", texFile + ".uvCoord")
 		mc.connectAttr(tex2dPlacement + ".outUvFilterSize", texFile + ".uvFilterSize")
 		mc.connectAttr(tex2dPlacement + ".vertexCameraOne", texFile + ".vertexCameraOne")
@@ -85,48 +147,171 @@ class SpeedTreeImporterTranslatorBase(OpenMayaMPx.MPxFileTranslator):
 		mc.connectAttr(tex2dPlacement + ".offsetV", texFile + ".offsetV")
 		mc.connectAttr(tex2dPlacement + ".offsetU", texFile + ".offsetU")
 		mc.setAttr(tex2dPlacement + ".ihi", 0)'''
+		self.textureCache.AddFile(key, texFile)
 		return texFile
 
+	def MaterialPlan(self):
+		# compiled once per translator class
+		translatorClass = type(self)
+		if ("plan" not in translatorClass.__dict__):
+			translatorClass.plan = MaterialPlan(translatorClass.mapping)
+		return translatorClass.plan
+
+	def CreateMaterial(self, stMaterial, aShapes, blendInTexcoord):
+		return self.MaterialPlan().Build(self, stMaterial, aShapes, blendInTexcoord)
+
+	def SetShapeFlag(self, aShapes, attr, value, guard):
+		# collected for the whole import, reader() applies them before the commit
+		self.shapeFlags.Set(aShapes, attr, value, guard)
+
 	def ConnectMaterial(self, mat, sg):
-		if (mc.attributeQuery("outColor", node = mat, exists = True)):
-			mc.connectAttr(mat + ".outColor", sg + ".surfaceShader", force = True)
+		if (self.graph.AttributeExists(mat, "outColor")):
+			self.graph.ConnectAttr(mat + ".outColor", sg + ".surfaceShader", force = True)
 		else:
-			mc.connectAttr(mat + '.message', sg + '.miMaterialShader', force = True)
-			mc.connectAttr(mat + '.message', sg + '.miShadowShader', force = True)
-			mc.connectAttr(mat + '.message', sg + '.miPhotonShader', force = True)
+			self.graph.ConnectAttr(mat + '.message', sg + '.miMaterialShader', force = True)
+			self.graph.ConnectAttr(mat + '.message', sg + '.miShadowShader', force = True)
+			self.graph.ConnectAttr(mat + '.message', sg + '.miPhotonShader', force = True)
 
 	def reader(self, fileObject, optionString, accessMode):
+		# the options of the file dialog, see speedtree/optionsui.py
+		if (optionString):
+			self.options = ImportOptions.FromString(optionString, self.options)
+		self.stats = ImportStats(fileObject.expandedFullName(), self.description, self.options.profile, self.options.statsLog or DefaultLogFile())
+		self.stats.Start()
+		try:
+			# the import never changes the selection, and the viewports only redraw once it is done
+			with SuspendRefresh():
+				self.Import(fileObject)
+		finally:
+			if (self.texturePrep != None):
+				self.texturePrep.Close()
+				self.texturePrep = None
+			self.stats.Add(self.graph.counts)
+			self.stats.Stop()
+			if (self.options.stats):
+				self.stats.Publish()
+
+	def Import(self, fileObject):
+		# a lods option that does not parse fails the import before anything is made
 		try:
-			doc = xmldom.parse(fileObject.expandedFullName())
-			root = doc.getElementsByTagName('Materials');
-			if len(root) > 0:
-				# remember materials and shading groups that existed before import
-				aBeforeMaterials = mc.ls(mat = True)
-				aBeforeSets = mc.ls(sets = True)
-				aBeforeObjects = mc.ls(tr = True)
+			aKeep = ParseLods(self.options.lods)
+		except ValueError:
+			print("SpeedTree ERROR: Bad LOD levels [" + self.options.lods + "]")
+			self.stats.Fail("Bad LOD levels [" + self.options.lods + "]")
+			return None
+		self.graph = GRAPH_BACKENDS[self.options.graphBackend]()
+		if (self.session != None):
+			# the files of a session share one texture cache, the scene is scanned once for all of them
+			self.textureCache = self.session.textureCache
+			self.textureCache.exists = self.graph.Exists
+		else:
+			self.textureCache = TextureCache(self.options.sceneTextureCache, self.graph.Exists)
+		filesReused, placementsReused = self.textureCache.filesReused, self.textureCache.placementsReused
+		self.shapeFlags = ShapeFlags()
+		self.texturePrep = None
+		self.proxies = None
+		self.proxyFiles = []
+		self.directory = fileObject.expandedPath()
+		self.resolver = TextureResolver(self.directory) if self.options.resolveTextures else None
+		if (self.options.prepareTextures):
+			tool = FindTool(self.options.textureTool)
+			if (tool != None):
+				self.texturePrep = TexturePreparer(tool, fileObject.expandedPath(), self.options.textureDirectory)
+			else:
+				print("SpeedTree ERROR: maketx or oiiotool not found, textures are not prepared")
+		if (self.options.proxyTextures and not mc.about(batch = True)):
+			self.proxies = GetProxyTextures(self.options.cacheDirectory or None)
+			if (not self.proxies.Available()):
+				print("SpeedTree ERROR: Pillow or oiiotool not found, no proxy textures are made")
+				self.proxies = None
+		self.stats.Begin("parse")
+		try:
+			if (self.options.parseCache):
+				stFile = GetParseCache(self.options.cacheDirectory or None).Load(fileObject.expandedFullName())
+			else:
+				stFile = ParseMaterialFile(fileObject.expandedFullName())
+			if (stFile != None):
+				# a tree that is already in the scene is copied instead of imported again
+				sourceKey = None
+				if (self.options.instancing in INSTANCING_MODES):
+					sourceKey = SourceKey(fileObject.expandedFullName(), fileObject.expandedPath() + stFile.mesh, self.description, self.options)
+					aRoots = FindImport(sourceKey) if sourceKey != None else []
+					if (aRoots):
+						self.stats.Begin("instance")
+						name = path.splitext(path.basename(fileObject.expandedFullName()))[0]
+						aCopies = InstanceImport(aRoots, self.options.instancing, name)
+						self.stats.Count("instancedRoots", len(aCopies))
+						print("SpeedTree: " + name + " is already in the scene, made " + self.options.instancing + " [" + ", ".join(aCopies) + "]")
+						return None
+				elif (self.options.instancing):
+					print("SpeedTree ERROR: Unknown instancing mode [" + self.options.instancing + "], the tree is imported")
+
+				# the materials as the filter options leave them, the parsed ones are never changed
+				importFilter = ImportFilter(self.options)
+				aMaterials = importFilter.Materials(stFile.materials)
+
+				# find all the images before anything is made, and report the missing ones together
+				if (self.resolver != None):
+					self.stats.Begin("resolve")
+					aMissing = self.resolver.Check(aMaterials.values())
+					for filename in aMissing:
+						print("SpeedTree ERROR: Texture not found [" + filename + "]")
+					self.stats.Count("missingTextures", len(aMissing))
+					self.stats.Count("folderListings", len(self.resolver.listings))
+
+				# texture memory from the image headers, before the farm finds out
+				memoryReport = None
+				if (self.options.textureMemory):
+					self.stats.Begin("textureMemory")
+					memoryReport = TextureMemory(self.directory, self.MaterialPlan(), self.options.textureBudget, self.resolver).Analyze(aMaterials.values())
+					for warning in memoryReport["warnings"]:
+						print("SpeedTree WARNING: " + warning)
+					print(Summary(memoryReport))
+					self.stats.Count("textureBytes", memoryReport["bytes"])
+					self.stats.Count("textureMipBytes", memoryReport["mipBytes"])
+					self.stats.Count("textureWarnings", len(memoryReport["warnings"]))
+
+				# track the materials, shading groups and objects the mesh import creates
+				delta = SceneDelta()
 
 				# load mesh
-				meshFile = fileObject.expandedPath() + root[0].attributes["Mesh"].value
+				meshFile = fileObject.expandedPath() + stFile.mesh
 				extension = path.splitext(meshFile)[1]
 				fileTypes = []
 				OpenMaya.MFileIO.getFileTypes(fileTypes)
 				blendInTexcoord = 1
+				meshProxy = None
+				self.stats.Begin("meshImport")
+				delta.Begin()
 				try:
-					if (extension == ".abc" and "Alembic" not in fileTypes):
+					# a gpuCache or USD stage drawn from the mesh file instead of Maya meshes, see speedtree/meshproxy.py
+					if (self.options.meshProxy):
+						meshProxy = CreateMeshProxy(meshFile, fileObject.expandedFullName(), self.description, self.options, list(aMaterials.keys()))
+						if (meshProxy == None):
+							print("SpeedTree WARNING: No mesh proxy for [" + extension + "] files, the mesh is imported")
+
+					if (meshProxy == None and extension == ".abc" and "Alembic" not in fileTypes):
 						print("SpeedTree ERROR: Alembic plugin is not loaded")
 						raise
-					if (extension == ".fbx" and "FBX" not in fileTypes):
+					if (meshProxy == None and extension == ".fbx" and "FBX" not in fileTypes):
 						print("SpeedTree ERROR: FBX plugin is not loaded")
 						raise
-					if (extension == ".usd" and "USD Import" not in fileTypes):
+					if (meshProxy == None and extension == ".usd" and "USD Import" not in fileTypes):
 						print("SpeedTree ERROR: USD plugin is not loaded")
 						raise
 
-					if (extension == ".abc"):
+					if (meshProxy != None):
+						blendInTexcoord = 0 if (extension == ".abc") else 1
+						self.stats.Count("meshProxies")
+					elif (extension == ".abc"):
 						mel.eval("AbcImport -mode import -fitTimeRange -rcs \"" + meshFile + "\"")
 						blendInTexcoord = 0
 					elif (extension == ".usd"):
-						mel.eval("file -import -type \"USD Import\" -pr -ra true -importFrameRate true -options \"preferredMaterial=none;readAnimData=1;importInstances=1\" \"" + meshFile + "\"")
+						usdOptions = "preferredMaterial=none;readAnimData=1;importInstances=1"
+						if (self.options.placeholderMaterials):
+							# plain lamberts named after the USD materials instead of full preview surface networks
+							usdOptions += ";shadingMode=[[displayColor,default]]"
+						mel.eval("file -import -type \"USD Import\" -pr -ra true -importFrameRate true -options \"" + usdOptions + "\" \"" + meshFile + "\"")
 					else:
 						# fix vertex normals when skinned
 						mel.eval("FBXProperty \"Import|IncludeGrp|Geometry|OverrideNormalsLock\" -v 1")
@@ -135,126 +320,236 @@ class SpeedTreeImporterTranslatorBase(OpenMayaMPx.MPxFileTranslator):
 
 				except:
 					print("SpeedTree ERROR: Failed to load mesh file [" + meshFile + "]")
+					self.stats.Fail("Failed to load mesh file [" + meshFile + "]")
 					#print(sys.exc_info())
 					return None
+				finally:
+					delta.End()
+
+				# the materials of a proxy are matched through its connections, the names of its shading groups can be taken
+				aProxySets = ProxySets(meshProxy) if meshProxy != None else None
+				if (meshProxy != None and aProxySets == None):
+					print("SpeedTree ERROR: Shading groups of the mesh proxy [" + meshProxy + "] not found")
+					self.stats.Fail("Shading groups of the mesh proxy [" + meshProxy + "] not found")
+					return None
 
 				try:
-					aAfterMaterials = mc.ls(mat = True)
-					aAfterSets = mc.ls(sets = True)
-					aAfterObjects = mc.ls(tr = True)
-
-					# turn off vertex color display
-					for newobj in aAfterObjects:
-						if (newobj not in aBeforeObjects):
-							mc.select(newobj)
-							mc.polyOptions(colorShadedDisplay = False)
-							#print (newobj)
-
-					# load speedtree materials
-					aNewMaterials = { }
-					materials = root[0].getElementsByTagName('Material')
-					for material in materials:
-						stMaterial = SpeedTreeMaterial(material.attributes["Name"].value,
-														material.attributes["TwoSided"].value == "1",
-														material.attributes["VertexOpacity"].value == "1",
-														material.attributes["UserData"].value)
-						maps = material.getElementsByTagName('Map')
-						for stmap in maps:
-							newmap = SpeedTreeMap()
-							try:
-								newmap.file = stmap.attributes["File"].value
-							except:
-								try:
-									newmap.red = newmap.green = newmap.blue = float(stmap.attributes["Value"].value)
-								except:
-									try:
-										newmap.red = float(stmap.attributes["ColorR"].value)
-										newmap.green = float(stmap.attributes["ColorG"].value)
-										newmap.blue = float(stmap.attributes["ColorB"].value)
-									except:
-										pass
-
-							stMaterial.maps[stmap.attributes["Name"].value] = newmap
-						aNewMaterials[stMaterial.name] = stMaterial
+					# keep the LOD levels that were asked for, before their materials are built
+					aDroppedSets = []
+					lodGroup = None
+					if ((self.options.lods or self.options.lodGroup) and meshProxy == None):
+						self.stats.Begin("lods")
+						aLevels, aLodMeshes = LodLevels(ListMeshTransforms(delta.Objects(OpenMaya.MFn.kTransform)))
+						self.stats.Count("lodLevels", len(set(aLevels.values())))
+						if (aKeep != None):
+							aDropped, aDroppedSets = DropLods(aLevels, aLodMeshes, aKeep)
+							self.stats.Count("lodNodesDropped", len(aDropped))
+							self.stats.Count("lodMaterialsSkipped", len(aDroppedSets))
+						if (self.options.lodGroup):
+							name = path.splitext(path.basename(fileObject.expandedFullName()))[0]
+							lodGroup = BuildLodGroup(aLevels, name, self.options.lodDistance)
+							if (lodGroup != None):
+								self.stats.Count("lodGroups")
+
+					self.stats.Begin("sceneDiff")
+					aImportedMaterials = delta.Materials()
+					aImportedSets = delta.Sets()
+					aImportedObjects = delta.Transforms()
+					self.stats.Count("importedNodes", len(delta.handles))
+					self.stats.Count("importedObjects", len(aImportedObjects))
+
+					# turn off vertex color display (polyOptions -colorShadedDisplay off), committed with the shading networks
+					self.stats.Begin("vertexColors")
+					for mesh in delta.Nodes(OpenMaya.MFn.kMesh):
+						self.graph.SetAttr(mesh + ".displayColors", False)
+
+					# speedtree materials
+					self.stats.Begin("materials")
+					aNewMaterials = aMaterials
+					self.stats.Count("materials", len(aNewMaterials))
 
 					# hook new materials to the shading engines on the mesh
-					for newset in aAfterSets:
-						if (newset not in aBeforeSets):
-							stMaterialName = None
-							# first try shading group name (with or without SG at the end)
-							if (newset in aNewMaterials):
-								stMaterialName = newset
-							elif (newset[:-2] in aNewMaterials):
-								stMaterialName = newset[:-2]
-							elif (newset[14:] in aNewMaterials):
-								stMaterialName = newset[14:]
+					aSharedMaterials = { }	# content hash -> (shader, shading group)
+					aDuplicateSets = []
+					aNewShaders = []	# (shader, content hash) to tag once they exist
+					if (self.session != None):
+						library = self.session.library
+					else:
+						library = GetShaderLibrary() if self.options.shaderLibrary else None
+					reusedShaders = 0
+					opacity = GetOpacityAnalyzer(self.options.cacheDirectory or None) if self.options.opacityAnalysis else None
+					# the texture options change the file nodes of a network, shaders built with other ones are not reused
+					hashExtra = (blendInTexcoord, self.options.prepareTextures, self.options.textureDirectory, self.options.proxyTextures)
+					for newset in aImportedSets:
+						if (newset in aDroppedSets):
+							continue
+						stMaterialName = None
+						if (aProxySets != None):
+							stMaterialName = aProxySets.get(newset)
+						# first try shading group name (with or without SG at the end)
+						elif (newset in stFile.materials):
+							stMaterialName = newset
+						elif (newset[:-2] in stFile.materials):
+							stMaterialName = newset[:-2]
+						elif (newset[14:] in stFile.materials):
+							stMaterialName = newset[14:]
+						else:
+							# if not, try to find a similar material name
+							shaderName = newset + ".surfaceShader"
+							if (mc.objExists(shaderName)):
+								matName = mc.connectionInfo(shaderName, sfd = True).split('.')[0]
+								if (matName in stFile.materials):
+									stMaterialName = matName
+							# the tree is in the scene already (another translator, a layout), its names are taken
+							if (stMaterialName == None and NUMBERED_NAME.sub("", newset) in stFile.materials):
+								stMaterialName = NUMBERED_NAME.sub("", newset)
+
+						# a material the filter options skip goes with its geometry
+						if (stMaterialName != None and stMaterialName not in aNewMaterials):
+							self.stats.Count("skippedGeometry", DeleteMembers(newset))
+							self.stats.Count("skippedMaterials")
+							aDroppedSets.append(newset)
+							continue
+
+						# make new material and hook it up
+						if (stMaterialName != None):
+							stMaterial = aNewMaterials[stMaterialName]
+							aShapes = mc.listConnections(newset + ".dagSetMembers")
+							# build materials whose opacity is 1.0 everywhere without it
+							buildMaterial = stMaterial
+							if (opacity != None):
+								aMeshes = [mesh for transform in aShapes or [] for mesh in self.shapeFlags.Shapes(transform)]
+								buildMaterial = opacity.Analyze(stMaterial, aMeshes, fileObject.expandedPath(), blendInTexcoord, self.resolver)
+								if (buildMaterial is not stMaterial):
+									self.stats.Count("opaqueMaterials")
+							contentHash = buildMaterial.ContentHash(fileObject.expandedPath(), hashExtra)
+							libraryShader = library.Find(self.description, contentHash) if (library != None) else None
+							if (self.options.shareMaterials and contentHash in aSharedMaterials):
+								# same network as an earlier material, move the members to its shading group instead
+								sharedSet = aSharedMaterials[contentHash][1]
+								self.MaterialPlan().BuildShapeFlags(self, buildMaterial, aShapes)
+								aMembers = mc.sets(newset, q = True)
+								if (aMembers):
+									mc.sets(aMembers, e = True, forceElement = sharedSet)
+								aDuplicateSets.append(newset)
+							elif (libraryShader != None):
+								# an earlier import already built this network, the shading group keeps its own name
+								self.MaterialPlan().BuildShapeFlags(self, buildMaterial, aShapes)
+								self.ConnectMaterial(libraryShader, newset)
+								aSharedMaterials[contentHash] = (libraryShader, newset)
+								reusedShaders += 1
 							else:
-								# if not, try to find a similar material name
-								shaderName = newset + ".surfaceShader"
-								if (mc.objExists(shaderName)):
-									matName = mc.connectionInfo(shaderName, sfd = True).split('.')[0]
-									if (matName in aNewMaterials):
-										stMaterialName = matName
-
-							# make new material and hook it up
-							if (stMaterialName != None):
-								aShapes = mc.listConnections(newset + ".dagSetMembers")
-								newmat = self.CreateMaterial(aNewMaterials[stMaterialName], aShapes, blendInTexcoord)
-								aNewMaterials[stMaterialName].shader = newmat
+								newmat = self.CreateMaterial(buildMaterial, aShapes, blendInTexcoord)
+								stMaterial.shader = newmat
 								self.ConnectMaterial(newmat, newset)
-
-					# delete all the new materials since we replaced them
-					for mat in aAfterMaterials:
-						if (mat not in 	aBeforeMaterials):
-							aHistory = mc.listHistory(mat, pruneDagObjects = True)
-							mc.delete(aHistory)
+								aSharedMaterials[contentHash] = (newmat, newset)
+								aNewShaders.append((newmat, contentHash))
+
+					if (opacity != None):
+						opacity.Save()
+
+					# wait for the texture conversions and point the file nodes at them
+					if (self.texturePrep != None):
+						self.stats.Begin("textures")
+						self.texturePrep.Assign(self.graph)
+						self.stats.Count("texturesConverted", self.texturePrep.converted)
+						self.stats.Count("texturesUpToDate", self.texturePrep.upToDate)
+						self.stats.Count("textureErrors", self.texturePrep.failed)
+						print(self.texturePrep.Report())
+
+					# build all the new shading networks in one go, with the shape flags they asked for
+					self.stats.Begin("commit")
+					self.shapeFlags.Apply(self.graph)
+					self.graph.Commit()
+					self.textureCache.Commit(self.graph.Name)
+					for mat in iter(aNewMaterials.values()):
+						if (mat.shader != None):
+							mat.shader = self.graph.Name(mat.shader)
+					if (aDroppedSets):
+						mc.delete(aDroppedSets)
+					if (aDuplicateSets):
+						mc.delete(aDuplicateSets)
+						print("SpeedTree: " + str(len(aDuplicateSets)) + " materials share the shader of an identical material")
+					self.stats.Count("newShaders", len(aNewShaders))
+					self.stats.Count("sharedShaders", len(aDuplicateSets))
+					self.stats.Count("reusedShaders", reusedShaders)
+					if (library != None):
+						for newmat, contentHash in aNewShaders:
+							library.Tag(self.graph.Name(newmat), self.description, contentHash)
+						if (reusedShaders > 0):
+							print("SpeedTree: reused " + str(reusedShaders) + " shaders built by earlier imports")
+
+					# tag the new file nodes with their proxies and show the ones that are done
+					if (self.proxyFiles):
+						self.stats.Begin("proxies")
+						for texFile, proxy in self.proxyFiles:
+							self.proxies.Tag(self.graph.Name(texFile), proxy)
+						self.stats.Count("proxyTextures", len(self.proxyFiles))
+						self.stats.Count("proxiesShown", self.proxies.UseProxyTextures())
+						self.stats.Count("proxiesPending", self.proxies.Pending())
+						self.proxyFiles = []
+
+					# delete all the new materials since we replaced them, in one go
+					self.stats.Begin("cleanup")
+					aImportedMaterials = mc.ls(aImportedMaterials) if aImportedMaterials else []
+					aHistory = mc.listHistory(aImportedMaterials, pruneDagObjects = True) if aImportedMaterials else None
+					if (aHistory):
+						mc.delete(aHistory)
+						self.stats.Count("deletedNodes", len(aHistory))
 
 					# go back through and attempt to rename the materials
+					self.stats.Begin("rename")
 					for mat in iter(aNewMaterials.values()):
 						if (mat.shader != None):
 							mc.rename(mat.shader, mat.name)
 
 					##############################################
 					# Special Fix for shader assingments
-					# List all Dag nodes
-					all_objects = mc.ls(dag=True, long=True)
-
-					# Create an empty list to store objects with mesh nodes
-					mesh_objects = []
-
-					# Iterate through all objects and check if they have mesh nodes
-					for obj in all_objects:
-						# Use 'listRelatives' to list children of the object
-						children = mc.listRelatives(obj, children=True, fullPath=True) or []
-						
-						# Check if any of the children are of type 'mesh'
-						for child in children:
-							if mc.nodeType(child) == 'mesh':
-								mesh_objects.append(obj)
-								break  # If we find a mesh node, no need to check other children
-
-					# Select the objects with mesh nodes
-					mc.select(mesh_objects, replace=True)
-
-					sel = mc.ls(selection=True)
-
-					if (len(sel) == len(aNewMaterials)):
-						# Iterate through each selected object
-						for each in sel:
-							matName = each + "_MatSG"
-							
-							# Select the current object
-							mc.select(each)
-							
-							# Create and assign a shading group
-							mc.sets(e=True, forceElement=matName)
+					# Only the hierarchy this import created is walked, objects with a
+					# mesh below them are put back on the shading group named after them
+					self.stats.Begin("reassign")
+					mesh_objects = ListMeshTransforms(delta.Objects(OpenMaya.MFn.kTransform))
+
+					if (len(mesh_objects) == len(aNewMaterials)):
+						for each in mesh_objects:
+							matName = each.split("|")[-1] + "_MatSG"
+							if (not mc.objExists(matName)):
+								continue
+
+							# Assign the shading group
+							mc.sets(each, e=True, forceElement=matName)
+
+					if (meshProxy != None):
+						if (ShadeMeshProxy(meshProxy)):
+							self.stats.Count("meshProxiesShaded")
+						else:
+							print("SpeedTree WARNING: No material is assigned to the mesh proxy [" + meshProxy + "], speedTreeExpand puts the materials on it")
+
+					# the memory report goes with the tree, and where it came from for later imports of it
+					if (memoryReport != None or sourceKey != None):
+						aRoots = ListRootTransforms(delta.Objects(OpenMaya.MFn.kTransform))
+						if (lodGroup != None):
+							# made after the mesh import, the levels go with it
+							aRoots = LodRoots(aRoots, lodGroup)
+						if (memoryReport != None):
+							for root in aRoots:
+								TagTextureMemory(root, memoryReport)
+						if (sourceKey != None):
+							TagImport(aRoots, sourceKey)
+
+					self.stats.End()
+					self.stats.Count("filesReused", self.textureCache.filesReused - filesReused)
+					self.stats.Count("placementsReused", self.textureCache.placementsReused - placementsReused)
+					print(self.textureCache.Report())
 
 				except:
 					print("SpeedTree ERROR: Failed to update material connections")
+					self.stats.Fail("Failed to update material connections")
 					#print(sys.exc_info())
 
 		except:
 			print("SpeedTree ERROR: Failed to read SpeedTree stmat file")
+			self.stats.Fail("Failed to read SpeedTree stmat file")
 			#print(sys.exc_info())
 
 
@@ -263,115 +558,47 @@ class SpeedTreeImporterTranslatorBase(OpenMayaMPx.MPxFileTranslator):
 
 class SpeedTreeImporterTranslator(SpeedTreeImporterTranslatorBase):
 	description = "SpeedTree"
-	def CreateMaterial(self, stMaterial, aShapes, blendInTexcoord):
-		shader = mc.shadingNode("aiStandardSurface", asShader = True)
-		#print ('Shader is done')
-		#mc.setAttr(shader + ".base", 1.0)
-		'''
-		for shape in aShapes:
-			if (mc.attributeQuery("ai_expcol", node=shape, exists=True) != False):
-				mc.setAttr(shape + ".ai_expcol", 1)
-		'''
-		
-		#mc.setAttr(shader + ".shader_mode", 1)
-		#mc.setAttr(shader + ".ambientColor", 0.05, 0.05, 0.05)
-
-		if ("Color" in stMaterial.maps):
-			stmap = stMaterial.maps["Color"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.connectAttr(textureNode + ".outColor", shader + ".baseColor")
-				mc.setAttr(textureNode + ".colorSpace", "sRGB", type="string")
-				mc.setAttr(textureNode + ".ignoreColorSpaceFileRules", 1)
-				#print ('Color Done')
-			else:
-				mc.setAttr(shader + ".baseColor", stmap.red, stmap.green, stmap.blue)
-
-		if ("Normal" in stMaterial.maps):
-			stmap = stMaterial.maps["Normal"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.setAttr(textureNode + ".ignoreColorSpaceFileRules", 1)
-				normalNode = mc.shadingNode("aiNormalMap", asUtility = True)
-				#mc.setAttr(normalNode + ".invertG", 1)
-				mc.connectAttr(textureNode + ".outColor", normalNode + ".input")
-				mc.connectAttr(normalNode + ".outValue", shader + ".normalCamera")
-				#print ('normal done')
-				for shape in aShapes:
-					if (mc.attributeQuery("aiOpaque", node=shape+"_Shape", exists=True) != False):
-						mc.setAttr(shape + "_Shape.aiSubdivType", 1)
-						mc.setAttr(shape + "_Shape.aiSubdivIterations", 0)
-
-		if ("Opacity" in stMaterial.maps):
-			stmap = stMaterial.maps["Opacity"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.setAttr(textureNode + ".ignoreColorSpaceFileRules", 1)
-				mc.connectAttr(textureNode + ".outColor", shader + ".opacity")
-				
-				for shape in aShapes:
-					if (mc.attributeQuery("aiOpaque", node=shape+"_Shape", exists=True) != False):
-						mc.setAttr(shape + "_Shape.aiOpaque", 0)
-				
-				
-				#print ('opacity done')
-		
-		elif (stMaterial.vertexOpacity):
-			userdata = mc.shadingNode("aiUserDataVec2", asUtility = True)
-			mc.setAttr(userdata + ".vec2AttrName", "blend_ao", type="string")
-			mc.connectAttr(userdata + ".outValueX", shader + ".opacityR")
-			mc.connectAttr(userdata + ".outValueX", shader + ".opacityG")
-			mc.connectAttr(userdata + ".outValueX", shader + ".opacityB")
-			#print (aShapes)
-			#print ('\n')
-			for shape in aShapes:
-				if (mc.attributeQuery("aiOpaque", node=shape+"_Shape", exists=True)):
-					mc.setAttr(shape + "_Shape.aiOpaque", 0)
-				#print (shape)
-				
-				if (mc.attributeQuery("aiExportColors", node=shape+"_Shape", exists=True)):
-					mc.setAttr(shape + "_Shape.aiExportColors", 1)
-				
-				#print ('color export is done')
-
-		if ("Gloss" in stMaterial.maps):
-			stmap = stMaterial.maps["Gloss"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.setAttr(textureNode + ".ignoreColorSpaceFileRules", 1)
-				mc.setAttr(textureNode + ".invert", True)
-				mc.connectAttr(textureNode + ".outColorR", shader + ".specularRoughness")
-				mc.connectAttr(textureNode + ".outColorR", shader + ".diffuseRoughness")
-			else:
-				mc.setAttr(shader + ".specularRoughness", 1.0 - stmap.red)
-				mc.setAttr(shader + ".diffuseRoughness", 1.0 - stmap.red)
-
-		if ("SubsurfaceAmount" in stMaterial.maps and "SubsurfaceColor" in stMaterial.maps):
-			mc.setAttr(shader + ".thinWalled", True)
-			if ("SubsurfaceAmount" in stMaterial.maps):
-				stmap = stMaterial.maps["SubsurfaceAmount"]
-				if (stmap.file):
-					textureNode = self.CreateFileTexture(stmap.file)
-					mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-					mc.setAttr(textureNode + ".ignoreColorSpaceFileRules", 1)
-					mc.connectAttr(textureNode + '.outColorR', shader + '.subsurface')
-				else:
-					mc.setAttr(shader + '.subsurface', stmap.red)
-
-			if ("SubsurfaceColor" in stMaterial.maps):
-				stmap = stMaterial.maps["SubsurfaceColor"]
-				if (stmap.file):
-					textureNode = self.CreateFileTexture(stmap.file)
-					mc.connectAttr(textureNode + '.outColor', shader + '.subsurfaceColor')
-					mc.setAttr(textureNode + ".colorSpace", "sRGB", type="string")
-				else:
-					mc.setAttr(shader + '.subsurfaceColor', stmap.red, stmap.green, stmap.blue)
-
-		return shader
-
+	mapping = [
+		Rule([Node("shader", "aiStandardSurface", SHADER)]),
+
+		Rule([Texture("color", "sRGB", ignoreFileRules = True),
+				Connect("color.outColor", "shader.baseColor")], map = "Color", source = FILE),
+		Rule([Set("shader.baseColor", RGB)], map = "Color", source = VALUE),
+
+		Rule([Texture("normal", "Raw", ignoreFileRules = True),
+				Node("normalMap", "aiNormalMap"),
+				Connect("normal.outColor", "normalMap.input"),
+				Connect("normalMap.outValue", "shader.normalCamera"),
+				ShapeFlag("aiSubdivType", 1, guard = "aiOpaque"),
+				ShapeFlag("aiSubdivIterations", 0, guard = "aiOpaque")], map = "Normal", source = FILE),
+
+		Rule([Texture("opacity", "Raw", ignoreFileRules = True),
+				Connect("opacity.outColor", "shader.opacity"),
+				ShapeFlag("aiOpaque", 0)], map = "Opacity", source = FILE),
+		# vertex opacity for branch seam blending
+		Rule([Node("userData", "aiUserDataVec2"),
+				Set("userData.vec2AttrName", "blend_ao", "string"),
+				Connect("userData.outValueX", "shader.opacityR"),
+				Connect("userData.outValueX", "shader.opacityG"),
+				Connect("userData.outValueX", "shader.opacityB"),
+				ShapeFlag("aiOpaque", 0),
+				ShapeFlag("aiExportColors", 1)], vertexOpacity = True, without = ("Opacity",)),
+
+		Rule([Texture("gloss", "Raw", ignoreFileRules = True, invert = True),
+				Connect("gloss.outColorR", "shader.specularRoughness"),
+				Connect("gloss.outColorR", "shader.diffuseRoughness")], map = "Gloss", source = FILE),
+		Rule([Set("shader.specularRoughness", INVERSE_RED),
+				Set("shader.diffuseRoughness", INVERSE_RED)], map = "Gloss", source = VALUE),
+
+		# subsurface only when both maps are there
+		Rule([Set("shader.thinWalled", True)], requires = ("SubsurfaceAmount", "SubsurfaceColor")),
+		Rule([Texture("subsurface", "Raw", ignoreFileRules = True),
+				Connect("subsurface.outColorR", "shader.subsurface")], map = "SubsurfaceAmount", source = FILE, requires = ("SubsurfaceColor",)),
+		Rule([Set("shader.subsurface", RED)], map = "SubsurfaceAmount", source = VALUE, requires = ("SubsurfaceColor",)),
+		Rule([Texture("subsurfaceColor", "sRGB"),
+				Connect("subsurfaceColor.outColor", "shader.subsurfaceColor")], map = "SubsurfaceColor", source = FILE, requires = ("SubsurfaceAmount",)),
+		Rule([Set("shader.subsurfaceColor", RGB)], map = "SubsurfaceColor", source = VALUE, requires = ("SubsurfaceAmount",)),
+	]
 
 
 ################################################################
@@ -489,109 +716,76 @@ class SpeedTreeImporterVRayTranslator(SpeedTreeImporterTranslatorBase):
 	description = "SpeedTree for V-Ray"
 	def haveReadMethod(self):
 		return mc.pluginInfo("vrayformaya", q = True, l = True) # check to see if vray plugin is available
-	def CreateMaterial(self, stMaterial, aShapes, blendInTexcoord):
-		shader = mc.shadingNode("VRayMtl", asShader = stMaterial.twoSided==0, asUtility = stMaterial.twoSided==1)
-
-		mc.setAttr(shader + ".doubleSided", stMaterial.twoSided)
-		twoSidedNode = None
-		if (stMaterial.twoSided):
-			twoSidedNode = mc.shadingNode("VRayMtl2Sided", asShader = True)
-			mc.setAttr(twoSidedNode + ".translucencyTex", 0.0, 0.0, 0.0)
-			mc.connectAttr(shader + ".outColor", twoSidedNode + ".frontMaterial")
-			mc.connectAttr(shader + ".outColor", twoSidedNode + ".backMaterial")
-
-		if ("Color" in stMaterial.maps):
-			stmap = stMaterial.maps["Color"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.connectAttr(textureNode + ".outColor", shader + ".color")
-			else:
-				mc.setAttr(shader + ".color", stmap.red, stmap.green, stmap.blue)
-
-		if ("Opacity" in stMaterial.maps):
-			stmap = stMaterial.maps["Opacity"]
-			if (stmap.file):
-				mc.setAttr(shader + ".opacityMode", 1)
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.connectAttr(textureNode + ".outColor", shader + ".opacityMap")
-		elif (stMaterial.vertexOpacity):
-			# use vertex color for branch seam blending
-			vertexColor = mc.shadingNode("VRayVertexColors", asTexture = True)
-			mc.setAttr(vertexColor + ".type", 1)
-			mc.setAttr(vertexColor + ".name", "blend_ao", type = "string")
-			mc.setAttr(vertexColor + ".defaultColor", 1.0, 1.0, 1.0)
-			mc.setAttr(vertexColor + ".useUVSets", blendInTexcoord)
-			mc.connectAttr(vertexColor + ".outColor.outColorR", shader + ".opacityMap.opacityMapR")
-			mc.connectAttr(vertexColor + ".outColor.outColorR", shader + ".opacityMap.opacityMapG")
-			mc.connectAttr(vertexColor + ".outColor.outColorR", shader + ".opacityMap.opacityMapB")
-
-		mc.setAttr(shader + ".brdfType", 3)
-		mc.setAttr(shader + ".reflectionColor", 0.5, 0.5, 0.5)
-		mc.setAttr(shader + ".useFresnel", 1)
-		if ("Gloss" in stMaterial.maps):
-			stmap = stMaterial.maps["Gloss"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.connectAttr(textureNode + ".outColorR", shader + ".reflectionGlossiness")
-				mc.connectAttr(textureNode + ".outColorR", shader + ".refractionGlossiness")
-				glossReverse = mc.shadingNode("reverse", asUtility = True)
-				mc.connectAttr(textureNode + ".outColor", glossReverse + ".input")
-				mc.connectAttr(glossReverse + ".outputX", shader + ".roughnessAmount")
-			else:
-				mc.setAttr(shader + ".reflectionGlossiness", stmap.red)
-				mc.setAttr(shader + ".refractionGlossiness", stmap.red)
-				mc.setAttr(shader + ".roughnessAmount", 1.0 - stmap.red)
-
-		if ("Normal" in stMaterial.maps):
-			stmap = stMaterial.maps["Normal"]
-			if (stmap.file):
-				normalTexture = self.CreateFileTexture(stmap.file)
-				mc.setAttr(normalTexture + ".colorSpace", "Raw", type="string")
-				if (twoSidedNode is None):
-					mc.setAttr(shader + ".bumpMapType", 1)
-					mc.setAttr(shader + ".bumpMult", 0.5)
-					mc.connectAttr(normalTexture + ".outColor", shader + ".bumpMap")
-				else:
-					frontBump = mc.shadingNode("VRayBumpMtl", asUtility = True)
-					mc.setAttr(frontBump + ".bumpMult", 0.5)
-					mc.setAttr(frontBump + ".bumpMapType", 1)
-					mc.connectAttr(shader + ".outColor", frontBump + ".base_material")
-					mc.connectAttr(normalTexture + ".outColor", frontBump + ".bumpMap")
-					backBump = mc.shadingNode("VRayBumpMtl", asUtility = True)
-					mc.setAttr(backBump + ".bumpMult", -1.0)
-					mc.setAttr(backBump + ".bumpMapType", 1)
-					mc.connectAttr(shader + ".outColor", backBump + ".base_material")
-					mc.connectAttr(normalTexture + ".outColor", backBump + ".bumpMap")
-					mc.connectAttr(frontBump + ".outColor", twoSidedNode + ".frontMaterial", force = True)
-					mc.connectAttr(backBump + ".outColor", twoSidedNode + ".backMaterial", force = True)
-
-		if ((twoSidedNode is not None) and ("SubsurfaceColor" in stMaterial.maps or "SubsurfaceAmount" in stMaterial.maps)):
-			mulNode = mc.shadingNode("multiplyDivide", asUtility = True)
-			mc.connectAttr(mulNode + ".output", twoSidedNode + ".translucencyTex")
-
-			if ("SubsurfaceAmount" in stMaterial.maps):
-				stmap = stMaterial.maps["SubsurfaceAmount"]
-				if (stmap.file):
-					textureNode = self.CreateFileTexture(stmap.file)
-					mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-					mc.connectAttr(textureNode + '.outColor', mulNode + '.input1')
-				else:
-					mc.setAttr(mulNode + '.input1', stmap.red, stmap.green, stmap.blue)
-
-			if ("SubsurfaceColor" in stMaterial.maps):
-				stmap = stMaterial.maps["SubsurfaceColor"]
-				if (stmap.file):
-					textureNode = self.CreateFileTexture(stmap.file)
-					mc.connectAttr(textureNode + '.outColor', mulNode + '.input2')
-				else:
-					mc.setAttr(mulNode + '.input2', stmap.red, stmap.green, stmap.blue)
-
-		if (twoSidedNode is not None):
-			return twoSidedNode
-
-		return shader
+	mapping = [
+		# two sided materials wrap the VRayMtl in a VRayMtl2Sided
+		Rule([Node("shader", "VRayMtl", SHADER)], twoSided = False),
+		Rule([Node("shader", "VRayMtl", UTILITY)], twoSided = True),
+		Rule([Set("shader.doubleSided", TWO_SIDED)]),
+		Rule([Node("twoSided", "VRayMtl2Sided", SHADER),
+				Set("twoSided.translucencyTex", (0.0, 0.0, 0.0)),
+				Connect("shader.outColor", "twoSided.frontMaterial"),
+				Connect("shader.outColor", "twoSided.backMaterial"),
+				Result("twoSided")], twoSided = True),
+
+		Rule([Texture("color"),
+				Connect("color.outColor", "shader.color")], map = "Color", source = FILE),
+		Rule([Set("shader.color", RGB)], map = "Color", source = VALUE),
+
+		Rule([Set("shader.opacityMode", 1),
+				Texture("opacity", "Raw"),
+				Connect("opacity.outColor", "shader.opacityMap")], map = "Opacity", source = FILE),
+		# use vertex color for branch seam blending
+		Rule([Node("vertexColor", "VRayVertexColors", TEXTURE),
+				Set("vertexColor.type", 1),
+				Set("vertexColor.name", "blend_ao", "string"),
+				Set("vertexColor.defaultColor", (1.0, 1.0, 1.0)),
+				Set("vertexColor.useUVSets", BLEND_IN_TEXCOORD),
+				Connect("vertexColor.outColor.outColorR", "shader.opacityMap.opacityMapR"),
+				Connect("vertexColor.outColor.outColorR", "shader.opacityMap.opacityMapG"),
+				Connect("vertexColor.outColor.outColorR", "shader.opacityMap.opacityMapB")], vertexOpacity = True, without = ("Opacity",)),
+
+		Rule([Set("shader.brdfType", 3),
+				Set("shader.reflectionColor", (0.5, 0.5, 0.5)),
+				Set("shader.useFresnel", 1)]),
+		Rule([Texture("gloss", "Raw"),
+				Connect("gloss.outColorR", "shader.reflectionGlossiness"),
+				Connect("gloss.outColorR", "shader.refractionGlossiness"),
+				Node("glossReverse", "reverse"),
+				Connect("gloss.outColor", "glossReverse.input"),
+				Connect("glossReverse.outputX", "shader.roughnessAmount")], map = "Gloss", source = FILE),
+		Rule([Set("shader.reflectionGlossiness", RED),
+				Set("shader.refractionGlossiness", RED),
+				Set("shader.roughnessAmount", INVERSE_RED)], map = "Gloss", source = VALUE),
+
+		Rule([Texture("normal", "Raw"),
+				Set("shader.bumpMapType", 1),
+				Set("shader.bumpMult", 0.5),
+				Connect("normal.outColor", "shader.bumpMap")], map = "Normal", source = FILE, twoSided = False),
+		# the back side gets the bump flipped
+		Rule([Texture("normal", "Raw"),
+				Node("frontBump", "VRayBumpMtl"),
+				Set("frontBump.bumpMult", 0.5),
+				Set("frontBump.bumpMapType", 1),
+				Connect("shader.outColor", "frontBump.base_material"),
+				Connect("normal.outColor", "frontBump.bumpMap"),
+				Node("backBump", "VRayBumpMtl"),
+				Set("backBump.bumpMult", -1.0),
+				Set("backBump.bumpMapType", 1),
+				Connect("shader.outColor", "backBump.base_material"),
+				Connect("normal.outColor", "backBump.bumpMap"),
+				Connect("frontBump.outColor", "twoSided.frontMaterial", force = True),
+				Connect("backBump.outColor", "twoSided.backMaterial", force = True)], map = "Normal", source = FILE, twoSided = True),
+
+		# translucency is amount * color
+		Rule([Node("translucency", "multiplyDivide"),
+				Connect("translucency.output", "twoSided.translucencyTex")], twoSided = True, anyOf = ("SubsurfaceAmount", "SubsurfaceColor")),
+		Rule([Texture("subsurface", "Raw"),
+				Connect("subsurface.outColor", "translucency.input1")], map = "SubsurfaceAmount", source = FILE, twoSided = True),
+		Rule([Set("translucency.input1", RGB)], map = "SubsurfaceAmount", source = VALUE, twoSided = True),
+		Rule([Texture("subsurfaceColor"),
+				Connect("subsurfaceColor.outColor", "translucency.input2")], map = "SubsurfaceColor", source = FILE, twoSided = True),
+		Rule([Set("translucency.input2", RGB)], map = "SubsurfaceColor", source = VALUE, twoSided = True),
+	]
 
 
 ################################################################
@@ -601,80 +795,53 @@ class SpeedTreeImporterRendermanTranslator(SpeedTreeImporterTranslatorBase):
 	description = "SpeedTree for Renderman"
 	def haveReadMethod(self):
 		return mc.pluginInfo("RenderMan_for_Maya", q = True, l = True) # check to see if renderman plugin is available
-	def CreateMaterial(self, stMaterial, aShapes, blendInTexcoord):
-		shader = mc.shadingNode("PxrSurface", asShader = True)
-
-		mc.setAttr(shader + ".diffuseDoubleSided", stMaterial.twoSided)
-		if ("Color" in stMaterial.maps):
-			stmap = stMaterial.maps["Color"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.connectAttr(textureNode + ".outColor", shader + ".diffuseColor")
-			else:
-				mc.setAttr(shader + ".diffuseColor", stmap.red, stmap.green, stmap.blue)
-
-		if ("Normal" in stMaterial.maps):
-			stmap = stMaterial.maps["Normal"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				normalNode = mc.shadingNode("PxrNormalMap", asUtility = True)
-				mc.setAttr(normalNode + ".flipX", True)
-				mc.setAttr(normalNode + ".flipY", True)
-				mc.connectAttr(textureNode + ".outColor", normalNode + ".inputRGB")
-				if (stMaterial.twoSided):
-					backnormalNode = mc.shadingNode("PxrNormalMap", asUtility = True)
-					mc.connectAttr(textureNode + ".outColor", backnormalNode + ".inputRGB")
-					switchNode = mc.shadingNode("PxrSwitch", asUtility = True)
-					shadedNode = mc.shadingNode("PxrShadedSide", asUtility = True)
-					mc.connectAttr(shadedNode + ".resultF", switchNode + ".index")
-					mc.connectAttr(backnormalNode + ".resultN", switchNode + ".inputsRGB[0]")
-					mc.connectAttr(normalNode + ".resultN", switchNode + ".inputsRGB[1]")
-					mc.connectAttr(switchNode + ".resultRGB", shader + ".bumpNormal")
-				else:
-					mc.connectAttr(normalNode + ".resultN", shader + ".bumpNormal")
-
-		if ("Opacity" in stMaterial.maps):
-			stmap = stMaterial.maps["Opacity"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.connectAttr(textureNode + ".outColorR", shader + ".presence")
-
-		mc.setAttr(shader + ".specularDoubleSided", stMaterial.twoSided)
-		mc.setAttr(shader + ".roughSpecularDoubleSided", stMaterial.twoSided)
-		mc.setAttr(shader + ".specularEdgeColor", 1, 1, 1)
-		mc.setAttr(shader + ".specularFresnelMode", 1)
-		mc.setAttr(shader + ".specularModelType", 1)
-		if ("Gloss" in stMaterial.maps):
-			stmap = stMaterial.maps["Gloss"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				roughness = mc.shadingNode("reverse", asUtility = True)
-				mc.connectAttr(textureNode + ".outColor", roughness + ".input")
-				mc.connectAttr(roughness + ".outputX", shader + ".diffuseRoughness")
-				mc.connectAttr(roughness + ".outputX", shader + ".specularRoughness")
-			else:
-				mc.setAttr(shader + ".diffuseRoughness", 1.0 - stmap.red)
-				mc.setAttr(shader + ".specularRoughness", 1.0 - stmap.red)
-
-		if ("SubsurfaceAmount" in stMaterial.maps):
-			stmap = stMaterial.maps["SubsurfaceAmount"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.connectAttr(textureNode + '.outColorR', shader + '.diffuseTransmitGain')
-			else:
-				mc.setAttr(shader + '.diffuseTransmitGain', stmap.red)
-			stmap = stMaterial.maps["SubsurfaceColor"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.connectAttr(textureNode + '.outColor', shader + '.diffuseTransmitColor')
-			else:
-				mc.setAttr(shader + '.diffuseTransmitColor', stmap.red, stmap.green, stmap.blue)
-
-		return shader
+	mapping = [
+		Rule([Node("shader", "PxrSurface", SHADER),
+				Set("shader.diffuseDoubleSided", TWO_SIDED)]),
+
+		Rule([Texture("color"),
+				Connect("color.outColor", "shader.diffuseColor")], map = "Color", source = FILE),
+		Rule([Set("shader.diffuseColor", RGB)], map = "Color", source = VALUE),
+
+		Rule([Texture("normal", "Raw"),
+				Node("normalMap", "PxrNormalMap"),
+				Set("normalMap.flipX", True),
+				Set("normalMap.flipY", True),
+				Connect("normal.outColor", "normalMap.inputRGB")], map = "Normal", source = FILE),
+		# the back side reads the normal map unflipped
+		Rule([Node("backNormalMap", "PxrNormalMap"),
+				Connect("normal.outColor", "backNormalMap.inputRGB"),
+				Node("switch", "PxrSwitch"),
+				Node("shadedSide", "PxrShadedSide"),
+				Connect("shadedSide.resultF", "switch.index"),
+				Connect("backNormalMap.resultN", "switch.inputsRGB[0]"),
+				Connect("normalMap.resultN", "switch.inputsRGB[1]"),
+				Connect("switch.resultRGB", "shader.bumpNormal")], map = "Normal", source = FILE, twoSided = True),
+		Rule([Connect("normalMap.resultN", "shader.bumpNormal")], map = "Normal", source = FILE, twoSided = False),
+
+		Rule([Texture("opacity", "Raw"),
+				Connect("opacity.outColorR", "shader.presence")], map = "Opacity", source = FILE),
+
+		Rule([Set("shader.specularDoubleSided", TWO_SIDED),
+				Set("shader.roughSpecularDoubleSided", TWO_SIDED),
+				Set("shader.specularEdgeColor", (1, 1, 1)),
+				Set("shader.specularFresnelMode", 1),
+				Set("shader.specularModelType", 1)]),
+		Rule([Texture("gloss", "Raw"),
+				Node("roughness", "reverse"),
+				Connect("gloss.outColor", "roughness.input"),
+				Connect("roughness.outputX", "shader.diffuseRoughness"),
+				Connect("roughness.outputX", "shader.specularRoughness")], map = "Gloss", source = FILE),
+		Rule([Set("shader.diffuseRoughness", INVERSE_RED),
+				Set("shader.specularRoughness", INVERSE_RED)], map = "Gloss", source = VALUE),
+
+		Rule([Texture("subsurface", "Raw"),
+				Connect("subsurface.outColorR", "shader.diffuseTransmitGain")], map = "SubsurfaceAmount", source = FILE),
+		Rule([Set("shader.diffuseTransmitGain", RED)], map = "SubsurfaceAmount", source = VALUE),
+		Rule([Texture("subsurfaceColor"),
+				Connect("subsurfaceColor.outColor", "shader.diffuseTransmitColor")], map = "SubsurfaceColor", source = FILE, requires = ("SubsurfaceAmount",)),
+		Rule([Set("shader.diffuseTransmitColor", RGB)], map = "SubsurfaceColor", source = VALUE, requires = ("SubsurfaceAmount",)),
+	]
 
 
 ################################################################
@@ -684,80 +851,54 @@ class SpeedTreeImporterRedshiftTranslator(SpeedTreeImporterTranslatorBase):
 	description = "SpeedTree for Redshift"
 	def haveReadMethod(self):
 		return mc.pluginInfo("redshift4maya", q = True, l = True) # check to see if redshift plugin is available
-	def CreateMaterial(self, stMaterial, aShapes, blendInTexcoord):
-		shader = mc.shadingNode("RedshiftMaterial", asShader = True)
-
-		if ("Color" in stMaterial.maps):
-			stmap = stMaterial.maps["Color"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.connectAttr(textureNode + ".outColor", shader + ".diffuse_color")
-			else:
-				mc.setAttr(shader + ".diffuse_color", stmap.red, stmap.green, stmap.blue)
-
-		if ("Normal" in stMaterial.maps):
-			stmap = stMaterial.maps["Normal"]
-			if (stmap.file):
-				normalNode = mc.shadingNode("RedshiftNormalMap", asUtility = True)
-				mc.setAttr(normalNode + ".tex0", stmap.file, type="string")
-				if (stMaterial.twoSided):
-					mulNode = mc.shadingNode("multiplyDivide", asUtility = True)
-					mc.connectAttr(normalNode + ".outDisplacementVector", mulNode + ".input1")
-					mc.setAttr(mulNode + ".input2", -1.0, -1.0, 1.0)
-					switchNode = mc.shadingNode("RedshiftRaySwitch", asUtility = True)
-					mc.setAttr(switchNode + ".cameraSwitchFrontBack", True)
-					mc.connectAttr(normalNode + ".outDisplacementVector", switchNode + ".cameraColor")
-					mc.connectAttr(mulNode + ".output", switchNode + ".cameraColorBack")
-					mc.connectAttr(switchNode + ".outColor", shader + ".bump_input")
-				else:
-					mc.connectAttr(normalNode + ".outDisplacementVector", shader + ".bump_input")
-
-		if ("Opacity" in stMaterial.maps):
-			stmap = stMaterial.maps["Opacity"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.connectAttr(textureNode + ".outColor", shader + ".opacity_color")
-		elif (stMaterial.vertexOpacity):
-			# use vertex color for branch seam blending
-			uvNode = mc.shadingNode("place2dTexture", asUtility = True)
-			mc.setAttr(uvNode + ".rsUvSet", "blend_ao", type = "string")
-			mc.connectAttr(uvNode + ".outU", shader + ".opacity_colorR")
-			mc.connectAttr(uvNode + ".outU", shader + ".opacity_colorG")
-			mc.connectAttr(uvNode + ".outU", shader + ".opacity_colorB")
-
-		mc.setAttr(shader + ".refl_brdf", 1)
-		if ("Gloss" in stMaterial.maps):
-			stmap = stMaterial.maps["Gloss"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				roughness = mc.shadingNode("reverse", asUtility = True)
-				mc.connectAttr(textureNode + ".outColor", roughness + ".input")
-				mc.connectAttr(roughness + ".outputX", shader + ".diffuse_roughness")
-				mc.connectAttr(roughness + ".outputX", shader + ".refl_roughness")
-				mc.connectAttr(roughness + ".outputX", shader + ".refr_roughness")
-			else:
-				mc.setAttr(shader + ".diffuse_roughness", 1.0 - stmap.red)
-				mc.setAttr(shader + ".refl_roughness", 1.0 - stmap.red)
-				mc.setAttr(shader + ".refr_roughness", 1.0 - stmap.red)
-
-		if ("SubsurfaceAmount" in stMaterial.maps):
-			stmap = stMaterial.maps["SubsurfaceAmount"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.setAttr(textureNode + ".colorSpace", "Raw", type="string")
-				mc.connectAttr(textureNode + '.outColorR', shader + '.transl_weight')
-			else:
-				mc.setAttr(shader + '.transl_weight', stmap.red)
-			stmap = stMaterial.maps["SubsurfaceColor"]
-			if (stmap.file):
-				textureNode = self.CreateFileTexture(stmap.file)
-				mc.connectAttr(textureNode + '.outColor', shader + '.transl_color')
-			else:
-				mc.setAttr(shader + '.transl_color', stmap.red, stmap.green, stmap.blue)
-
-		return shader
+	mapping = [
+		Rule([Node("shader", "RedshiftMaterial", SHADER)]),
+
+		Rule([Texture("color"),
+				Connect("color.outColor", "shader.diffuse_color")], map = "Color", source = FILE),
+		Rule([Set("shader.diffuse_color", RGB)], map = "Color", source = VALUE),
+
+		# the normal map node reads the image itself
+		Rule([Node("normalMap", "RedshiftNormalMap"),
+				Set("normalMap.tex0", MAP_FILE, "string")], map = "Normal", source = FILE),
+		# the back side gets the normal flipped
+		Rule([Node("flip", "multiplyDivide"),
+				Connect("normalMap.outDisplacementVector", "flip.input1"),
+				Set("flip.input2", (-1.0, -1.0, 1.0)),
+				Node("switch", "RedshiftRaySwitch"),
+				Set("switch.cameraSwitchFrontBack", True),
+				Connect("normalMap.outDisplacementVector", "switch.cameraColor"),
+				Connect("flip.output", "switch.cameraColorBack"),
+				Connect("switch.outColor", "shader.bump_input")], map = "Normal", source = FILE, twoSided = True),
+		Rule([Connect("normalMap.outDisplacementVector", "shader.bump_input")], map = "Normal", source = FILE, twoSided = False),
+
+		Rule([Texture("opacity", "Raw"),
+				Connect("opacity.outColor", "shader.opacity_color")], map = "Opacity", source = FILE),
+		# use vertex color for branch seam blending
+		Rule([Node("uvSet", "place2dTexture"),
+				Set("uvSet.rsUvSet", "blend_ao", "string"),
+				Connect("uvSet.outU", "shader.opacity_colorR"),
+				Connect("uvSet.outU", "shader.opacity_colorG"),
+				Connect("uvSet.outU", "shader.opacity_colorB")], vertexOpacity = True, without = ("Opacity",)),
+
+		Rule([Set("shader.refl_brdf", 1)]),
+		Rule([Texture("gloss", "Raw"),
+				Node("roughness", "reverse"),
+				Connect("gloss.outColor", "roughness.input"),
+				Connect("roughness.outputX", "shader.diffuse_roughness"),
+				Connect("roughness.outputX", "shader.refl_roughness"),
+				Connect("roughness.outputX", "shader.refr_roughness")], map = "Gloss", source = FILE),
+		Rule([Set("shader.diffuse_roughness", INVERSE_RED),
+				Set("shader.refl_roughness", INVERSE_RED),
+				Set("shader.refr_roughness", INVERSE_RED)], map = "Gloss", source = VALUE),
+
+		Rule([Texture("subsurface", "Raw"),
+				Connect("subsurface.outColorR", "shader.transl_weight")], map = "SubsurfaceAmount", source = FILE),
+		Rule([Set("shader.transl_weight", RED)], map = "SubsurfaceAmount", source = VALUE),
+		Rule([Texture("subsurfaceColor"),
+				Connect("subsurfaceColor.outColor", "shader.transl_color")], map = "SubsurfaceColor", source = FILE, requires = ("SubsurfaceAmount",)),
+		Rule([Set("shader.transl_color", RGB)], map = "SubsurfaceColor", source = VALUE, requires = ("SubsurfaceAmount",)),
+	]
 
 
 ################################################################
@@ -864,8 +1005,15 @@ class SpeedTreeImporterRedshiftTranslator(SpeedTreeImporterTranslatorBase):
 
 def initializePlugin(mObject):
 	mPlugin = OpenMayaMPx.MFnPlugin(mObject, "SpeedTree", "9.0", "Any")
+	# the import options of the file dialog, see speedtree/optionsui.py
+	mel.eval(MEL_OPTIONS_SCRIPT)
 	for subclass in SpeedTreeImporterTranslatorBase.__subclasses__():
-		mPlugin.registerFileTranslator(subclass.description, None, lambda:OpenMayaMPx.asMPxPtr(subclass( )), None, None, True)
+		mPlugin.registerFileTranslator(subclass.description, None, lambda subclass = subclass:OpenMayaMPx.asMPxPtr(subclass( )), OPTIONS_SCRIPT, ImportOptions().ToString(), True)
+	mPlugin.registerCommand(COMMIT_COMMAND, SpeedTreeCommitGraphCommand.creator)
+	# multi-file imports, see speedtree/session.py
+	RegisterTranslators(SpeedTreeImporterTranslatorBase.__subclasses__())
+	mPlugin.registerCommand(IMPORT_COMMAND, SpeedTreeImportCommand.creator, SpeedTreeImportCommand.syntaxCreator)
+	mPlugin.registerCommand(EXPAND_COMMAND, SpeedTreeExpandCommand.creator, SpeedTreeExpandCommand.syntaxCreator)
 
 
 ################################################################
@@ -875,4 +1023,10 @@ def uninitializePlugin(mObject):
 	mPlugin = OpenMayaMPx.MFnPlugin(mObject)
 	for subclass in SpeedTreeImporterTranslatorBase.__subclasses__():
 		mPlugin.deregisterFileTranslator(subclass.description)
+	mPlugin.deregisterCommand(COMMIT_COMMAND)
+	mPlugin.deregisterCommand(IMPORT_COMMAND)
+	mPlugin.deregisterCommand(EXPAND_COMMAND)
+	RegisterTranslators([])
+	ReleaseShaderLibrary()
+	ReleaseProxyTextures()
 
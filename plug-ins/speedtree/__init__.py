@@ -0,0 +1,5 @@
+################################################################
+# speedtree
+#
+# Support modules for the SpeedTreeImporter plug-in. This folder sits next to
+# SpeedTreeImporter.py and is put on sys.path by the plug-in when it loads.
@@ -0,0 +1,207 @@
+################################################################
+# SpeedTree batch importer
+#
+# Converts a library of .stmat files into .ma/.mb scenes with a pool of mayapy
+# worker processes, one scene per .stmat:
+#
+#   mayapy speedtree/batch.py -o D:/trees/scenes -t vray D:/trees/library
+#
+# --options passes an import option string to every import, for lighter
+# variants of a library ("skipMaterials=*Billboard*;lods=0").
+#
+# Every worker starts Maya standalone once, loads the SpeedTree plug-in and
+# the renderer plug-in, then imports and saves one file at a time. A JSON
+# manifest with the timings, node counts and errors of every file is written
+# next to the scenes.
+
+################################################################
+# Imports
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import os.path as path
+import sys
+import time
+import traceback
+
+
+################################################################
+# Translators
+
+# translator name -> (file translator description, renderer plug-in)
+TRANSLATORS = {
+	"arnold" : ("SpeedTree", "mtoa"),
+	"vray" : ("SpeedTree for V-Ray", "vrayformaya"),
+	"renderman" : ("SpeedTree for Renderman", "RenderMan_for_Maya"),
+	"redshift" : ("SpeedTree for Redshift", "redshift4maya"),
+}
+
+MESH_PLUGINS = ("fbxmaya", "AbcImport", "mayaUsdPlugin")
+
+DEFAULT_PLUGIN = path.join(path.dirname(path.dirname(path.abspath(__file__))), "SpeedTreeImporter.py")
+
+
+################################################################
+# Worker
+
+def InitializeWorker(pluginPath, translator):
+	import maya.standalone
+	maya.standalone.initialize(name = "python")
+	import maya.cmds as mc
+
+	for plugin in MESH_PLUGINS + (TRANSLATORS[translator][1],):
+		try:
+			mc.loadPlugin(plugin, quiet = True)
+		except RuntimeError:
+			print("SpeedTree WARNING: Could not load plug-in " + plugin)
+	mc.loadPlugin(pluginPath, quiet = True)
+
+def ConvertFile(stmatFile, outputFile, translator, options = ""):
+	import maya.cmds as mc
+
+	result = { "file" : stmatFile, "output" : outputFile, "translator" : translator, "status" : "failed" }
+	start = time.time()
+	try:
+		mc.file(new = True, force = True)
+		nodesBefore = len(mc.ls())
+		setsBefore = len(mc.ls(type = "shadingEngine"))
+
+		importStart = time.time()
+		mc.file(stmatFile, i = True, type = TRANSLATORS[translator][0], ignoreVersion = True, options = options)
+		result["importSeconds"] = time.time() - importStart
+		# phase timings and counters the translator reported for this import
+		from speedtree.stats import LastReport
+		result["importStats"] = LastReport()
+		if (result["importStats"] != None and result["importStats"]["status"] != "ok"):
+			# the translator catches its own failures, a tree that did not import right is not saved
+			raise RuntimeError(result["importStats"].get("error", { }).get("message", "The import failed"))
+
+		result["nodes"] = len(mc.ls()) - nodesBefore
+		result["meshes"] = len(mc.ls(type = "mesh"))
+		result["materials"] = len(mc.ls(mat = True))
+		result["shadingGroups"] = len(mc.ls(type = "shadingEngine")) - setsBefore
+		result["fileTextures"] = len(mc.ls(type = "file"))
+		if (result["meshes"] == 0):
+			# the translator reports its errors and returns, make sure an empty scene counts as a failure
+			raise RuntimeError("No geometry was imported")
+
+		saveStart = time.time()
+		mc.file(rename = outputFile)
+		mc.file(save = True, force = True, type = "mayaBinary" if outputFile.endswith(".mb") else "mayaAscii")
+		result["saveSeconds"] = time.time() - saveStart
+		result["status"] = "ok"
+	except Exception as e:
+		result["error"] = str(e)
+		result["traceback"] = traceback.format_exc()
+	result["seconds"] = time.time() - start
+	return result
+
+
+################################################################
+# Batch
+
+def FindMaterialFiles(aInputs):
+	aFiles = []
+	for input in aInputs:
+		if (path.isdir(input)):
+			for root, dirs, files in os.walk(input):
+				dirs.sort()
+				aFiles.extend(path.join(root, name) for name in sorted(files) if name.lower().endswith(".stmat"))
+		else:
+			aFiles.append(input)
+	return [path.abspath(stmatFile) for stmatFile in aFiles]
+
+def OutputFiles(aFiles, outputDir, extension):
+	aOutputs = []
+	used = set()
+	for stmatFile in aFiles:
+		name = path.splitext(path.basename(stmatFile))[0]
+		outputFile = path.join(outputDir, name + extension)
+		index = 2
+		while (outputFile.lower() in used):
+			outputFile = path.join(outputDir, name + "_" + str(index) + extension)
+			index += 1
+		used.add(outputFile.lower())
+		aOutputs.append(outputFile)
+	return aOutputs
+
+def RunBatch(aFiles, outputDir, translator = "arnold", extension = ".mb", jobs = None, pluginPath = DEFAULT_PLUGIN, maxAttempts = 2, options = ""):
+	jobs = max(1, min(jobs or os.cpu_count() or 1, len(aFiles) or 1))
+	if (not path.isdir(outputDir)):
+		os.makedirs(outputDir)
+
+	start = time.time()
+	results = { }
+	attempts = dict.fromkeys(aFiles, 0)
+	pending = list(zip(aFiles, OutputFiles(aFiles, outputDir, extension)))
+	context = multiprocessing.get_context("spawn")
+	isolated = False
+	while (pending):
+		# a crashed worker breaks the whole pool and every file still in it fails with it, without telling which one
+		# crashed it. Those files get another go one per pool, where a crash is charged to the file that caused it.
+		retry = []
+		for aPoolFiles in ([pending] if not isolated else [[pair] for pair in pending]):
+			with concurrent.futures.ProcessPoolExecutor(1 if isolated else jobs, mp_context = context, initializer = InitializeWorker, initargs = (pluginPath, translator)) as pool:
+				futures = { }
+				for stmatFile, outputFile in aPoolFiles:
+					attempts[stmatFile] += 1
+					futures[pool.submit(ConvertFile, stmatFile, outputFile, translator, options)] = (stmatFile, outputFile)
+				for future in concurrent.futures.as_completed(futures):
+					stmatFile, outputFile = futures[future]
+					try:
+						result = future.result()
+					except Exception as e:
+						if (not isolated):
+							attempts[stmatFile] -= 1
+							retry.append((stmatFile, outputFile))
+							continue
+						if (attempts[stmatFile] < maxAttempts):
+							retry.append((stmatFile, outputFile))
+							continue
+						result = { "file" : stmatFile, "output" : outputFile, "translator" : translator, "status" : "failed", "error" : "Worker process died: " + str(e) }
+					result["attempts"] = attempts[stmatFile]
+					results[stmatFile] = result
+					print("SpeedTree: [" + result["status"] + "] " + stmatFile)
+		pending = retry
+		isolated = True
+
+	aResults = [results[stmatFile] for stmatFile in aFiles]
+	failed = sum(1 for result in aResults if result["status"] != "ok")
+	return { "translator" : translator,
+			"options" : options,
+			"jobs" : jobs,
+			"seconds" : time.time() - start,
+			"succeeded" : len(aResults) - failed,
+			"failed" : failed,
+			"files" : aResults }
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = "Convert SpeedTree .stmat files into Maya scenes with a pool of mayapy processes.")
+	parser.add_argument("inputs", nargs = "+", help = ".stmat files or folders to search for them")
+	parser.add_argument("-o", "--output", required = True, help = "folder for the converted scenes")
+	parser.add_argument("-t", "--translator", choices = sorted(TRANSLATORS), default = "arnold")
+	parser.add_argument("-f", "--format", choices = ("ma", "mb"), default = "mb")
+	parser.add_argument("-j", "--jobs", type = int, default = None, help = "worker processes, defaults to one per core")
+	parser.add_argument("-m", "--manifest", default = None, help = "manifest path, defaults to <output>/manifest.json")
+	parser.add_argument("--plugin", default = DEFAULT_PLUGIN, help = "path to SpeedTreeImporter.py")
+	parser.add_argument("--options", default = "", help = "import option string, like \"lods=0;skipMaps=Subsurface*\"")
+	args = parser.parse_args(argv)
+
+	aFiles = FindMaterialFiles(args.inputs)
+	if (not aFiles):
+		print("SpeedTree ERROR: No .stmat files found")
+		return 1
+
+	manifest = RunBatch(aFiles, args.output, args.translator, "." + args.format, args.jobs, path.abspath(args.plugin), options = args.options)
+	manifestPath = args.manifest or path.join(args.output, "manifest.json")
+	with open(manifestPath, "w") as stream:
+		json.dump(manifest, stream, indent = 2)
+	print("SpeedTree: converted " + str(manifest["succeeded"]) + " of " + str(len(aFiles)) + " files in " +
+			("%.1f" % manifest["seconds"]) + "s, manifest written to " + manifestPath)
+	return 1 if manifest["failed"] else 0
+
+if (__name__ == "__main__"):
+	sys.exit(main())
@@ -0,0 +1,82 @@
+################################################################
+# Imports
+
+import fnmatch
+
+import maya.cmds as mc
+
+from speedtree.stmat import SpeedTreeMaterial
+
+
+################################################################
+# ImportFilter
+#
+# Lighter variants of a tree for previs and layout: the filter options leave
+# parts of the .stmat out before anything is built.
+#
+#   skipMaterials   materials whose names match one of these patterns are not
+#                   built and the geometry that uses them is deleted right
+#                   after the mesh import ("*Frond*, *Billboard*")
+#   skipMaps        maps whose names match are not wired ("Subsurface*, Gloss")
+#   vertexOpacity   off builds every material without the blend_ao vertex
+#                   opacity blending
+#
+# Patterns are fnmatch patterns, separated by commas and not case sensitive.
+# Materials() hands back the materials of the .stmat as the import should
+# build them, copies where the filter changes something, so the parse cache
+# never holds filtered materials. DeleteMembers() removes the geometry of a
+# skipped material.
+
+def ParsePatterns(text):
+	return [pattern.strip().lower() for pattern in text.split(",") if pattern.strip()]
+
+class ImportFilter:
+	def __init__(self, options):
+		self.materialPatterns = ParsePatterns(options.skipMaterials)
+		self.mapPatterns = ParsePatterns(options.skipMaps)
+		self.vertexOpacity = options.vertexOpacity
+
+	def Active(self):
+		return bool(self.materialPatterns or self.mapPatterns or not self.vertexOpacity)
+
+	def Matches(self, name, aPatterns):
+		name = name.lower()
+		for pattern in aPatterns:
+			if (fnmatch.fnmatchcase(name, pattern)):
+				return True
+		return False
+
+	def SkipMaterial(self, name):
+		return self.Matches(name, self.materialPatterns)
+
+	def Material(self, stMaterial):
+		# stMaterial itself, or a copy without the maps and the vertex opacity that are filtered out
+		aMaps = dict((name, stmap) for name, stmap in stMaterial.maps.items() if not self.Matches(name, self.mapPatterns))
+		vertexOpacity = stMaterial.vertexOpacity and self.vertexOpacity
+		if (len(aMaps) == len(stMaterial.maps) and vertexOpacity == stMaterial.vertexOpacity):
+			return stMaterial
+		filtered = SpeedTreeMaterial(stMaterial.name, stMaterial.twoSided, vertexOpacity, stMaterial.userData)
+		filtered.maps = aMaps
+		return filtered
+
+	def Materials(self, aMaterials):
+		# material name -> material to build, in file order, without the skipped ones
+		if (not self.Active()):
+			return aMaterials
+		aFiltered = { }
+		for name, stMaterial in aMaterials.items():
+			if (not self.SkipMaterial(name)):
+				aFiltered[name] = self.Material(stMaterial)
+		return aFiltered
+
+def DeleteMembers(shadingGroup):
+	# deletes the geometry on a shading group: meshes with their transforms, faces on their own
+	aNodes = []
+	for member in mc.sets(shadingGroup, q = True) or []:
+		if ("." in member):
+			aNodes.append(member)
+		else:
+			aNodes.extend(mc.listRelatives(member, parent = True, fullPath = True) or [member])
+	if (aNodes):
+		mc.delete(aNodes)
+	return len(aNodes)
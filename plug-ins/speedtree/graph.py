@@ -0,0 +1,274 @@
+################################################################
+# Imports
+
+import collections
+
+import maya.cmds as mc
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+
+
+################################################################
+# Graph backends
+#
+# CreateMaterial builds its shading network through self.graph instead of
+# calling maya.cmds directly. Both backends take the same string arguments as
+# mc.shadingNode / mc.setAttr / mc.connectAttr:
+#
+#   CommandGraph  runs every call right away through maya.cmds
+#   ModifierGraph records the calls into one MDGModifier and runs them all in
+#                 a single doIt() when Commit() is called
+#
+# Nodes made by a ModifierGraph are handed out as placeholder names that only
+# turn into real node names after Commit(), use Name() to look them up.
+# Both count the nodes, connections and setAttr calls they make in counts.
+
+# connections mc.defaultNavigation makes between a place2dTexture and a file node
+PLACE2D_CONNECTIONS = [("coverage", "coverage"), ("translateFrame", "translateFrame"), ("rotateFrame", "rotateFrame"),
+						("mirrorU", "mirrorU"), ("mirrorV", "mirrorV"), ("stagger", "stagger"), ("wrapU", "wrapU"),
+						("wrapV", "wrapV"), ("repeatUV", "repeatUV"), ("offset", "offset"), ("rotateUV", "rotateUV"),
+						("noiseUV", "noiseUV"), ("vertexUvOne", "vertexUvOne"), ("vertexUvTwo", "vertexUvTwo"),
+						("vertexUvThree", "vertexUvThree"), ("vertexCameraOne", "vertexCameraOne"),
+						("outUV", "uvCoord"), ("outUvFilterSize", "uvFilterSize")]
+
+# the colorManagementGlobals node of every scene
+COLOR_MANAGEMENT_GLOBALS = "defaultColorMgtGlobals"
+
+# connections mc.shadingNode(isColorManaged = True) makes from the color management globals
+COLOR_MANAGEMENT_CONNECTIONS = [("cmEnabled", "colorManagementEnabled"), ("configFileEnabled", "colorManagementConfigFileEnabled"),
+								("configFilePath", "colorManagementConfigFilePath"), ("workingSpaceName", "workingSpace")]
+
+# hypershade lists mc.shadingNode adds new nodes to
+SHADER_LIST = ("defaultShaderList1", "shaders")
+TEXTURE_LIST = ("defaultTextureList1", "textures")
+UTILITY_LIST = ("defaultRenderUtilityList1", "utilities")
+
+COMMIT_COMMAND = "speedTreeCommitGraph"
+PLACEHOLDER_PREFIX = "<speedTree:"
+
+
+class CommandGraph:
+	def __init__(self):
+		self.counts = collections.Counter()
+
+	def ShadingNode(self, nodeType, asShader = False, asTexture = False, asUtility = False, isColorManaged = False):
+		self.counts["nodes"] += 1
+		if (isColorManaged):
+			self.counts["connections"] += len(COLOR_MANAGEMENT_CONNECTIONS)
+		return mc.shadingNode(nodeType, asShader = asShader, asTexture = asTexture, asUtility = asUtility, isColorManaged = isColorManaged)
+
+	def SetAttr(self, plug, *values, **kwargs):
+		self.counts["setAttr"] += 1
+		mc.setAttr(plug, *values, **kwargs)
+
+	def ConnectAttr(self, source, destination, force = False):
+		self.counts["connections"] += 1
+		mc.connectAttr(source, destination, force = force)
+
+	def DefaultNavigation(self, source, destination):
+		self.counts["connections"] += len(PLACE2D_CONNECTIONS)
+		mc.defaultNavigation(connectToExisting = True, source = source, destination = destination)
+
+	def AttributeExists(self, node, attr):
+		return mc.attributeQuery(attr, node = node, exists = True)
+
+	def Exists(self, node):
+		return mc.objExists(node)
+
+	def Name(self, node):
+		return node
+
+	def Commit(self):
+		pass
+
+
+class ModifierGraph:
+	def __init__(self):
+		self.modifier = OpenMaya.MDGModifier()
+		self.nodes = { }	# placeholder -> MObject
+		self.names = { }	# placeholder -> node name after Commit()
+		self.inputs = { }	# destination -> source plug of the recorded connections
+		self.listIndices = { }
+		self.committed = False
+		self.counts = collections.Counter()
+
+	# --- nodes and plugs
+
+	def ShadingNode(self, nodeType, asShader = False, asTexture = False, asUtility = False, isColorManaged = False):
+		node = self.modifier.createNode(nodeType)
+		self.counts["nodes"] += 1
+		placeholder = PLACEHOLDER_PREFIX + str(len(self.nodes)) + ">"
+		self.nodes[placeholder] = node
+
+		# register the node in the hypershade like mc.shadingNode does
+		if (asShader):
+			self.AddToList(node, SHADER_LIST)
+		elif (asTexture):
+			self.AddToList(node, TEXTURE_LIST)
+		elif (asUtility):
+			self.AddToList(node, UTILITY_LIST)
+		if (isColorManaged):
+			globals = self.Plug(COLOR_MANAGEMENT_GLOBALS)
+			for source, destination in COLOR_MANAGEMENT_CONNECTIONS:
+				self.modifier.connect(FindPlug(globals, source), FindPlug(node, destination))
+			self.counts["connections"] += len(COLOR_MANAGEMENT_CONNECTIONS)
+		return placeholder
+
+	def AddToList(self, node, nodeList):
+		listNode, listAttr = nodeList
+		arrayPlug = FindPlug(self.Plug(listNode), listAttr)
+		if (nodeList not in self.listIndices):
+			indices = OpenMaya.MIntArray()
+			arrayPlug.getExistingArrayAttributeIndices(indices)
+			self.listIndices[nodeList] = (max(indices) + 1) if len(indices) else 0
+		index = self.listIndices[nodeList]
+		self.listIndices[nodeList] = index + 1
+		self.modifier.connect(FindPlug(node, "message"), arrayPlug.elementByLogicalIndex(index))
+
+	def Plug(self, plugName):
+		# MObject of a node, or MPlug of an attribute, for a placeholder or an existing node
+		nodeName, dot, attrPath = plugName.partition(".")
+		if (nodeName in self.nodes):
+			node = self.nodes[nodeName]
+		else:
+			nodeName = self.names.get(nodeName, nodeName)
+			selection = OpenMaya.MSelectionList()
+			selection.add(nodeName)
+			node = OpenMaya.MObject()
+			selection.getDependNode(0, node)
+		if (not attrPath):
+			return node
+		return FindPlug(node, attrPath)
+
+	# --- recording
+
+	def SetAttr(self, plugName, *values, **kwargs):
+		self.counts["setAttr"] += 1
+		plug = self.Plug(plugName)
+		if (len(values) == 1):
+			SetPlugValue(self.modifier, plug, values[0], kwargs.get("type"))
+		else:
+			for index, value in enumerate(values):
+				SetPlugValue(self.modifier, plug.child(index), value)
+
+	def ConnectAttr(self, source, destination, force = False):
+		sourcePlug = self.Plug(source)
+		destinationPlug = self.Plug(destination)
+		# the destination may be fed by a connection that is only recorded so far
+		aSources = OpenMaya.MPlugArray()
+		if (destination in self.inputs):
+			aSources.append(self.inputs[destination])
+		else:
+			destinationPlug.connectedTo(aSources, True, False)
+		if (aSources.length() > 0):
+			if (not force):
+				raise RuntimeError("SpeedTree: " + destination + " is already connected")
+			self.modifier.disconnect(aSources[0], destinationPlug)
+		self.modifier.connect(sourcePlug, destinationPlug)
+		self.inputs[destination] = sourcePlug
+		self.counts["connections"] += 1
+
+	def DefaultNavigation(self, source, destination):
+		self.counts["connections"] += len(PLACE2D_CONNECTIONS)
+		for sourceAttr, destinationAttr in PLACE2D_CONNECTIONS:
+			self.modifier.connect(self.Plug(source + "." + sourceAttr), self.Plug(destination + "." + destinationAttr))
+
+	def AttributeExists(self, node, attr):
+		return OpenMaya.MFnDependencyNode(self.Plug(node)).hasAttribute(attr)
+
+	def Exists(self, node):
+		if (node in self.nodes):
+			return True
+		return mc.objExists(self.names.get(node, node))
+
+	def Name(self, node):
+		return self.names.get(node, node)
+
+	# --- commit
+
+	def Commit(self):
+		if (self.committed):
+			return
+		if (hasattr(mc, COMMIT_COMMAND)):
+			# run it through the command so the whole network is one undo step
+			SpeedTreeCommitGraphCommand.pending = self.modifier
+			getattr(mc, COMMIT_COMMAND)()
+		else:
+			self.modifier.doIt()
+		self.committed = True
+		for placeholder, node in self.nodes.items():
+			self.names[placeholder] = OpenMaya.MFnDependencyNode(node).name()
+
+
+GRAPH_BACKENDS = {"commands" : CommandGraph, "modifier" : ModifierGraph}
+
+
+def FindPlug(node, attrPath):
+	# resolve "attr", "parent.child", "array[3]" and "array[3].child" on a node
+	fnNode = OpenMaya.MFnDependencyNode(node)
+	plug = None
+	for part in attrPath.split("."):
+		attrName, bracket, index = part.partition("[")
+		if (plug == None):
+			plug = fnNode.findPlug(attrName, False)
+		else:
+			plug = plug.child(fnNode.attribute(attrName))
+		if (bracket):
+			plug = plug.elementByLogicalIndex(int(index[:-1]))
+	return plug
+
+def SetPlugValue(modifier, plug, value, valueType = None):
+	if (valueType == "string" or isinstance(value, str)):
+		modifier.newPlugValueString(plug, value)
+		return
+	attribute = plug.attribute()
+	if (attribute.hasFn(OpenMaya.MFn.kNumericAttribute)):
+		unitType = OpenMaya.MFnNumericAttribute(attribute).unitType()
+		if (unitType == OpenMaya.MFnNumericData.kBoolean):
+			modifier.newPlugValueBool(plug, bool(value))
+		elif (unitType == OpenMaya.MFnNumericData.kFloat):
+			modifier.newPlugValueFloat(plug, float(value))
+		elif (unitType == OpenMaya.MFnNumericData.kDouble):
+			modifier.newPlugValueDouble(plug, float(value))
+		else:
+			modifier.newPlugValueInt(plug, int(value))
+	elif (attribute.hasFn(OpenMaya.MFn.kEnumAttribute)):
+		modifier.newPlugValueInt(plug, int(value))
+	elif (isinstance(value, bool)):
+		modifier.newPlugValueBool(plug, value)
+	elif (isinstance(value, int)):
+		modifier.newPlugValueInt(plug, value)
+	else:
+		modifier.newPlugValueDouble(plug, float(value))
+
+
+################################################################
+# speedTreeCommitGraph
+#
+# Runs the MDGModifier of a ModifierGraph as one undoable command.
+
+class SpeedTreeCommitGraphCommand(OpenMayaMPx.MPxCommand):
+	pending = None
+
+	def __init__(self):
+		OpenMayaMPx.MPxCommand.__init__(self)
+		self.modifier = None
+
+	def isUndoable(self):
+		return True
+
+	def doIt(self, argList):
+		self.modifier = SpeedTreeCommitGraphCommand.pending
+		SpeedTreeCommitGraphCommand.pending = None
+		if (self.modifier != None):
+			self.modifier.doIt()
+
+	def redoIt(self):
+		self.modifier.doIt()
+
+	def undoIt(self):
+		self.modifier.undoIt()
+
+	@staticmethod
+	def creator():
+		return OpenMayaMPx.asMPxPtr(SpeedTreeCommitGraphCommand())
@@ -0,0 +1,88 @@
+################################################################
+# Imports
+
+import os
+import os.path as path
+import uuid
+
+import maya.cmds as mc
+
+
+################################################################
+# Instances
+#
+# A layout usually holds the same tree many times, and every import of it
+# ran the Alembic/FBX/USD import again and built a second copy of its
+# geometry. With the instancing option the roots of an import are tagged
+# with the .stmat and mesh file they came from (path and mtime of both, so
+# an edited tree is imported again), the translator and the import options
+# that change what is built, and later imports of the same files with the
+# same translator and options copy the tree that is already there instead:
+#
+#   "instance"   mc.instance copies of the root transforms, side by side
+#   "placement"  the same copies below one new transform that places the tree
+#
+# Both share the geometry and the shading assignments of the first import,
+# no mesh file is read and no material is built. The tags are found with
+# mc.ls, so they survive renames and saving and opening the scene; the
+# copies get no tag of their own, only the roots of a real import are used.
+
+INSTANCING_MODES = ("instance", "placement")
+
+SOURCE_ATTRIBUTE = "speedTreeSource"
+IMPORT_ATTRIBUTE = "speedTreeImport"
+
+# import options that change the geometry or the materials of an import
+KEY_OPTIONS = ("skipMaterials", "skipMaps", "vertexOpacity", "lods", "lodGroup", "lodDistance", "meshProxy",
+				"resolveTextures", "shareMaterials", "placeholderMaterials", "opacityAnalysis",
+				"prepareTextures", "textureDirectory", "proxyTextures", "proxyScale")
+
+def SourceKey(stmatFile, meshFile, translator, options):
+	# identifies the tree of a .stmat with its mesh file, translator and options, None when one of the files is not there
+	aParts = [translator]
+	try:
+		for filename in (stmatFile, meshFile):
+			aParts.append(path.normcase(path.abspath(filename)).replace(os.sep, "/"))
+			aParts.append(str(os.stat(filename).st_mtime_ns))
+	except OSError:
+		return None
+	for name in KEY_OPTIONS:
+		aParts.append(name + "=" + str(getattr(options, name)))
+	return "|".join(aParts)
+
+def FindImport(key):
+	# root transforms of the first import of key still in the scene
+	aImports = { }
+	aOrder = []
+	for root in mc.ls("*." + SOURCE_ATTRIBUTE, objectsOnly = True, recursive = True, long = True) or []:
+		if (mc.getAttr(root + "." + SOURCE_ATTRIBUTE) != key):
+			continue
+		importId = mc.getAttr(root + "." + IMPORT_ATTRIBUTE)
+		if (importId not in aImports):
+			aImports[importId] = []
+			aOrder.append(importId)
+		aImports[importId].append(root)
+	return aImports[aOrder[0]] if aOrder else []
+
+def TagImport(aRoots, key):
+	importId = uuid.uuid4().hex
+	for root in aRoots:
+		SetTag(root, key, importId)
+
+def SetTag(node, key, importId):
+	if (not mc.objExists(node + "." + SOURCE_ATTRIBUTE)):
+		mc.addAttr(node, longName = SOURCE_ATTRIBUTE, dataType = "string")
+		mc.addAttr(node, longName = IMPORT_ATTRIBUTE, dataType = "string")
+	mc.setAttr(node + "." + SOURCE_ATTRIBUTE, key, type = "string")
+	mc.setAttr(node + "." + IMPORT_ATTRIBUTE, importId, type = "string")
+
+def InstanceImport(aRoots, mode, name):
+	# copies the roots of an earlier import, returns the new top transforms
+	aCopies = mc.instance(aRoots) or []
+	for copy in aCopies:
+		# the copies carry the tags of the transforms they were made from
+		if (mc.objExists(copy + "." + SOURCE_ATTRIBUTE)):
+			SetTag(copy, "", "")
+	if (mode == "placement"):
+		return [mc.group(aCopies, name = name + "_placement#")]
+	return aCopies
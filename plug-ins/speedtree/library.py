@@ -0,0 +1,102 @@
+################################################################
+# Imports
+
+import maya.cmds as mc
+import maya.OpenMaya as OpenMaya
+
+
+################################################################
+# ShaderLibrary
+#
+# Finds shading networks earlier imports built, so importing many variants of
+# a tree into one scene builds each distinct network once. Every shader the
+# importer makes is tagged with the content hash of its SpeedTreeMaterial and
+# the translator that built it. The index from (translator, hash) to shader
+# is built from those tags on the first lookup and thrown away whenever an
+# indexed node is deleted or another scene is opened; shaders that come in
+# through a plain file import or reference are picked up on the next rebuild.
+
+HASH_ATTRIBUTE = "speedTreeHash"
+TRANSLATOR_ATTRIBUTE = "speedTreeTranslator"
+
+class ShaderLibrary:
+	def __init__(self, sceneScope = True):
+		# without sceneScope it only knows the shaders tagged through it, the scene is never indexed
+		self.index = None if sceneScope else { }	# (translator, hash) -> MObjectHandle, None until it is needed
+		self.indexed = set()	# hash codes of the indexed nodes
+		self.callbackIds = []
+
+	def Start(self):
+		if (not self.callbackIds):
+			self.callbackIds.append(OpenMaya.MDGMessage.addNodeRemovedCallback(self.OnNodeRemoved, "dependNode"))
+			for message in (OpenMaya.MSceneMessage.kAfterNew, OpenMaya.MSceneMessage.kAfterOpen):
+				self.callbackIds.append(OpenMaya.MSceneMessage.addCallback(message, self.OnSceneChanged))
+
+	def Stop(self):
+		for callbackId in self.callbackIds:
+			OpenMaya.MMessage.removeCallback(callbackId)
+		self.callbackIds = []
+		self.Invalidate()
+
+	def Invalidate(self):
+		self.index = None
+		self.indexed = set()
+
+	def OnNodeRemoved(self, node, clientData):
+		if (self.index != None and OpenMaya.MObjectHandle(node).hashCode() in self.indexed):
+			self.Invalidate()
+
+	def OnSceneChanged(self, clientData):
+		self.Invalidate()
+
+	def Rebuild(self):
+		self.index = { }
+		self.indexed = set()
+		for shader in mc.ls("*." + HASH_ATTRIBUTE, objectsOnly = True, recursive = True) or []:
+			translator = mc.getAttr(shader + "." + TRANSLATOR_ATTRIBUTE) if mc.objExists(shader + "." + TRANSLATOR_ATTRIBUTE) else ""
+			self.Add(shader, translator, mc.getAttr(shader + "." + HASH_ATTRIBUTE))
+
+	def Add(self, shader, translator, contentHash):
+		selection = OpenMaya.MSelectionList()
+		selection.add(shader)
+		node = OpenMaya.MObject()
+		selection.getDependNode(0, node)
+		handle = OpenMaya.MObjectHandle(node)
+		self.index[(translator, contentHash)] = handle
+		self.indexed.add(handle.hashCode())
+
+	def Find(self, translator, contentHash):
+		if (self.index == None):
+			self.Rebuild()
+		handle = self.index.get((translator, contentHash))
+		if (handle == None):
+			return None
+		if (not handle.isValid()):
+			del self.index[(translator, contentHash)]
+			return None
+		return OpenMaya.MFnDependencyNode(handle.object()).name()
+
+	def Tag(self, shader, translator, contentHash):
+		if (not mc.objExists(shader + "." + HASH_ATTRIBUTE)):
+			mc.addAttr(shader, longName = HASH_ATTRIBUTE, dataType = "string")
+			mc.addAttr(shader, longName = TRANSLATOR_ATTRIBUTE, dataType = "string")
+		mc.setAttr(shader + "." + HASH_ATTRIBUTE, contentHash, type = "string")
+		mc.setAttr(shader + "." + TRANSLATOR_ATTRIBUTE, translator, type = "string")
+		if (self.index != None):
+			self.Add(shader, translator, contentHash)
+
+
+shaderLibrary = None
+
+def GetShaderLibrary():
+	global shaderLibrary
+	if (shaderLibrary == None):
+		shaderLibrary = ShaderLibrary()
+		shaderLibrary.Start()
+	return shaderLibrary
+
+def ReleaseShaderLibrary():
+	global shaderLibrary
+	if (shaderLibrary != None):
+		shaderLibrary.Stop()
+		shaderLibrary = None
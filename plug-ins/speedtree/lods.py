@@ -0,0 +1,111 @@
+################################################################
+# Imports
+
+import re
+
+import maya.cmds as mc
+
+
+################################################################
+# LODs
+#
+# SpeedTree exports every LOD of a tree into the mesh file, as LOD0, LOD1,
+# ... groups or as objects with _LOD0, _LOD1, ... in their names, and all of
+# them used to end up in the scene with their materials built. The level of
+# an imported mesh is the number of the top-most name in its path that
+# matches LOD(\d+); meshes without one belong to every level.
+#
+# With the lods option ("0", "0,2", ...) the other levels are deleted right
+# after the mesh import, and the shading groups only they used are left out
+# of the material build. With lodGroup the levels that are left go below a
+# Maya lodGroup that shows one of them at a time, switching every
+# lodDistance units from the camera: LOD0 up to lodDistance, LOD1 up to
+# twice that and so on, the last one beyond. A level made of several
+# objects is grouped first.
+
+LOD_NAME = re.compile(r"LOD(\d+)", re.IGNORECASE)
+
+# the camera lodGroups measure the distance from, when it is there
+LOD_CAMERA = "perspShape"
+
+def ParseLods(text):
+	# "0, 2" -> set([0, 2]), None for all of them
+	aLevels = set()
+	for part in text.replace(";", ",").split(","):
+		part = part.strip().upper()
+		if (part.startswith("LOD")):
+			part = part[3:]
+		if (part):
+			aLevels.add(int(part))
+	return aLevels or None
+
+def LodLevels(aMeshTransforms):
+	# LOD node (full path) -> level, and mesh transform (full path) -> its LOD node or None
+	aLevels = { }
+	aMeshes = { }
+	for mesh in mc.ls(aMeshTransforms, long = True) if aMeshTransforms else []:
+		aParts = mesh.split("|")
+		aMeshes[mesh] = None
+		for index in range(1, len(aParts)):
+			match = LOD_NAME.search(aParts[index])
+			if (match != None):
+				node = "|".join(aParts[:index + 1])
+				aLevels.setdefault(node, int(match.group(1)))
+				aMeshes[mesh] = node
+				break
+	return aLevels, aMeshes
+
+def ShadingGroups(transform):
+	aShapes = mc.listRelatives(transform, shapes = True, fullPath = True) or []
+	return set(mc.listConnections(aShapes, type = "shadingEngine") or []) if aShapes else set()
+
+def DropLods(aLevels, aMeshes, aKeep):
+	# deletes the LOD nodes whose level is not in aKeep, returns them and the shading groups no kept mesh uses
+	aDropped = [node for node, level in aLevels.items() if level not in aKeep]
+	if (not aDropped):
+		return [], []
+	aDroppedSets = set()
+	aKeptSets = set()
+	for mesh, node in aMeshes.items():
+		if (node in aDropped):
+			aDroppedSets.update(ShadingGroups(mesh))
+		else:
+			aKeptSets.update(ShadingGroups(mesh))
+	mc.delete(aDropped)
+	for node in aDropped:
+		del aLevels[node]
+	return aDropped, sorted(aDroppedSets - aKeptSets)
+
+def BuildLodGroup(aLevels, name, distance):
+	# puts the LOD nodes below a new lodGroup, one child per level, returns it or None when there is one level
+	aByLevel = { }
+	for node, level in aLevels.items():
+		aByLevel.setdefault(level, []).append(node)
+	if (len(aByLevel) < 2):
+		return None
+	aParents = mc.listRelatives(next(iter(aLevels)), parent = True, fullPath = True)
+	if (aParents):
+		lodGroup = mc.createNode("lodGroup", name = name + "_lodGroup", parent = aParents[0])
+	else:
+		lodGroup = mc.createNode("lodGroup", name = name + "_lodGroup")
+	for index, level in enumerate(sorted(aByLevel)):
+		aNodes = aByLevel[level]
+		node = aNodes[0] if (len(aNodes) == 1) else mc.group(aNodes, name = name + "_LOD" + str(level))
+		mc.parent(node, lodGroup)
+		if (index > 0):
+			mc.setAttr(lodGroup + ".threshold[" + str(index - 1) + "]", distance * index)
+	if (mc.objExists(LOD_CAMERA)):
+		mc.connectAttr(LOD_CAMERA + ".worldMatrix[0]", lodGroup + ".cameraMatrix")
+	return lodGroup
+
+def LodRoots(aRoots, lodGroup):
+	# the roots of an import after BuildLodGroup: the lodGroup instead of the levels below it, when it is not below a root itself
+	lodPath = mc.ls(lodGroup, long = True)[0]
+	aKept = []
+	for root in aRoots:
+		rootPath = mc.ls(root, long = True)[0]
+		if (lodPath.startswith(rootPath + "|")):
+			return aRoots
+		if (not rootPath.startswith(lodPath + "|")):
+			aKept.append(root)
+	return aKept + [lodGroup]
@@ -0,0 +1,222 @@
+################################################################
+# Material mapping tables
+#
+# Every translator describes its shading network as a list of Rules. A Rule
+# holds a few operations and the conditions a SpeedTreeMaterial has to meet
+# for them to run:
+#
+#   map            the map the operations read, it has to be in the material
+#   source         FILE or VALUE when only a file map or only a constant counts
+#   twoSided       True or False when it depends on the TwoSided flag
+#   vertexOpacity  True or False when it depends on the VertexOpacity flag
+#   requires       maps that have to be in the material as well
+#   without        maps that must not be in the material
+#   anyOf          at least one of these maps has to be in the material
+#
+# Operations name the nodes they make ("shader", "normal", ...) and refer to
+# plugs as "name.attr". A MaterialPlan turns the rules into one flat list of
+# operations per kind of material (which maps are files or values, and the
+# two flags), so building a material is a straight run through that list.
+
+import collections
+
+
+################################################################
+# Values
+
+FILE = "file"
+VALUE = "value"
+
+# placeholders Set() resolves against the material and the map of the rule
+RED = "$red"
+INVERSE_RED = "$1-red"
+RGB = "$rgb"
+MAP_FILE = "$file"
+TWO_SIDED = "$twoSided"
+BLEND_IN_TEXCOORD = "$blendInTexcoord"
+
+# where ShadingNode lists a new node
+SHADER = "shader"
+TEXTURE = "texture"
+UTILITY = "utility"
+
+# operations
+NODE = 0
+TEXTURE_FILE = 1
+SET = 2
+CONNECT = 3
+SHAPE_FLAG = 4
+RESULT = 5
+
+OPERATION_NAMES = ("node", "texture", "set", "connect", "shape", "result")
+
+
+################################################################
+# Operations
+
+def Node(name, nodeType, listing = UTILITY):
+	return (NODE, name, nodeType, listing)
+
+def Texture(name, colorSpace = None, ignoreFileRules = False, invert = False):
+	return (TEXTURE_FILE, name, colorSpace, ignoreFileRules, invert)
+
+def Set(plug, value, valueType = None):
+	return (SET, plug, value, valueType)
+
+def Connect(source, destination, force = False):
+	return (CONNECT, source, destination, force)
+
+def ShapeFlag(attr, value, guard = None):
+	# set attr on every shape of the material, when the shape has the guard attribute (attr itself by default)
+	return (SHAPE_FLAG, attr, value, guard or attr)
+
+def Result(name):
+	return (RESULT, name)
+
+
+################################################################
+# Rule
+
+class Rule:
+	__slots__ = ("operations", "map", "source", "twoSided", "vertexOpacity", "requires", "without", "anyOf")
+
+	def __init__(self, operations, map = None, source = None, twoSided = None, vertexOpacity = None, requires = (), without = (), anyOf = ()):
+		self.operations = operations
+		self.map = map
+		self.source = source
+		self.twoSided = twoSided
+		self.vertexOpacity = vertexOpacity
+		self.requires = requires
+		self.without = without
+		self.anyOf = anyOf
+
+	def Matches(self, aMaps, twoSided, vertexOpacity):
+		# aMaps is map name -> True for a file map, False for a constant
+		if (self.map != None):
+			if (self.map not in aMaps):
+				return False
+			if (self.source != None and aMaps[self.map] != (self.source == FILE)):
+				return False
+		if (self.twoSided != None and self.twoSided != twoSided):
+			return False
+		if (self.vertexOpacity != None and self.vertexOpacity != vertexOpacity):
+			return False
+		for name in self.requires:
+			if (name not in aMaps):
+				return False
+		for name in self.without:
+			if (name in aMaps):
+				return False
+		if (self.anyOf and not any(name in aMaps for name in self.anyOf)):
+			return False
+		return True
+
+
+################################################################
+# MaterialPlan
+
+class MaterialPlan:
+	def __init__(self, aRules):
+		self.rules = aRules
+		self.plans = { }	# material signature -> flat operation list
+
+	def Signature(self, stMaterial):
+		aMaps = tuple(sorted((name, bool(stmap.file)) for name, stmap in stMaterial.maps.items()))
+		return (aMaps, bool(stMaterial.twoSided), bool(stMaterial.vertexOpacity))
+
+	def Operations(self, stMaterial):
+		signature = self.Signature(stMaterial)
+		aOperations = self.plans.get(signature)
+		if (aOperations == None):
+			aOperations = self.Compile(*signature)
+			self.plans[signature] = aOperations
+		return aOperations
+
+	def Compile(self, aMaps, twoSided, vertexOpacity):
+		# keep the operations of the matching rules, with the plugs split once and the map they read attached
+		aMaps = dict(aMaps)
+		aOperations = []
+		for rule in self.rules:
+			if (not rule.Matches(aMaps, twoSided, vertexOpacity)):
+				continue
+			for operation in rule.operations:
+				kind = operation[0]
+				if (kind == SET):
+					aOperations.append((SET, tuple(operation[1].split(".", 1)), operation[2], operation[3], rule.map))
+				elif (kind == CONNECT):
+					aOperations.append((CONNECT, tuple(operation[1].split(".", 1)), tuple(operation[2].split(".", 1)), operation[3]))
+				else:
+					aOperations.append(operation + (rule.map,))
+		return aOperations
+
+	def ChannelUse(self, stMaterial):
+		# map name -> the outputs of its file node the network reads ("outColor", "outColorR", "outAlpha", ...)
+		aTextures = { }	# node name -> map name
+		aUse = { }
+		for operation in self.Operations(stMaterial):
+			if (operation[0] == TEXTURE_FILE):
+				aTextures[operation[1]] = operation[-1]
+			elif (operation[0] == CONNECT and operation[1][0] in aTextures):
+				aUse.setdefault(aTextures[operation[1][0]], set()).add(operation[1][1].split(".")[-1])
+		return aUse
+
+	def Cost(self, stMaterial):
+		# operations per kind for one material
+		return collections.Counter(OPERATION_NAMES[operation[0]] for operation in self.Operations(stMaterial))
+
+	def Build(self, translator, stMaterial, aShapes, blendInTexcoord):
+		graph = translator.graph
+		aNodes = { }
+		result = "shader"
+		for operation in self.Operations(stMaterial):
+			kind = operation[0]
+			if (kind == CONNECT):
+				source, destination = operation[1], operation[2]
+				graph.ConnectAttr(aNodes[source[0]] + "." + source[1], aNodes[destination[0]] + "." + destination[1], force = operation[3])
+			elif (kind == SET):
+				(name, attr), value, valueType, mapName = operation[1:]
+				aValues = Resolve(value, stMaterial, mapName, blendInTexcoord)
+				if (value == MAP_FILE):
+					aValues = (translator.ResolveTexture(aValues[0]),)
+				if (valueType != None):
+					graph.SetAttr(aNodes[name] + "." + attr, *aValues, type = valueType)
+				else:
+					graph.SetAttr(aNodes[name] + "." + attr, *aValues)
+			elif (kind == TEXTURE_FILE):
+				name, colorSpace, ignoreFileRules, invert, mapName = operation[1:]
+				aNodes[name] = translator.CreateFileTexture(stMaterial.maps[mapName].file, colorSpace = colorSpace, ignoreFileRules = ignoreFileRules, invert = invert)
+			elif (kind == NODE):
+				name, nodeType, listing = operation[1:4]
+				aNodes[name] = graph.ShadingNode(nodeType, asShader = (listing == SHADER), asTexture = (listing == TEXTURE), asUtility = (listing == UTILITY))
+			elif (kind == SHAPE_FLAG):
+				translator.SetShapeFlag(aShapes, operation[1], operation[2], operation[3])
+			elif (kind == RESULT):
+				result = operation[1]
+		return aNodes[result]
+
+
+	def BuildShapeFlags(self, translator, stMaterial, aShapes):
+		# only the shape flags, for shapes that reuse a network built for another material
+		for operation in self.Operations(stMaterial):
+			if (operation[0] == SHAPE_FLAG):
+				translator.SetShapeFlag(aShapes, operation[1], operation[2], operation[3])
+
+
+def Resolve(value, stMaterial, mapName, blendInTexcoord):
+	# the values to pass to SetAttr for a Set() value
+	if (isinstance(value, tuple)):
+		return value
+	if (value == RED):
+		return (stMaterial.maps[mapName].red,)
+	if (value == INVERSE_RED):
+		return (1.0 - stMaterial.maps[mapName].red,)
+	if (value == RGB):
+		stmap = stMaterial.maps[mapName]
+		return (stmap.red, stmap.green, stmap.blue)
+	if (value == MAP_FILE):
+		return (stMaterial.maps[mapName].file,)
+	if (value == TWO_SIDED):
+		return (stMaterial.twoSided,)
+	if (value == BLEND_IN_TEXCOORD):
+		return (blendInTexcoord,)
+	return (value,)
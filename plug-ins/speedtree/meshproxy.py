@@ -0,0 +1,185 @@
+################################################################
+# Imports
+
+import json
+import os.path as path
+
+import maya.cmds as mc
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+
+from speedtree.options import ImportOptions
+from speedtree.session import ImportFiles, UNDO_CHUNK
+
+
+################################################################
+# Mesh proxies
+#
+# Layout and set dressing do not need editable polygons, and the Alembic and
+# USD imports of dense foliage make the heaviest part of an import. With the
+# meshProxy option the mesh file is not imported: an .abc gets a gpuCache
+# shape and a .usd a mayaUsdProxyShape (mayaUsd), both drawn straight from
+# the file, below a transform named after the .stmat. FBX has no such shape
+# and is imported as before.
+#
+# The materials of the .stmat are built all the same, on one shading group
+# each, connected to speedTreeMaterials of the proxy so they stay in the
+# scene while nothing uses them. speedTreeMaterialNames holds the material
+# of each of them: Maya numbers the names of a second proxy of the same tree,
+# so the shading groups are found through the connections, never by name. Renderers shade a gpuCache
+# as one object, so a proxy of a tree with one material gets it assigned; a
+# gpuCache of several materials gets none. A USD stage gets none either:
+# Maya shading groups can't be bound to the prims of a stage, it renders with
+# the materials in the .usd. Those proxies are for layout, expanding them
+# puts the materials of the .stmat on the tree.
+#
+# speedTreeExpand turns proxies (the selected ones by default) into Maya
+# meshes: it imports their .stmat again with the translator and the import
+# options that made them, only meshProxy off, puts the result below the
+# proxy transform, so it keeps its placement, and
+# deletes the proxy shape. With the shaderLibrary option the expanded tree
+# reuses the shaders the proxy import built; the shading groups of the proxy
+# that are left empty are deleted, with the shading networks only they used.
+#
+#   speedTreeExpand "oak" "birch";
+
+# mesh file extension -> (shape type, plug-in, file attribute)
+PROXY_SHAPES = {
+	".abc" : ("gpuCache", "gpuCache", "cacheFileName"),
+	".usd" : ("mayaUsdProxyShape", "mayaUsdPlugin", "filePath"),
+}
+
+SOURCE_ATTRIBUTE = "speedTreeProxySource"
+TRANSLATOR_ATTRIBUTE = "speedTreeProxyTranslator"
+OPTIONS_ATTRIBUTE = "speedTreeProxyOptions"
+MATERIALS_ATTRIBUTE = "speedTreeMaterials"
+MATERIAL_NAMES_ATTRIBUTE = "speedTreeMaterialNames"
+
+def CreateMeshProxy(meshFile, stmatFile, translator, options, aMaterials):
+	# the proxy transform of meshFile, with an empty shading group per material, None when the file type has no proxy
+	shapeType, plugin, fileAttribute = PROXY_SHAPES.get(path.splitext(meshFile)[1].lower(), (None, None, None))
+	if (shapeType == None):
+		return None
+	if (not mc.pluginInfo(plugin, q = True, l = True)):
+		mc.loadPlugin(plugin, quiet = True)
+	name = path.splitext(path.basename(stmatFile))[0]
+	transform = mc.createNode("transform", name = name)
+	shape = mc.createNode(shapeType, name = name + "Shape", parent = transform)
+	mc.setAttr(shape + "." + fileAttribute, meshFile, type = "string")
+	if (shapeType == "mayaUsdProxyShape"):
+		mc.connectAttr("time1.outTime", shape + ".time")
+
+	mc.addAttr(transform, longName = SOURCE_ATTRIBUTE, dataType = "string")
+	mc.addAttr(transform, longName = TRANSLATOR_ATTRIBUTE, dataType = "string")
+	mc.addAttr(transform, longName = OPTIONS_ATTRIBUTE, dataType = "string")
+	mc.addAttr(transform, longName = MATERIALS_ATTRIBUTE, attributeType = "message", multi = True)
+	mc.addAttr(transform, longName = MATERIAL_NAMES_ATTRIBUTE, dataType = "string")
+	mc.setAttr(transform + "." + SOURCE_ATTRIBUTE, stmatFile, type = "string")
+	mc.setAttr(transform + "." + TRANSLATOR_ATTRIBUTE, translator, type = "string")
+	mc.setAttr(transform + "." + OPTIONS_ATTRIBUTE, options.ToString(), type = "string")
+	mc.setAttr(transform + "." + MATERIAL_NAMES_ATTRIBUTE, json.dumps(list(aMaterials)), type = "string")
+	for index, materialName in enumerate(aMaterials):
+		sg = mc.sets(renderable = True, noSurfaceShader = True, empty = True, name = materialName + "SG")
+		mc.connectAttr(sg + ".message", transform + "." + MATERIALS_ATTRIBUTE + "[" + str(index) + "]")
+	return transform
+
+def ProxySets(transform):
+	# shading group -> material name of the proxy, None when one of the shading groups is gone
+	aSets = { }
+	for index, materialName in enumerate(json.loads(mc.getAttr(transform + "." + MATERIAL_NAMES_ATTRIBUTE) or "[]")):
+		aConnections = mc.listConnections(transform + "." + MATERIALS_ATTRIBUTE + "[" + str(index) + "]", source = True, destination = False)
+		if (not aConnections):
+			return None
+		aSets[aConnections[0]] = materialName
+	return aSets
+
+def ShadeMeshProxy(transform):
+	# after the commit, a gpuCache of one material is put on its shading group, once that has a shader
+	aSets = list(ProxySets(transform) or [])
+	aShapes = mc.listRelatives(transform, shapes = True, type = "gpuCache", fullPath = True) or []
+	if (len(aSets) == 1 and aShapes and mc.listConnections(aSets[0] + ".surfaceShader", source = True, destination = False)):
+		mc.sets(aShapes, e = True, forceElement = aSets[0])
+		return True
+	return False
+
+def IsMeshProxy(node):
+	return mc.objExists(node + "." + SOURCE_ATTRIBUTE)
+
+def ExpandMeshProxies(aProxies = None):
+	# imports the trees of the proxies as meshes in their place, returns the transforms that were expanded
+	if (aProxies == None):
+		aProxies = mc.ls(selection = True, long = True) or []
+	aExpanded = []
+	mc.undoInfo(openChunk = True, chunkName = UNDO_CHUNK)
+	try:
+		for proxy in aProxies:
+			if (not IsMeshProxy(proxy)):
+				print("SpeedTree WARNING: [" + proxy + "] is not a SpeedTree mesh proxy")
+				continue
+			stmatFile = mc.getAttr(proxy + "." + SOURCE_ATTRIBUTE)
+			options = ImportOptions.FromString((mc.getAttr(proxy + "." + OPTIONS_ATTRIBUTE) if mc.objExists(proxy + "." + OPTIONS_ATTRIBUTE) else "") or "")
+			options.meshProxy = False
+			result = ImportFiles([stmatFile], mc.getAttr(proxy + "." + TRANSLATOR_ATTRIBUTE), **vars(options))[0]
+			if (result["status"] != "ok"):
+				print("SpeedTree ERROR: Failed to expand [" + proxy + "]: " + result.get("error", stmatFile))
+				continue
+			mc.parent(result["roots"], proxy, relative = True)
+			aSets = list(set(mc.listConnections(proxy + "." + MATERIALS_ATTRIBUTE, source = True, destination = False) or []))
+			aShapes = [shape for shape in mc.listRelatives(proxy, shapes = True, fullPath = True) or [] if mc.nodeType(shape) in ("gpuCache", "mayaUsdProxyShape")]
+			if (aShapes):
+				mc.delete(aShapes)
+			for attribute in (SOURCE_ATTRIBUTE, TRANSLATOR_ATTRIBUTE, OPTIONS_ATTRIBUTE, MATERIALS_ATTRIBUTE, MATERIAL_NAMES_ATTRIBUTE):
+				if (mc.objExists(proxy + "." + attribute)):
+					mc.deleteAttr(proxy + "." + attribute)
+			DeleteEmptySets(aSets)
+			aExpanded.append(proxy)
+	finally:
+		mc.undoInfo(closeChunk = True)
+	return aExpanded
+
+def DeleteEmptySets(aSets):
+	# deletes the shading groups of aSets nothing is assigned to, and the nodes of their networks no other shading group uses
+	aEmpty = [sg for sg in mc.ls(aSets) or [] if not mc.sets(sg, q = True)]
+	if (not aEmpty):
+		return
+	aHistory = set(mc.listHistory(aEmpty, pruneDagObjects = True) or [])
+	aOthers = [sg for sg in mc.ls(type = "shadingEngine") or [] if sg not in aEmpty]
+	aUsed = set(mc.listHistory(aOthers, pruneDagObjects = True) or []) if aOthers else set()
+	# the networks connect to scene nodes like defaultColorMgtGlobals, which stay
+	aUsed.update(mc.ls(defaultNodes = True) or [])
+	mc.delete([node for node in aHistory if node not in aUsed])
+
+
+################################################################
+# speedTreeExpand
+
+EXPAND_COMMAND = "speedTreeExpand"
+
+class SpeedTreeExpandCommand(OpenMayaMPx.MPxCommand):
+	def __init__(self):
+		OpenMayaMPx.MPxCommand.__init__(self)
+
+	def isUndoable(self):
+		# the commands it runs are, in one chunk
+		return False
+
+	def doIt(self, argList):
+		argData = OpenMaya.MArgDatabase(self.syntax(), argList)
+		aObjects = OpenMaya.MStringArray()
+		argData.getObjects(aObjects)
+		aProxies = [aObjects[index] for index in range(aObjects.length())] or None
+		aResult = OpenMaya.MStringArray()
+		for proxy in ExpandMeshProxies(aProxies):
+			aResult.append(proxy)
+		self.setResult(aResult)
+
+	@staticmethod
+	def creator():
+		return OpenMayaMPx.asMPxPtr(SpeedTreeExpandCommand())
+
+	@staticmethod
+	def syntaxCreator():
+		syntax = OpenMaya.MSyntax()
+		syntax.setObjectType(OpenMaya.MSyntax.kStringObjects)
+		syntax.setMinObjects(0)
+		return syntax
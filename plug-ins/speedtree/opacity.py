@@ -0,0 +1,232 @@
+################################################################
+# Imports
+
+import ctypes
+import hashlib
+import json
+import os
+import os.path as path
+import tempfile
+
+import maya.OpenMaya as OpenMaya
+import maya.api.OpenMaya as om2
+
+from speedtree.parsecache import DefaultCacheDirectory
+from speedtree.stmat import SpeedTreeMaterial
+
+# NumPy does the pixel and vertex checks, without it every material keeps its opacity
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# Pillow reads most images faster than MImage, MImage is the fallback
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+
+################################################################
+# OpacityAnalyzer
+#
+# Finds materials whose opacity is 1.0 everywhere, so they are built without
+# the opacity hookup and their shapes keep aiOpaque on. That is an opacity
+# map whose pixels are all white (or a constant of 1.0), or vertex opacity
+# whose blend_ao channel is 1.0 on every vertex of every shape of the
+# material: U of the blend_ao UV set, or red of the blend_ao color set when
+# the blend is not in a texcoord (Alembic). An opaque opacity map also hides
+# the vertex opacity, like it does when the map is hooked up.
+#
+# Whether an image is opaque is cached by the SHA-1 of its content in
+# opacity.json in the parse cache folder; in a session the hash of a file is
+# kept while its size and mtime stay the same. Images that cannot be read
+# count as not opaque and are not cached.
+
+BLEND_SET = "blend_ao"
+OPACITY_MAP = "Opacity"
+
+# values this close to 1.0 count as 1.0, half a step of an 8 bit channel
+OPAQUE_EPSILON = 1.0 / 512.0
+
+CACHE_FILE = "opacity.json"
+HASH_CHUNK = 1024 * 1024
+
+class OpacityAnalyzer:
+	def __init__(self, directory = None):
+		self.directory = directory or DefaultCacheDirectory()
+		self.results = None	# file hash -> image is opaque, read from the cache file on first use
+		self.hashes = { }	# (filename, size, mtime) -> file hash
+		self.changed = False
+
+	def Available(self):
+		return numpy != None
+
+	def Analyze(self, stMaterial, aMeshes, directory = "", blendInTexcoord = 1, resolver = None):
+		# the material to build: stMaterial itself, or a copy without the opacity that has no effect.
+		# With a resolver the image is the one the file node gets, a missing one is not opaque.
+		if (numpy == None):
+			return stMaterial
+		opacity = stMaterial.maps.get(OPACITY_MAP)
+		if (opacity != None):
+			if (opacity.file):
+				if (resolver != None):
+					filename = resolver.Resolve(opacity.file)[0]
+				else:
+					filename = opacity.file if path.isabs(opacity.file) else path.join(directory, opacity.file)
+				if (filename == None or not self.IsOpaqueImage(filename)):
+					return stMaterial
+			elif (min(opacity.red, opacity.green, opacity.blue) < 1.0 - OPAQUE_EPSILON):
+				return stMaterial
+		elif (not stMaterial.vertexOpacity or not self.IsOpaqueVertexData(aMeshes, blendInTexcoord)):
+			return stMaterial
+
+		opaque = SpeedTreeMaterial(stMaterial.name, stMaterial.twoSided, False, stMaterial.userData)
+		opaque.maps = dict((name, stmap) for name, stmap in stMaterial.maps.items() if name != OPACITY_MAP)
+		return opaque
+
+	# --- images
+
+	def IsOpaqueImage(self, filename):
+		if ("<UDIM>" in filename):
+			return False
+		try:
+			stat = os.stat(filename)
+		except OSError:
+			return False
+		key = (path.normcase(path.abspath(filename)), stat.st_size, stat.st_mtime_ns)
+		fileHash = self.hashes.get(key)
+		if (fileHash == None):
+			fileHash = HashFile(filename)
+			self.hashes[key] = fileHash
+		aResults = self.Results()
+		if (fileHash not in aResults):
+			opaque = IsOpaquePixels(*ReadImage(filename))
+			if (opaque == None):
+				return False
+			aResults[fileHash] = opaque
+			self.changed = True
+		return aResults[fileHash]
+
+	def Results(self):
+		if (self.results == None):
+			self.results = { }
+			try:
+				with open(path.join(self.directory, CACHE_FILE)) as stream:
+					self.results = dict((key, bool(value)) for key, value in json.load(stream).items())
+			except (OSError, ValueError, AttributeError):
+				pass
+		return self.results
+
+	def Save(self):
+		if (not self.changed):
+			return
+		try:
+			if (not path.isdir(self.directory)):
+				os.makedirs(self.directory)
+			# other Maya sessions may save at the same time, replace the file in one go
+			handle, tempPath = tempfile.mkstemp(suffix = ".tmp", dir = self.directory)
+			with os.fdopen(handle, "w") as stream:
+				json.dump(self.results, stream)
+			os.replace(tempPath, path.join(self.directory, CACHE_FILE))
+			self.changed = False
+		except OSError:
+			print("SpeedTree ERROR: Could not write the opacity cache in [" + self.directory + "]")
+
+	# --- vertex data
+
+	def IsOpaqueVertexData(self, aMeshes, blendInTexcoord):
+		# every mesh of the material has the blend set and its opacity channel is all 1.0
+		if (not aMeshes):
+			return False
+		for mesh in aMeshes:
+			values = ReadBlendValues(mesh, blendInTexcoord)
+			if (values is None or values.size == 0 or values.min() < 1.0 - OPAQUE_EPSILON):
+				return False
+		return True
+
+
+def HashFile(filename):
+	sha1 = hashlib.sha1()
+	with open(filename, "rb") as stream:
+		for chunk in iter(lambda: stream.read(HASH_CHUNK), b""):
+			sha1.update(chunk)
+	return sha1.hexdigest()
+
+def ReadImage(filename):
+	# (pixels as a height x width (x channels) array, value of a fully opaque pixel), (None, None) when it can't be read
+	if (Image != None):
+		try:
+			with Image.open(filename) as image:
+				if (image.mode in ("L", "LA", "RGB", "RGBA")):
+					return numpy.asarray(image), 255
+				if (image.mode.startswith("I")):
+					return numpy.asarray(image), 65535
+				if (image.mode == "F"):
+					return numpy.asarray(image), 1.0
+				return numpy.asarray(image.convert("RGBA")), 255
+		except (OSError, ValueError):
+			pass
+	return ReadMayaImage(filename)
+
+def ReadMayaImage(filename):
+	# MImage reads whatever Maya can, its pixels are RGBA bytes or floats
+	try:
+		image = OpenMaya.MImage()
+		image.readFromFile(filename)
+		widthUtil = OpenMaya.MScriptUtil()
+		widthUtil.createFromInt(0)
+		heightUtil = OpenMaya.MScriptUtil()
+		heightUtil.createFromInt(0)
+		widthPtr = widthUtil.asUintPtr()
+		heightPtr = heightUtil.asUintPtr()
+		image.getSize(widthPtr, heightPtr)
+		width = OpenMaya.MScriptUtil.getUint(widthPtr)
+		height = OpenMaya.MScriptUtil.getUint(heightPtr)
+		count = width * height * 4
+		if (image.pixelType() == OpenMaya.MImage.kFloat):
+			buffer = (ctypes.c_float * count).from_address(int(image.floatPixels()))
+			opaqueValue = 1.0
+		else:
+			buffer = (ctypes.c_ubyte * count).from_address(int(image.pixels()))
+			opaqueValue = 255
+		# copied, the buffer belongs to the MImage
+		return numpy.array(buffer).reshape(height, width, 4), opaqueValue
+	except Exception:
+		return None, None
+
+def IsOpaquePixels(pixels, opaqueValue):
+	# the color channels (or the gray one) the opacity connection reads are all 1.0
+	if (pixels is None or pixels.size == 0):
+		return None
+	if (pixels.ndim == 3):
+		pixels = pixels[:, :, :3] if pixels.shape[2] >= 3 else pixels[:, :, :1]
+	return bool(pixels.min() >= opaqueValue * (1.0 - OPAQUE_EPSILON))
+
+def ReadBlendValues(mesh, blendInTexcoord):
+	# the opacity channel of the blend set of a mesh shape as one array, None when the mesh has no blend set.
+	# The API 2.0 arrays go to NumPy in one call, without a Python call per vertex.
+	dagPath = om2.MSelectionList().add(mesh).getDagPath(0)
+	if (not dagPath.hasFn(om2.MFn.kMesh)):
+		return None
+	fnMesh = om2.MFnMesh(dagPath)
+	if (blendInTexcoord):
+		if (BLEND_SET not in fnMesh.getUVSetNames()):
+			return None
+		return numpy.asarray(fnMesh.getUVs(BLEND_SET)[0], numpy.float32)
+	if (BLEND_SET not in fnMesh.getColorSetNames()):
+		return None
+	aColors = numpy.asarray(fnMesh.getColors(BLEND_SET), numpy.float32)
+	return aColors[:, 0] if aColors.size else aColors.reshape(0)
+
+
+################################################################
+# GetOpacityAnalyzer
+
+opacityAnalyzers = { }
+
+def GetOpacityAnalyzer(directory = None):
+	directory = directory or DefaultCacheDirectory()
+	if (directory not in opacityAnalyzers):
+		opacityAnalyzers[directory] = OpacityAnalyzer(directory)
+	return opacityAnalyzers[directory]
@@ -0,0 +1,161 @@
+################################################################
+# Imports
+
+from speedtree.lods import ParseLods
+
+
+################################################################
+# ImportOptions
+
+class ImportOptions(object):
+	# (name, default) pairs, the type of the default is the type of the option
+	defaults = [
+		# find the images from the folder of the .stmat, with their UDIM tiles, and report the missing ones before the import
+		("resolveTextures", True),
+		# also reuse file/place2dTexture nodes that were in the scene before the import
+		("sceneTextureCache", False),
+		# keep parsed .stmat files in the on-disk parse cache
+		("parseCache", True),
+		# parse cache folder, empty uses $SPEEDTREE_CACHE_DIR or the temp folder
+		("cacheDirectory", ""),
+		# build shading networks with maya.cmds calls ("commands") or with one MDGModifier ("modifier"),
+		# the modifier stays opt-in until benchmarks/graph_backends.py shows it is faster in mayapy
+		("graphBackend", "commands"),
+		# materials with the same maps and flags share one shader and shading group
+		("shareMaterials", True),
+		# reuse the shaders earlier imports into the scene built for the same material
+		("shaderLibrary", True),
+		# have the mesh importers make placeholder materials only, where they can (USD)
+		("placeholderMaterials", True),
+		# build materials whose opacity map or blend_ao vertex opacity is 1.0 everywhere as opaque, needs NumPy;
+		# off by default, it reads every opacity image in full the first time it sees it
+		("opacityAnalysis", False),
+		# convert the images to tiled, mipmapped textures for rendering and use those
+		("prepareTextures", False),
+		# maketx or oiiotool to convert them with, empty searches $PATH and $MTOA_PATH/bin
+		("textureTool", ""),
+		# folder for the converted textures, empty puts them in a tx folder next to each image
+		("textureDirectory", ""),
+		# show downscaled copies of the images in the viewport and the full images when rendering, interactive sessions only
+		("proxyTextures", False),
+		# size of the proxies relative to their images
+		("proxyScale", 0.25),
+		# work out the texture memory of the tree from the image headers, report it and store it on the tree
+		("textureMemory", False),
+		# megabytes one texture with its mipmaps may take before it is flagged, 0 for no budget
+		("textureBudget", 64.0),
+		# import a tree that is already in the scene again as "instance" copies of it or a "placement" transform above them, empty imports it every time
+		("instancing", ""),
+		# load .abc meshes as a gpuCache and .usd meshes as a mayaUsdProxyShape instead of Maya meshes, speedTreeExpand imports them in full;
+		# only a gpuCache of one material gets it assigned, the other proxies render without the materials of the .stmat
+		("meshProxy", False),
+		# LOD levels to keep, like "0" or "0,2", empty keeps all of them
+		("lods", ""),
+		# put the LOD levels below a lodGroup that shows one of them by camera distance
+		("lodGroup", False),
+		# camera distance between two LOD levels of the lodGroup
+		("lodDistance", 20.0),
+		# materials not to build, with the geometry that uses them, as name patterns like "*Frond*, *Billboard*"
+		("skipMaterials", ""),
+		# maps not to wire, as name patterns like "Subsurface*, Gloss"
+		("skipMaps", ""),
+		# blend materials with the blend_ao vertex opacity of the mesh, off builds them without it
+		("vertexOpacity", True),
+		# report phase timings and node counts of every import as JSON through MGlobal
+		("stats", True),
+		# also append the JSON reports to this file, empty uses $SPEEDTREE_STATS_LOG
+		("statsLog", ""),
+		# profile the import with "cprofile", "tracemalloc" or "all", empty uses $SPEEDTREE_PROFILE
+		("profile", ""),
+	]
+
+	# options that take one of these values only (graphBackend: the keys of graph.GRAPH_BACKENDS)
+	choices = {
+		"graphBackend" : ("modifier", "commands"),
+	}
+
+	# options whose text has to parse, the parser raises ValueError (lods: "0, 2" -> the levels)
+	parsers = {
+		"lods" : ParseLods,
+	}
+
+	def __init__(self, **kwargs):
+		for name, default in self.defaults:
+			setattr(self, name, kwargs.pop(name, default))
+		if (kwargs):
+			raise TypeError("Unknown SpeedTree import options: " + ", ".join(sorted(kwargs)))
+
+	@classmethod
+	def FromString(cls, optionString, base = None):
+		# "name=value;name=value" as Maya hands it to reader(), the options not in it keep their value in base
+		aDefaults = dict(cls.defaults)
+		values = dict((name, getattr(base, name)) for name in aDefaults) if (base != None) else { }
+		for part in optionString.split(";"):
+			name, equals, text = part.partition("=")
+			name = name.strip()
+			if (not equals or not name):
+				continue
+			if (name not in aDefaults):
+				print("SpeedTree WARNING: Unknown import option [" + name + "]")
+				continue
+			try:
+				value = ParseValue(text.strip(), type(aDefaults[name]))
+				cls.CheckValue(name, value)
+				values[name] = value
+			except ValueError:
+				print("SpeedTree WARNING: Bad value for import option [" + name + "]: " + text)
+		return cls(**values)
+
+	@classmethod
+	def FromKeywords(cls, **kwargs):
+		# the options of a script, checked like FromString checks them: a value of another type or one the option does not take raises ValueError
+		aDefaults = dict(cls.defaults)
+		for name, value in kwargs.items():
+			if (name not in aDefaults):
+				continue
+			default = aDefaults[name]
+			if (isinstance(default, float) and isinstance(value, int) and not isinstance(value, bool)):
+				value = kwargs[name] = float(value)
+			try:
+				if (type(value) != type(default)):
+					raise ValueError(value)
+				cls.CheckValue(name, value)
+			except ValueError:
+				raise ValueError("Bad value for SpeedTree import option " + name + ": " + repr(value))
+		return cls(**kwargs)
+
+	@classmethod
+	def CheckValue(cls, name, value):
+		# raises ValueError for a value the option does not take
+		if (name in cls.choices and value not in cls.choices[name]):
+			raise ValueError(value)
+		if (name in cls.parsers):
+			cls.parsers[name](value)
+
+	def ToString(self):
+		return ";".join(name + "=" + FormatValue(getattr(self, name)) for name, default in self.defaults)
+
+
+################################################################
+# Option strings
+#
+# Values are written the way the file dialog's options script keeps them:
+# 1/0 for booleans, Python's str() for numbers and strings as they are, so
+# patterns and paths must not hold ";".
+
+TRUE_VALUES = ("1", "true", "on", "yes")
+FALSE_VALUES = ("0", "false", "off", "no", "")
+
+def ParseValue(text, valueType):
+	if (valueType == bool):
+		if (text.lower() in TRUE_VALUES):
+			return True
+		if (text.lower() in FALSE_VALUES):
+			return False
+		raise ValueError(text)
+	return valueType(text)
+
+def FormatValue(value):
+	if (isinstance(value, bool)):
+		return "1" if value else "0"
+	return str(value)
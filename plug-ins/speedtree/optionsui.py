@@ -0,0 +1,104 @@
+################################################################
+# Imports
+
+import re
+
+import maya.cmds as mc
+
+from speedtree.options import ImportOptions
+
+
+################################################################
+# Options script
+#
+# The import options of the file dialog. Maya calls the MEL procedure the
+# translators are registered with, which hands over to OptionsScript(): on
+# "post" it lays out one control per import option below parent, set from
+# the option string Maya kept, on "query" it returns the option string of
+# the controls, which Maya passes to reader() on import and keeps for the
+# next time. The options are grouped below; the ones that are in no group
+# are shown under Advanced.
+
+OPTIONS_SCRIPT = "speedTreeImportOptions"
+
+MEL_OPTIONS_SCRIPT = r'''
+global proc int speedTreeImportOptions(string $parent, string $action, string $initialSettings, string $resultCallback)
+{
+	string $result = python("import speedtree.optionsui; speedtree.optionsui.OptionsScript(\"" + encodeString($parent) + "\", \"" + $action + "\", \"" + encodeString($initialSettings) + "\")");
+	if ($action == "query")
+		eval($resultCallback + " \"" + encodeString($result) + "\"");
+	return 1;
+}
+'''
+
+OPTION_GROUPS = [
+	("Filters", ("skipMaterials", "skipMaps", "vertexOpacity", "lods", "lodGroup", "lodDistance")),
+	("Geometry", ("meshProxy", "instancing", "placeholderMaterials")),
+	("Materials", ("shareMaterials", "shaderLibrary", "opacityAnalysis", "graphBackend")),
+	("Textures", ("resolveTextures", "sceneTextureCache", "prepareTextures", "textureTool", "textureDirectory",
+				"proxyTextures", "proxyScale", "textureMemory", "textureBudget")),
+]
+
+# options layout -> option name -> full path of its control, as PostOptions made them
+layouts = { }
+
+# tooltips of the options that need more than their label
+OPTION_NOTES = {
+	"meshProxy" : "Load .abc meshes as a gpuCache and .usd meshes as a USD stage. Only a gpuCache of one material gets it assigned, "
+				"other proxies render without the materials of the .stmat until speedTreeExpand turns them into meshes.",
+}
+
+def OptionLabel(name):
+	# "skipMaterials" -> "Skip materials"
+	return re.sub(r"([A-Z])", lambda match: " " + match.group(1).lower(), name).capitalize()
+
+def OptionGroups():
+	aGrouped = set(name for group, aNames in OPTION_GROUPS for name in aNames)
+	return OPTION_GROUPS + [("Advanced", tuple(name for name, default in ImportOptions.defaults if name not in aGrouped))]
+
+def OptionsScript(parent, action, initialSettings):
+	if (action == "post"):
+		PostOptions(parent, ImportOptions.FromString(initialSettings))
+	elif (action == "query"):
+		return QueryOptions(parent).ToString()
+	return ""
+
+def PostOptions(parent, options):
+	mc.setParent(parent)
+	mc.columnLayout(adjustableColumn = True)
+	aControls = { }
+	for group, aNames in OptionGroups():
+		mc.frameLayout(label = group, collapsable = True, collapse = (group == "Advanced"))
+		mc.columnLayout(adjustableColumn = True)
+		for name in aNames:
+			value = getattr(options, name)
+			note = OPTION_NOTES.get(name, "")
+			if (isinstance(value, bool)):
+				aControls[name] = mc.checkBoxGrp(label = OptionLabel(name), annotation = note, numberOfCheckBoxes = 1, value1 = value)
+			elif (isinstance(value, int)):
+				aControls[name] = mc.intFieldGrp(label = OptionLabel(name), annotation = note, numberOfFields = 1, value1 = value)
+			elif (isinstance(value, float)):
+				aControls[name] = mc.floatFieldGrp(label = OptionLabel(name), annotation = note, numberOfFields = 1, value1 = value)
+			else:
+				aControls[name] = mc.textFieldGrp(label = OptionLabel(name), annotation = note, text = value)
+		mc.setParent("..")
+		mc.setParent("..")
+	mc.setParent("..")
+	layouts[parent] = aControls
+
+def QueryOptions(parent):
+	values = { }
+	aControls = layouts.get(parent, { })
+	for name, default in ImportOptions.defaults:
+		control = aControls.get(name)
+		if (control == None or not mc.control(control, exists = True)):
+			continue
+		if (isinstance(default, bool)):
+			values[name] = bool(mc.checkBoxGrp(control, query = True, value1 = True))
+		elif (isinstance(default, int)):
+			values[name] = mc.intFieldGrp(control, query = True, value1 = True)
+		elif (isinstance(default, float)):
+			values[name] = mc.floatFieldGrp(control, query = True, value1 = True)
+		else:
+			values[name] = mc.textFieldGrp(control, query = True, text = True)
+	return ImportOptions(**values)
@@ -0,0 +1,188 @@
+################################################################
+# Imports
+
+import hashlib
+import io
+import marshal
+import os
+import os.path as path
+import tempfile
+import zlib
+
+from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial, SpeedTreeMaterialFile, ParseMaterialStream
+
+
+################################################################
+# ParseCache
+#
+# Keeps parsed .stmat files on disk so re-importing the same asset skips the
+# XML parse. An entry is keyed by the absolute path of the .stmat and is valid
+# while its size and mtime match; when only the mtime moved (copy, touch) the
+# content hash decides. Entries are marshalled tuples compressed with zlib and
+# the least recently used ones are evicted once the directory grows past
+# maxBytes.
+
+CACHE_MAGIC = b"STPC"
+CACHE_VERSION = 1
+CACHE_EXTENSION = ".stpc"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def DefaultCacheDirectory():
+	directory = os.environ.get("SPEEDTREE_CACHE_DIR")
+	if (not directory):
+		directory = path.join(tempfile.gettempdir(), "speedtree_cache")
+	return directory
+
+def PackMaterialFile(stFile):
+	materials = []
+	for stMaterial in stFile.materials.values():
+		maps = tuple((name, stmap.red, stmap.green, stmap.blue, stmap.file) for name, stmap in stMaterial.maps.items())
+		materials.append((stMaterial.name, stMaterial.twoSided, stMaterial.vertexOpacity, stMaterial.userData, maps))
+	return (stFile.mesh, tuple(materials))
+
+def UnpackMaterialFile(packed):
+	mesh, materials = packed
+	stFile = SpeedTreeMaterialFile(mesh)
+	for name, twoSided, vertexOpacity, userData, maps in materials:
+		stMaterial = SpeedTreeMaterial(name, twoSided, vertexOpacity, userData)
+		for mapName, red, green, blue, file in maps:
+			stMaterial.maps[mapName] = SpeedTreeMap(red, green, blue, file)
+		stFile.materials[name] = stMaterial
+	return stFile
+
+class ParseCache:
+	def __init__(self, directory = None, maxBytes = DEFAULT_MAX_BYTES):
+		self.directory = directory or DefaultCacheDirectory()
+		self.maxBytes = maxBytes
+		self.ResetCounters()
+
+	def ResetCounters(self):
+		self.hits = 0
+		self.misses = 0
+		self.stores = 0
+		self.evictions = 0
+		self.errors = 0
+
+	def Counters(self):
+		return { "hits" : self.hits,
+				"misses" : self.misses,
+				"stores" : self.stores,
+				"evictions" : self.evictions,
+				"errors" : self.errors }
+
+	def EntryPath(self, filename):
+		key = hashlib.sha1(path.normcase(filename).encode("utf-8")).hexdigest()
+		return path.join(self.directory, key + CACHE_EXTENSION)
+
+	def Load(self, filename):
+		filename = path.abspath(filename)
+		stat = os.stat(filename)
+		entryPath = self.EntryPath(filename)
+		entry = self.ReadEntry(entryPath)
+		data = None
+		if (entry != None):
+			entryFilename, size, mtime, contentHash, packed = entry
+			if (entryFilename == filename and size == stat.st_size):
+				if (mtime == stat.st_mtime_ns):
+					self.Touch(entryPath)
+					self.hits += 1
+					return UnpackMaterialFile(packed)
+
+				# the file was touched or copied, only trust the entry if the content is the same
+				with open(filename, "rb") as stream:
+					data = stream.read()
+				if (hashlib.sha1(data).hexdigest() == contentHash):
+					self.WriteEntry(entryPath, (filename, size, stat.st_mtime_ns, contentHash, packed))
+					self.hits += 1
+					return UnpackMaterialFile(packed)
+
+		self.misses += 1
+		if (data == None):
+			with open(filename, "rb") as stream:
+				data = stream.read()
+		stFile = ParseMaterialStream(io.BytesIO(data))
+		if (stFile != None):
+			self.WriteEntry(entryPath, (filename, len(data), stat.st_mtime_ns, hashlib.sha1(data).hexdigest(), PackMaterialFile(stFile)))
+			self.stores += 1
+			self.Evict()
+		return stFile
+
+	def ReadEntry(self, entryPath):
+		if (not path.isfile(entryPath)):
+			return None
+		try:
+			with open(entryPath, "rb") as stream:
+				header = stream.read(len(CACHE_MAGIC) + 1)
+				if (header[:len(CACHE_MAGIC)] != CACHE_MAGIC or header[len(CACHE_MAGIC):] != bytes([CACHE_VERSION])):
+					return None
+				return marshal.loads(zlib.decompress(stream.read()))
+		except (OSError, ValueError, EOFError, TypeError, zlib.error):
+			self.errors += 1
+			self.Remove(entryPath)
+			return None
+
+	def WriteEntry(self, entryPath, entry):
+		try:
+			if (not path.isdir(self.directory)):
+				os.makedirs(self.directory)
+			# write to a temporary file first so other processes never see half an entry
+			handle, tempPath = tempfile.mkstemp(suffix = ".tmp", dir = self.directory)
+			with os.fdopen(handle, "wb") as stream:
+				stream.write(CACHE_MAGIC + bytes([CACHE_VERSION]))
+				stream.write(zlib.compress(marshal.dumps(entry, 2)))
+			os.replace(tempPath, entryPath)
+		except OSError:
+			self.errors += 1
+
+	def Touch(self, entryPath):
+		try:
+			os.utime(entryPath, None)
+		except OSError:
+			pass
+
+	def Remove(self, entryPath):
+		try:
+			os.remove(entryPath)
+			return True
+		except OSError:
+			return False
+
+	def Entries(self):
+		# (last use, size, path) of every entry, least recently used first
+		aEntries = []
+		if (path.isdir(self.directory)):
+			for entry in os.scandir(self.directory):
+				if (entry.name.endswith(CACHE_EXTENSION) and entry.is_file()):
+					stat = entry.stat()
+					aEntries.append((stat.st_mtime, stat.st_size, entry.path))
+		aEntries.sort()
+		return aEntries
+
+	def TotalBytes(self):
+		return sum(size for lastUse, size, entryPath in self.Entries())
+
+	def Evict(self):
+		aEntries = self.Entries()
+		totalBytes = sum(size for lastUse, size, entryPath in aEntries)
+		for lastUse, size, entryPath in aEntries:
+			if (totalBytes <= self.maxBytes):
+				break
+			if (self.Remove(entryPath)):
+				totalBytes -= size
+				self.evictions += 1
+
+	def Clear(self):
+		for lastUse, size, entryPath in self.Entries():
+			self.Remove(entryPath)
+
+
+################################################################
+# GetParseCache
+
+parseCaches = { }
+
+def GetParseCache(directory = None):
+	directory = directory or DefaultCacheDirectory()
+	if (directory not in parseCaches):
+		parseCaches[directory] = ParseCache(directory)
+	return parseCaches[directory]
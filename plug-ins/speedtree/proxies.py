@@ -0,0 +1,257 @@
+################################################################
+# Imports
+
+import concurrent.futures
+import hashlib
+import os
+import os.path as path
+import subprocess
+
+import maya.cmds as mc
+import maya.OpenMaya as OpenMaya
+import maya.utils
+
+from speedtree.parsecache import DefaultCacheDirectory
+from speedtree.textureprep import ContentHash, FindTool
+
+# Pillow scales the images it can read, oiiotool the rest (EXR, TX, ...)
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+
+################################################################
+# ProxyTextures
+#
+# Viewport 2.0 loads every image of every file node at full size, which gets
+# slow and eats GPU memory once a layout holds hundreds of trees with large
+# atlases. With the proxyTextures option every image an import uses gets a
+# downscaled copy, made in worker threads while the import goes on (and after
+# it), so the viewport shows the copies and renders get the full images.
+#
+# The file nodes keep the path to render with in speedTreeFullTexture and
+# the proxy in speedTreeProxyTexture; fileTextureName holds the one in use.
+# A node is switched to its proxy once the proxy exists, and back to the full
+# texture around everything that must see it: before the scene is saved or
+# exported (saved scenes always hold the full paths, so batch and farm
+# renders never see a proxy) and before a Maya Software render, through
+# scene message callbacks. Renderers that start on their own (Arnold IPR,
+# ...) get the full textures with UseFullTextures() and the viewport gets
+# the proxies back with UseProxyTextures(). A node whose fileTextureName was
+# changed to anything else is left alone.
+#
+# Proxies are named after the content hash of their image and the scale and
+# kept in the proxies folder of the parse cache, so each image is scaled once
+# for all scenes and sessions. The scene callbacks are added by the first
+# import that makes proxies (or UseProxyTextures()), and removed when the
+# plug-in is unloaded; until then a scene opened in the session shows its
+# full textures. They only run in interactive sessions, batch imports make no
+# proxies.
+
+FULL_ATTRIBUTE = "speedTreeFullTexture"
+PROXY_ATTRIBUTE = "speedTreeProxyTexture"
+PROXY_FOLDER = "proxies"
+
+# bump when the scaling changes, so older proxies are made again
+PROXY_VERSION = 1
+
+# images are not scaled below this size, smaller ones keep their full texture
+MIN_PROXY_SIZE = 64
+
+# seconds a single oiiotool run may take
+PROXY_TIMEOUT = 300
+
+class ProxyTextures:
+	def __init__(self, directory = None):
+		self.directory = path.join(directory or DefaultCacheDirectory(), PROXY_FOLDER)
+		self.pool = None
+		self.tool = None
+		self.proxies = { }	# (image, scale) -> proxy path, None when the image gets no proxy
+		self.pending = { }	# proxy path -> future of the worker making it
+		self.applyPending = False
+		self.modified = True	# the scene had unsaved changes before it was saved or exported
+		self.callbackIds = []
+
+	def Start(self):
+		if (not self.callbackIds and not mc.about(batch = True)):
+			for message, function in ((OpenMaya.MSceneMessage.kBeforeSave, self.OnBeforeOutput), (OpenMaya.MSceneMessage.kAfterSave, self.OnAfterSave),
+									(OpenMaya.MSceneMessage.kBeforeExport, self.OnBeforeOutput), (OpenMaya.MSceneMessage.kAfterExport, self.OnAfterOutput),
+									(OpenMaya.MSceneMessage.kBeforeSoftwareRender, self.OnBeforeOutput), (OpenMaya.MSceneMessage.kAfterSoftwareRender, self.OnAfterOutput),
+									(OpenMaya.MSceneMessage.kAfterOpen, self.OnAfterSave)):
+				self.callbackIds.append(OpenMaya.MSceneMessage.addCallback(message, function))
+
+	def Stop(self):
+		for callbackId in self.callbackIds:
+			OpenMaya.MMessage.removeCallback(callbackId)
+		self.callbackIds = []
+		if (self.pool != None):
+			self.pool.shutdown(wait = False)
+			self.pool = None
+
+	def Available(self):
+		return Image != None or self.Tool() != None
+
+	def Tool(self):
+		if (self.tool == None):
+			self.tool = FindTool("oiiotool") or ""
+		return self.tool or None
+
+	# --- making proxies
+
+	def Submit(self, filename, scale):
+		# path of the proxy of an image, which a worker makes when it is not there yet, None when it gets none (UDIM tiles)
+		if ("<UDIM>" in filename):
+			return None
+		key = (path.normcase(path.abspath(filename)), scale)
+		if (key not in self.proxies):
+			self.proxies[key] = None
+			try:
+				name, extension = path.splitext(path.basename(filename))
+				settings = (ContentHash(filename), scale, PROXY_VERSION)
+				proxy = path.join(self.directory, name + "_" + hashlib.sha1(repr(settings).encode("utf-8")).hexdigest()[:16] + extension)
+				if (not path.isfile(proxy)):
+					if (not path.isdir(self.directory)):
+						os.makedirs(self.directory)
+					if (self.pool == None):
+						self.pool = concurrent.futures.ThreadPoolExecutor(os.cpu_count() or 1)
+					future = self.pool.submit(MakeProxy, filename, proxy, scale, self.Tool())
+					future.add_done_callback(self.OnProxyDone)
+					self.pending[proxy] = future
+				self.proxies[key] = proxy
+			except OSError as e:
+				print("SpeedTree ERROR: Could not make a proxy texture for [" + filename + "]: " + str(e))
+		return self.proxies[key]
+
+	def OnProxyDone(self, future):
+		# runs in the worker thread, the scene is only touched from the main thread
+		if (not self.applyPending):
+			self.applyPending = True
+			maya.utils.executeDeferred(self.ApplyDeferred)
+
+	def ApplyDeferred(self):
+		self.applyPending = False
+		for proxy, future in list(self.pending.items()):
+			if (future.done()):
+				del self.pending[proxy]
+				if (future.exception() != None):
+					print("SpeedTree ERROR: Could not make proxy texture [" + proxy + "]: " + str(future.exception()))
+		self.UseProxyTextures()
+
+	def Pending(self):
+		return len(self.pending)
+
+	# --- file nodes
+
+	def Tag(self, texFile, proxy):
+		# after the commit, the texture the node has now is the one to render with
+		if (not mc.objExists(texFile + "." + PROXY_ATTRIBUTE)):
+			mc.addAttr(texFile, longName = FULL_ATTRIBUTE, dataType = "string")
+			mc.addAttr(texFile, longName = PROXY_ATTRIBUTE, dataType = "string")
+		mc.setAttr(texFile + "." + FULL_ATTRIBUTE, mc.getAttr(texFile + ".fileTextureName"), type = "string")
+		mc.setAttr(texFile + "." + PROXY_ATTRIBUTE, proxy, type = "string")
+
+	def UseProxyTextures(self):
+		# the viewport shows the proxies that exist, returns the number of file nodes switched
+		return self.Switch(FULL_ATTRIBUTE, PROXY_ATTRIBUTE, True)
+
+	def UseFullTextures(self):
+		return self.Switch(PROXY_ATTRIBUTE, FULL_ATTRIBUTE, False)
+
+	def Switch(self, fromAttribute, toAttribute, checkFile):
+		# plugs are set through the API, so switching never lands in the undo queue
+		switched = 0
+		for texFile in mc.ls("*." + PROXY_ATTRIBUTE, objectsOnly = True, recursive = True) or []:
+			selection = OpenMaya.MSelectionList()
+			selection.add(texFile)
+			node = OpenMaya.MObject()
+			selection.getDependNode(0, node)
+			fnNode = OpenMaya.MFnDependencyNode(node)
+			if (not fnNode.hasAttribute(FULL_ATTRIBUTE)):
+				continue
+			current = fnNode.findPlug("fileTextureName").asString()
+			target = fnNode.findPlug(toAttribute).asString()
+			if (target and current == fnNode.findPlug(fromAttribute).asString() and current != target and (not checkFile or path.isfile(target))):
+				fnNode.findPlug("fileTextureName").setString(target)
+				switched += 1
+		return switched
+
+	# --- callbacks
+
+	def OnBeforeOutput(self, clientData):
+		self.modified = mc.file(query = True, modified = True)
+		self.UseFullTextures()
+
+	def OnAfterOutput(self, clientData):
+		self.Restore(self.modified)
+
+	def OnAfterSave(self, clientData):
+		# also after opening, the scene matches its file
+		self.Restore(False)
+
+	def Restore(self, modified):
+		# switching back to the proxies does not leave unsaved changes that were not there
+		if (self.UseProxyTextures() and not modified):
+			mc.file(modified = False)
+
+
+def MakeProxy(source, proxy, scale, tool = None):
+	# writes the proxy of source, scaled by scale, returns its path or None when the image is too small to scale
+	stem, extension = path.splitext(proxy)
+	partial = stem + ".partial" + str(os.getpid()) + extension
+	try:
+		if (Image != None):
+			try:
+				with Image.open(source) as image:
+					size = (int(image.width * scale), int(image.height * scale))
+					if (min(size) < MIN_PROXY_SIZE):
+						return None
+					imageFormat = image.format
+					if (image.mode == "P"):
+						image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+					image.resize(size, Image.LANCZOS).save(partial, format = imageFormat)
+				os.replace(partial, proxy)
+				return proxy
+			except (OSError, ValueError, KeyError):
+				if (tool == None):
+					raise
+		if (tool == None):
+			return None
+		result = subprocess.run([tool, source, "--resize", str(scale * 100.0) + "%", "-o", partial], stdout = subprocess.PIPE, stderr = subprocess.STDOUT,
+								timeout = PROXY_TIMEOUT, creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0))
+		if (result.returncode != 0 or not path.isfile(partial)):
+			raise RuntimeError(result.stdout.decode("utf-8", "replace").strip() or ("exit code " + str(result.returncode)))
+		os.replace(partial, proxy)
+		return proxy
+	finally:
+		if (path.isfile(partial)):
+			os.remove(partial)
+
+
+################################################################
+# GetProxyTextures
+
+proxyTextures = None
+
+def GetProxyTextures(directory = None):
+	global proxyTextures
+	directory = path.join(directory or DefaultCacheDirectory(), PROXY_FOLDER)
+	if (proxyTextures == None or proxyTextures.directory != directory):
+		ReleaseProxyTextures()
+		proxyTextures = ProxyTextures(path.dirname(directory))
+		proxyTextures.Start()
+	return proxyTextures
+
+def ReleaseProxyTextures():
+	global proxyTextures
+	if (proxyTextures != None):
+		proxyTextures.Stop()
+		proxyTextures = None
+
+def UseFullTextures():
+	# for renderers that start without a software render message, before the render
+	return (proxyTextures or ProxyTextures()).UseFullTextures()
+
+def UseProxyTextures():
+	# the scene holds proxies from here on, the callbacks have to put the full textures back before it is saved
+	return (proxyTextures or GetProxyTextures()).UseProxyTextures()
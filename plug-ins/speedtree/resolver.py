@@ -0,0 +1,125 @@
+################################################################
+# Imports
+
+import os
+import os.path as path
+import re
+
+
+################################################################
+# TextureResolver
+#
+# Finds the images of a .stmat before any node is made, so missing textures
+# are reported once, at import time, instead of one by one at render time.
+# Relative paths are found from the folder of the .stmat. Every folder is
+# listed once with os.scandir and the listing is kept for the session while
+# the folder's mtime stays the same, so a tree with hundreds of maps costs
+# one listing per folder instead of a stat per map. A name that only matches
+# with another case resolves to the file as it is on disk, which keeps case
+# sensitive render farms working.
+#
+# For UDIM sets (<UDIM> in the name) the listing gives the tiles that exist;
+# the file node starts at the first one instead of assuming 1001, and a set
+# without tiles counts as missing. Resolved paths use forward slashes like
+# Maya does.
+
+UDIM_TAG = "<UDIM>"
+
+# the last tile number (1001-1999) in a file name, to turn a tile of a UDIM set back into its pattern
+UDIM_TILE = re.compile(r"(?<!\d)1\d{3}(?!\d)(?=[^/\\]*$)")
+
+directoryListings = { }	# folder -> DirectoryListing, for the session
+
+class DirectoryListing:
+	def __init__(self, folder, mtime):
+		self.mtime = mtime
+		self.names = set()
+		self.lowerNames = { }	# lower case name -> name on disk
+		with os.scandir(folder) as entries:
+			for entry in entries:
+				if (entry.is_file()):
+					self.names.add(entry.name)
+					self.lowerNames.setdefault(entry.name.lower(), entry.name)
+
+	def Find(self, name):
+		# the name as it is on disk, None when there is no such file
+		if (name in self.names):
+			return name
+		return self.lowerNames.get(name.lower())
+
+	def Tiles(self, prefix, suffix):
+		# tile number -> name on disk of the files prefix + 4 digits + suffix
+		aTiles = { }
+		prefix = prefix.lower()
+		suffix = suffix.lower()
+		length = len(prefix) + 4 + len(suffix)
+		for lowerName, name in self.lowerNames.items():
+			if (len(lowerName) == length and lowerName.startswith(prefix) and lowerName.endswith(suffix)):
+				tile = lowerName[len(prefix):len(prefix) + 4]
+				if (tile.isdigit()):
+					aTiles[int(tile)] = name
+		return aTiles
+
+def ListDirectory(folder):
+	try:
+		mtime = os.stat(folder).st_mtime_ns
+		listing = directoryListings.get(folder)
+		if (listing == None or listing.mtime != mtime):
+			listing = DirectoryListing(folder, mtime)
+			directoryListings[folder] = listing
+		return listing
+	except OSError:
+		return None
+
+def UdimPattern(filename):
+	aMatches = list(UDIM_TILE.finditer(filename))
+	if (not aMatches):
+		return filename
+	# names can hold other 1xxx numbers (bark_1024_1001.png), the tile is the last one
+	return filename[:aMatches[-1].start()] + UDIM_TAG + filename[aMatches[-1].end():]
+
+class TextureResolver:
+	def __init__(self, directory = ""):
+		self.directory = directory	# relative images are found from here, the folder of the .stmat
+		self.listings = { }	# folder -> DirectoryListing or None, looked at once per import
+		self.resolved = { }	# filename as in the .stmat -> (path, UDIM tiles)
+		self.missing = []
+
+	def Listing(self, folder):
+		if (folder not in self.listings):
+			self.listings[folder] = ListDirectory(folder)
+		return self.listings[folder]
+
+	def Resolve(self, filename):
+		# (full path, sorted UDIM tiles or None), the path is None when the image is not there
+		if (filename not in self.resolved):
+			self.resolved[filename] = self.Find(filename)
+			if (self.resolved[filename][0] == None):
+				self.missing.append(filename)
+		return self.resolved[filename]
+
+	def Find(self, filename):
+		folder, name = path.split(path.normpath(filename if path.isabs(filename) else path.join(self.directory, filename)))
+		listing = self.Listing(folder)
+		if (listing == None):
+			return None, None
+		if (UDIM_TAG in name):
+			prefix, suffix = name.split(UDIM_TAG, 1)
+			aTiles = listing.Tiles(prefix, suffix)
+			if (not aTiles):
+				return None, None
+			first = aTiles[min(aTiles)]
+			name = first[:len(prefix)] + UDIM_TAG + first[len(prefix) + 4:]
+			return path.join(folder, name).replace(os.sep, "/"), sorted(aTiles)
+		name = listing.Find(name)
+		if (name == None):
+			return None, None
+		return path.join(folder, name).replace(os.sep, "/"), None
+
+	def Check(self, aMaterials):
+		# resolves the images of all the materials in one go, returns the ones that are missing
+		for stMaterial in aMaterials:
+			for stMap in stMaterial.maps.values():
+				if (stMap.file):
+					self.Resolve(stMap.file)
+		return self.missing
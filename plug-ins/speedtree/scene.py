@@ -0,0 +1,137 @@
+################################################################
+# Imports
+
+import maya.cmds as mc
+import maya.OpenMaya as OpenMaya
+
+
+################################################################
+# SceneDelta
+#
+# Collects the nodes created between Begin() and End() with a node added
+# callback, so finding what an import made costs O(new nodes) no matter how
+# big the scene already is. Nodes are held by MObjectHandle and named when
+# asked for, so renames and deletes after End() are picked up.
+
+class SceneDelta:
+	def __init__(self):
+		self.handles = []
+		self.callbackId = None
+
+	def Begin(self):
+		self.handles = []
+		self.callbackId = OpenMaya.MDGMessage.addNodeAddedCallback(self.OnNodeAdded, "dependNode")
+
+	def End(self):
+		if (self.callbackId != None):
+			OpenMaya.MMessage.removeCallback(self.callbackId)
+			self.callbackId = None
+
+	def OnNodeAdded(self, node, clientData):
+		self.handles.append(OpenMaya.MObjectHandle(node))
+
+	def Objects(self, fnType = None):
+		aObjects = []
+		for handle in self.handles:
+			if (handle.isValid()):
+				node = handle.object()
+				if (fnType == None or node.hasFn(fnType)):
+					aObjects.append(node)
+		return aObjects
+
+	def Nodes(self, fnType = None):
+		# unique names in creation order, DAG nodes by their shortest unique path like mc.ls
+		aNames = []
+		dagPath = OpenMaya.MDagPath()
+		for node in self.Objects(fnType):
+			if (node.hasFn(OpenMaya.MFn.kDagNode)):
+				OpenMaya.MDagPath.getAPathTo(node, dagPath)
+				aNames.append(dagPath.partialPathName())
+			else:
+				aNames.append(OpenMaya.MFnDependencyNode(node).name())
+		return aNames
+
+	def Materials(self):
+		aNodes = self.Nodes()
+		return mc.ls(aNodes, mat = True) if aNodes else []
+
+	def Sets(self):
+		aNodes = self.Nodes(OpenMaya.MFn.kSet)
+		return mc.ls(aNodes, sets = True) if aNodes else []
+
+	def Transforms(self):
+		return self.Nodes(OpenMaya.MFn.kTransform)
+
+
+################################################################
+# ListMeshTransforms
+#
+# Walks the hierarchies below the given transforms with MItDag and returns the
+# transforms that have a mesh shape directly below them, by their shortest
+# unique path. Only the roots of the given set are walked so every node is
+# visited once.
+
+def RootTransforms(aTransforms):
+	# the transforms whose parent is not in the set
+	aHashes = set(OpenMaya.MObjectHandle(transform).hashCode() for transform in aTransforms)
+	aRoots = []
+	dagPath = OpenMaya.MDagPath()
+	for transform in aTransforms:
+		OpenMaya.MDagPath.getAPathTo(transform, dagPath)
+		dagPath.pop()
+		if (OpenMaya.MObjectHandle(dagPath.node()).hashCode() not in aHashes):
+			aRoots.append(transform)
+	return aRoots
+
+def ListRootTransforms(aTransforms):
+	aNames = []
+	dagPath = OpenMaya.MDagPath()
+	for root in RootTransforms(aTransforms):
+		OpenMaya.MDagPath.getAPathTo(root, dagPath)
+		aNames.append(dagPath.partialPathName())
+	return aNames
+
+def ListMeshTransforms(aTransforms):
+	aMeshTransforms = []
+	visited = set()
+	dagPath = OpenMaya.MDagPath()
+	dagIt = OpenMaya.MItDag(OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kTransform)
+	for root in RootTransforms(aTransforms):
+		dagIt.reset(root, OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kTransform)
+		while (not dagIt.isDone()):
+			dagIt.getPath(dagPath)
+			name = dagPath.partialPathName()
+			if (name not in visited):
+				visited.add(name)
+				for index in range(dagPath.childCount()):
+					if (dagPath.child(index).hasFn(OpenMaya.MFn.kMesh)):
+						aMeshTransforms.append(name)
+						break
+			dagIt.next()
+	return aMeshTransforms
+
+
+################################################################
+# SuspendRefresh
+#
+# Keeps the viewports from redrawing while an import builds the scene, Maya
+# would otherwise redraw them for the nodes and connections as they come in.
+# Nested imports only turn refreshing back on when the outermost one is done.
+
+class SuspendRefresh:
+	depth = 0
+	suspended = False
+
+	def __enter__(self):
+		if (SuspendRefresh.depth == 0 and not mc.about(batch = True)):
+			mc.refresh(suspend = True)
+			SuspendRefresh.suspended = True
+		SuspendRefresh.depth += 1
+		return self
+
+	def __exit__(self, *args):
+		SuspendRefresh.depth -= 1
+		if (SuspendRefresh.depth == 0 and SuspendRefresh.suspended):
+			mc.refresh(suspend = False)
+			SuspendRefresh.suspended = False
+		return False
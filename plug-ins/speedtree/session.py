@@ -0,0 +1,156 @@
+################################################################
+# Imports
+
+import json
+import time
+
+import maya.cmds as mc
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+
+from speedtree.library import GetShaderLibrary, ShaderLibrary
+from speedtree.options import ImportOptions
+from speedtree.scene import SceneDelta, SuspendRefresh, ListRootTransforms
+from speedtree.textures import TextureCache
+
+
+################################################################
+# ImportSession
+#
+# Imports a list of .stmat files in one go with one translator, instead of
+# one reader() call per file each starting from scratch. The files share
+# one texture cache, so the scene is scanned once and an image gets one file
+# node for the whole forest, and one shader index, so a material built for
+# one file is reused by every other file that has the same one (the shader
+# library when that option is on, otherwise an index of the networks this
+# session built). All of it is one undo chunk with the viewports suspended.
+#
+# Import() returns one summary per file: status, seconds, the root
+# transforms and node count it created and the counters of its stats.
+
+UNDO_CHUNK = "speedTreeImport"
+
+class ImportSession:
+	def __init__(self, translator):
+		self.translator = translator	# its options apply to every file
+		self.textureCache = None
+		self.library = None
+
+	def Import(self, aFiles):
+		options = self.translator.options
+		self.textureCache = TextureCache(options.sceneTextureCache)
+		self.library = GetShaderLibrary() if options.shaderLibrary else ShaderLibrary(sceneScope = False)
+		aResults = []
+		mc.undoInfo(openChunk = True, chunkName = UNDO_CHUNK)
+		self.translator.session = self
+		try:
+			with SuspendRefresh():
+				for filename in aFiles:
+					aResults.append(self.ImportFile(filename))
+		finally:
+			self.translator.session = None
+			mc.undoInfo(closeChunk = True)
+		return aResults
+
+	def ImportFile(self, filename):
+		result = { "file" : filename, "status" : "failed" }
+		start = time.perf_counter()
+		fileObject = OpenMaya.MFileObject()
+		fileObject.setRawFullName(filename)
+		delta = SceneDelta()
+		delta.Begin()
+		try:
+			self.translator.reader(fileObject, "", OpenMayaMPx.MPxFileTranslator.kImportAccessMode)
+			report = self.translator.stats.Report()
+			result["status"] = report["status"]
+			result["counters"] = report["counters"]
+			if ("error" in report):
+				result["error"] = report["error"]["message"]
+		except Exception as e:
+			result["error"] = str(e)
+		finally:
+			delta.End()
+		result["seconds"] = time.perf_counter() - start
+		result["roots"] = ListRootTransforms(delta.Objects(OpenMaya.MFn.kTransform))
+		result["nodes"] = len(delta.Objects())
+		if (result["status"] == "ok" and not result["roots"]):
+			result["status"] = "failed"
+			result.setdefault("error", "No geometry was imported")
+		return result
+
+
+################################################################
+# speedTreeImport
+#
+# Imports .stmat files with one ImportSession and returns the summaries as
+# JSON:
+#
+#   speedTreeImport -translator "SpeedTree for V-Ray" "D:/trees/oak.stmat" "D:/trees/birch.stmat";
+#
+# -translator takes the file translator name or arnold, vray, renderman or
+# redshift and defaults to the Arnold one. -options takes an option string
+# like the file dialog's ("lods=0;skipMaps=Subsurface*"). ImportFiles() is
+# the same for Python and hands back the summaries as they are; its keyword
+# options are checked like the option string, and a bad value raises
+# ValueError before anything is imported.
+
+IMPORT_COMMAND = "speedTreeImport"
+TRANSLATOR_FLAG = ("-t", "-translator")
+OPTIONS_FLAG = ("-o", "-options")
+
+# short names of the file translators, as batch.py takes them
+TRANSLATOR_NAMES = {
+	"arnold" : "SpeedTree",
+	"vray" : "SpeedTree for V-Ray",
+	"renderman" : "SpeedTree for Renderman",
+	"redshift" : "SpeedTree for Redshift",
+}
+
+translatorClasses = { }	# file translator name -> class, initializePlugin fills it
+
+def RegisterTranslators(aClasses):
+	translatorClasses.clear()
+	for translatorClass in aClasses:
+		translatorClasses[translatorClass.description] = translatorClass
+
+def ImportFiles(aFiles, translator = "SpeedTree", **options):
+	translatorClass = translatorClasses.get(TRANSLATOR_NAMES.get(translator.lower(), translator))
+	if (translatorClass == None):
+		raise ValueError("Unknown SpeedTree translator: " + translator)
+	instance = translatorClass()
+	instance.options = ImportOptions.FromKeywords(**options)
+	return ImportSession(instance).Import(aFiles)
+
+class SpeedTreeImportCommand(OpenMayaMPx.MPxCommand):
+	def __init__(self):
+		OpenMayaMPx.MPxCommand.__init__(self)
+
+	def isUndoable(self):
+		# the commands it runs are, in one chunk
+		return False
+
+	def doIt(self, argList):
+		argData = OpenMaya.MArgDatabase(self.syntax(), argList)
+		translator = argData.flagArgumentString(TRANSLATOR_FLAG[0], 0) if argData.isFlagSet(TRANSLATOR_FLAG[0]) else "SpeedTree"
+		options = ImportOptions.FromString(argData.flagArgumentString(OPTIONS_FLAG[0], 0) if argData.isFlagSet(OPTIONS_FLAG[0]) else "")
+		aFiles = OpenMaya.MStringArray()
+		argData.getObjects(aFiles)
+		try:
+			aResults = ImportFiles([aFiles[index] for index in range(aFiles.length())], translator, **vars(options))
+		except ValueError as e:
+			OpenMaya.MGlobal.displayError(str(e))
+			raise
+		self.setResult(json.dumps(aResults))
+
+	@staticmethod
+	def creator():
+		return OpenMayaMPx.asMPxPtr(SpeedTreeImportCommand())
+
+	@staticmethod
+	def syntaxCreator():
+		syntax = OpenMaya.MSyntax()
+		syntax.addFlag(TRANSLATOR_FLAG[0], TRANSLATOR_FLAG[1], OpenMaya.MSyntax.kString)
+		syntax.addFlag(OPTIONS_FLAG[0], OPTIONS_FLAG[1], OpenMaya.MSyntax.kString)
+		syntax.setObjectType(OpenMaya.MSyntax.kStringObjects)
+		syntax.setMinObjects(1)
+		return syntax
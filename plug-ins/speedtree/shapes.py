@@ -0,0 +1,72 @@
+################################################################
+# Imports
+
+import maya.OpenMaya as OpenMaya
+
+
+################################################################
+# ShapeFlags
+#
+# Collects the render attributes the mapping rules want on the shapes of an
+# import (aiOpaque, aiExportColors, ...) and sets them in one pass at the end.
+# The shapes below a transform are looked up once through the API instead of
+# guessing their names, and whether a node type has an attribute is asked
+# once per type. A later request for the same shape and attribute replaces
+# the earlier one, like the setAttr calls it stands for.
+
+class ShapeFlags:
+	def __init__(self):
+		self.shapes = { }	# transform name -> [shape names]
+		self.attributes = { }	# (node type, attribute) -> exists
+		self.types = { }	# shape name -> node type
+		self.flags = { }	# shape name -> {attribute : value}, in request order
+
+	def Shapes(self, transform):
+		aShapes = self.shapes.get(transform)
+		if (aShapes == None):
+			aShapes = []
+			selection = OpenMaya.MSelectionList()
+			selection.add(transform)
+			dagPath = OpenMaya.MDagPath()
+			selection.getDagPath(0, dagPath)
+			if (dagPath.hasFn(OpenMaya.MFn.kShape)):
+				self.AddShape(aShapes, dagPath)
+			else:
+				for index in range(dagPath.childCount()):
+					child = dagPath.child(index)
+					if (child.hasFn(OpenMaya.MFn.kShape) and not OpenMaya.MFnDagNode(child).isIntermediateObject()):
+						dagPath.push(child)
+						self.AddShape(aShapes, dagPath)
+						dagPath.pop()
+			self.shapes[transform] = aShapes
+		return aShapes
+
+	def AddShape(self, aShapes, dagPath):
+		name = dagPath.partialPathName()
+		self.types[name] = OpenMaya.MFnDependencyNode(dagPath.node()).typeName()
+		aShapes.append(name)
+
+	def HasAttribute(self, shape, attr):
+		key = (self.types[shape], attr)
+		exists = self.attributes.get(key)
+		if (exists == None):
+			selection = OpenMaya.MSelectionList()
+			selection.add(shape)
+			node = OpenMaya.MObject()
+			selection.getDependNode(0, node)
+			exists = OpenMaya.MFnDependencyNode(node).hasAttribute(attr)
+			self.attributes[key] = exists
+		return exists
+
+	def Set(self, aTransforms, attr, value, guard = None):
+		# set attr on the shapes of the transforms when the shape has the guard attribute (attr itself by default)
+		for transform in aTransforms or []:
+			for shape in self.Shapes(transform):
+				if (self.HasAttribute(shape, guard or attr) and self.HasAttribute(shape, attr)):
+					self.flags.setdefault(shape, { })[attr] = value
+
+	def Apply(self, graph):
+		for shape, aFlags in self.flags.items():
+			for attr, value in aFlags.items():
+				graph.SetAttr(shape + "." + attr, value)
+		self.flags = { }
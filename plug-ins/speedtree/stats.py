@@ -0,0 +1,179 @@
+################################################################
+# Imports
+
+import cProfile
+import json
+import os
+import os.path as path
+import pstats
+import tempfile
+import time
+import traceback
+import tracemalloc
+
+import maya.OpenMaya as OpenMaya
+
+
+################################################################
+# ImportStats
+#
+# Wall-clock time per phase of one import and counters for what it made
+# (nodes, connections, setAttr calls, reused shaders, ...). Begin() ends the
+# phase that is running and starts the next one, so the phases of reader()
+# are marked with one line each. Stop() closes the books and Publish() hands
+# the report out as one line of JSON through MGlobal.displayInfo and, when a
+# log file is set, appends the same line to it.
+#
+# The profile option (or $SPEEDTREE_PROFILE when it is empty) turns on
+# cProfile ("cprofile"), tracemalloc ("tracemalloc") or both ("all") for the
+# import. The cProfile stats are dumped to a .prof file next to the log, or to
+# the temp folder, and the slowest functions and the largest allocations are
+# added to the report.
+
+PROFILE_CPROFILE = "cprofile"
+PROFILE_TRACEMALLOC = "tracemalloc"
+PROFILE_ALL = "all"
+
+# entries of the profile and allocation tops in the report
+TOP_ENTRIES = 10
+
+def DefaultLogFile():
+	return os.environ.get("SPEEDTREE_STATS_LOG", "")
+
+def ProfileModes(setting = ""):
+	setting = (setting or os.environ.get("SPEEDTREE_PROFILE", "")).strip().lower()
+	if (setting in (PROFILE_ALL, "1", "true", "on")):
+		return (PROFILE_CPROFILE, PROFILE_TRACEMALLOC)
+	return tuple(mode for mode in (PROFILE_CPROFILE, PROFILE_TRACEMALLOC) if mode in setting)
+
+class ImportStats:
+	def __init__(self, filename, translator, profile = "", logFile = ""):
+		self.filename = filename
+		self.translator = translator
+		self.logFile = logFile
+		self.profileModes = ProfileModes(profile)
+		self.phases = { }	# phase -> seconds, in the order they first ran
+		self.counters = { }
+		self.phase = None
+		self.phaseStart = 0.0
+		self.start = 0.0
+		self.seconds = 0.0
+		self.error = None
+		self.profiler = None
+		self.tracing = False
+		self.profile = None
+		self.memory = None
+
+	# --- timing
+
+	def Start(self):
+		if (PROFILE_TRACEMALLOC in self.profileModes and not tracemalloc.is_tracing()):
+			tracemalloc.start()
+			self.tracing = True
+		if (PROFILE_CPROFILE in self.profileModes):
+			self.profiler = cProfile.Profile()
+			self.profiler.enable()
+		self.start = time.perf_counter()
+
+	def Begin(self, phase):
+		self.End()
+		self.phase = phase
+		self.phaseStart = time.perf_counter()
+
+	def End(self):
+		if (self.phase != None):
+			self.phases[self.phase] = self.phases.get(self.phase, 0.0) + time.perf_counter() - self.phaseStart
+			self.phase = None
+
+	def Stop(self):
+		self.End()
+		self.seconds = time.perf_counter() - self.start
+		if (self.profiler != None):
+			self.profiler.disable()
+			self.profile = self.ProfileReport(self.profiler)
+			self.profiler = None
+		if (self.tracing):
+			self.memory = self.MemoryReport()
+			tracemalloc.stop()
+			self.tracing = False
+		# also without the stats option, batch.py checks every import with it
+		global lastReport
+		lastReport = self.Report()
+
+	# --- counters
+
+	def Count(self, name, count = 1):
+		self.counters[name] = self.counters.get(name, 0) + count
+
+	def Add(self, aCounts, prefix = ""):
+		for name, count in aCounts.items():
+			self.Count(prefix + name, count)
+
+	def Fail(self, message):
+		# reader() only prints a one-line error, keep the first failure with its traceback
+		if (self.error == None):
+			self.error = { "message" : message, "traceback" : traceback.format_exc() }
+
+	# --- profiling
+
+	def ProfileReport(self, profiler):
+		directory = path.dirname(self.logFile) if self.logFile else tempfile.gettempdir()
+		name = path.splitext(path.basename(self.filename))[0] or "import"
+		profileFile = path.join(directory, "speedtree_" + name + "_" + time.strftime("%Y%m%d_%H%M%S") + ".prof")
+		stats = pstats.Stats(profiler)
+		try:
+			stats.dump_stats(profileFile)
+		except (IOError, OSError):
+			profileFile = None
+		aTop = []
+		for function in stats.sort_stats("cumulative").fcn_list[:TOP_ENTRIES]:
+			primitiveCalls, calls, totalTime, cumulativeTime, callers = stats.stats[function]
+			aTop.append({ "function" : "%s:%d(%s)" % function,
+						"calls" : calls,
+						"seconds" : totalTime,
+						"cumulativeSeconds" : cumulativeTime })
+		return { "file" : profileFile, "top" : aTop }
+
+	def MemoryReport(self):
+		current, peak = tracemalloc.get_traced_memory()
+		aTop = []
+		# leave out what the profilers allocate themselves
+		snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, cProfile.__file__)))
+		for statistic in snapshot.statistics("lineno")[:TOP_ENTRIES]:
+			frame = statistic.traceback[0]
+			aTop.append({ "line" : frame.filename + ":" + str(frame.lineno), "bytes" : statistic.size, "blocks" : statistic.count })
+		return { "currentBytes" : current, "peakBytes" : peak, "top" : aTop }
+
+	# --- report
+
+	def Report(self):
+		report = { "file" : self.filename,
+				"translator" : self.translator,
+				"seconds" : self.seconds,
+				"phases" : self.phases,
+				"counters" : self.counters,
+				"status" : "failed" if self.error != None else "ok" }
+		if (self.error != None):
+			report["error"] = self.error
+		if (self.profile != None):
+			report["profile"] = self.profile
+		if (self.memory != None):
+			report["memory"] = self.memory
+		return report
+
+	def Publish(self):
+		text = json.dumps(self.Report())
+		OpenMaya.MGlobal.displayInfo("SpeedTree stats: " + text)
+		if (self.logFile):
+			try:
+				with open(self.logFile, "a") as stream:
+					stream.write(text + "\n")
+			except (IOError, OSError):
+				print("SpeedTree ERROR: Could not write import stats to [" + self.logFile + "]")
+
+
+# report of the last import in this session, batch.py adds it to its manifest
+lastReport = None
+
+def LastReport():
+	return lastReport
@@ -0,0 +1,121 @@
+################################################################
+# Imports
+
+import hashlib
+import os.path as path
+import xml.etree.ElementTree as ElementTree
+
+
+################################################################
+# class SpeedTreeMaterial
+#
+# Plain data model of an .stmat file. Nothing in here depends on Maya so the
+# parser can be used (and timed) from any Python.
+
+class SpeedTreeMap(object):
+	__slots__ = ("red", "green", "blue", "file")
+
+	def __init__(self, red = 1.0, green = 1.0, blue = 1.0, file = ""):
+		self.red = red
+		self.green = green
+		self.blue = blue
+		self.file = file
+
+class SpeedTreeMaterial(object):
+	__slots__ = ("shader", "name", "twoSided", "vertexOpacity", "userData", "maps")
+
+	def __init__(self, name, twoSided = False, vertexOpacity = False, userData = ""):
+		self.shader = None
+		self.name = name
+		self.twoSided = twoSided
+		self.vertexOpacity = vertexOpacity
+		self.userData = userData
+		self.maps = { }
+
+	def ContentHash(self, directory = "", extra = None):
+		# materials that would build the same shading network hash the same, the name and userData don't count.
+		# Relative map files are taken relative to directory, extra is anything else the network depends on.
+		aMaps = []
+		for name in sorted(self.maps):
+			stmap = self.maps[name]
+			if (stmap.file):
+				filename = stmap.file
+				if (directory and not path.isabs(filename)):
+					filename = path.join(directory, filename)
+				aMaps.append((name, path.normcase(path.normpath(filename))))
+			else:
+				aMaps.append((name, float(stmap.red), float(stmap.green), float(stmap.blue)))
+		content = (bool(self.twoSided), bool(self.vertexOpacity), tuple(aMaps), extra)
+		return hashlib.sha1(repr(content).encode("utf-8")).hexdigest()
+
+class SpeedTreeMaterialFile(object):
+	__slots__ = ("mesh", "materials")
+
+	def __init__(self, mesh = ""):
+		self.mesh = mesh
+		self.materials = { }	# material name -> SpeedTreeMaterial, in file order
+
+
+################################################################
+# ParseMaterialFile
+#
+# Streams the first <Materials> element of an .stmat file into a
+# SpeedTreeMaterialFile, returns None when the file has no <Materials>.
+
+def ParseMap(attributes):
+	# a File, else a Value, else ColorR/G/B; missing or malformed values keep the defaults
+	newmap = SpeedTreeMap()
+	if ("File" in attributes):
+		newmap.file = attributes["File"]
+		return newmap
+	if ("Value" in attributes):
+		try:
+			newmap.red = newmap.green = newmap.blue = float(attributes["Value"])
+			return newmap
+		except ValueError:
+			pass
+	if ("ColorR" in attributes and "ColorG" in attributes and "ColorB" in attributes):
+		try:
+			red, green, blue = float(attributes["ColorR"]), float(attributes["ColorG"]), float(attributes["ColorB"])
+		except ValueError:
+			return newmap
+		newmap.red, newmap.green, newmap.blue = red, green, blue
+	return newmap
+
+def ParseMaterialFile(filename):
+	with open(filename, "rb") as stream:
+		return ParseMaterialStream(stream)
+
+def ParseMaterialStream(stream):
+	stFile = None
+	stMaterial = None
+	depth = 0	# element depth inside the first <Materials>
+	for event, element in ElementTree.iterparse(stream, events = ("start", "end")):
+		tag = element.tag
+		if (event == "start"):
+			if (stFile == None):
+				if (tag == "Materials"):
+					stFile = SpeedTreeMaterialFile(element.get("Mesh", ""))
+					depth = 1
+			elif (depth > 0):
+				depth += 1
+				if (tag == "Material"):
+					attributes = element.attrib
+					stMaterial = SpeedTreeMaterial(attributes.get("Name", ""),
+													attributes.get("TwoSided") == "1",
+													attributes.get("VertexOpacity") == "1",
+													attributes.get("UserData", ""))
+		elif (depth > 0):
+			depth -= 1
+			if (tag == "Map"):
+				if (stMaterial != None and "Name" in element.attrib):
+					stMaterial.maps[element.attrib["Name"]] = ParseMap(element.attrib)
+			elif (tag == "Material"):
+				if (stMaterial != None):
+					stFile.materials[stMaterial.name] = stMaterial
+					stMaterial = None
+				element.clear()
+			if (depth == 0):
+				# only the first <Materials> is used, skip the rest of the file
+				break
+	return stFile
@@ -0,0 +1,317 @@
+################################################################
+# Imports
+
+import concurrent.futures
+import json
+import os
+import os.path as path
+import struct
+
+import maya.cmds as mc
+
+from speedtree.resolver import TextureResolver
+from speedtree.stmat import ParseMaterialFile
+
+# Pillow reads the headers of the formats that are not parsed here
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+
+################################################################
+# TextureMemory
+#
+# Works out how much texture memory a tree needs before it goes to the farm,
+# from the image headers alone: width, height, channels and bits per channel
+# of every image its materials use, read in a thread pool. For each image it
+# gives the memory of the pixels and of the full mip chain, for each
+# material the sum over its images and for the tree the sum over the
+# distinct images. It flags images whose mip chain is over the budget, and
+# RGB(A) images the shading networks only read one channel of (outColorR of
+# the Gloss and SubsurfaceAmount maps, ...), which a single channel file
+# would hold in a third or a quarter of the memory.
+#
+# PNG, JPEG, TGA, BMP, TIFF/TX, EXR and HDR headers are parsed here, other
+# formats need Pillow. Report() is plain data, the importer stores it as JSON
+# on the root transforms of the tree and AnalyzeMaterialFile() runs it for a
+# .stmat without importing it.
+
+MEMORY_ATTRIBUTE = "speedTreeTextureMemory"
+
+# file node outputs that carry one channel
+SINGLE_CHANNEL_OUTPUTS = ("outColorR", "outColorG", "outColorB", "outAlpha")
+
+# bytes read for the headers that are not at a fixed place (JPEG, EXR), TIFF
+# seeks to its directory, which can be anywhere in the file
+HEADER_BYTES = 65536
+
+# 256 ImageWidth, 257 ImageLength, 258 BitsPerSample, 277 SamplesPerPixel
+TIFF_TAGS = (256, 257, 258, 277)
+
+MEGABYTE = 1024 * 1024
+
+# Pillow mode -> (channels, bits per channel)
+PIL_MODES = {"1" : (1, 8), "L" : (1, 8), "P" : (3, 8), "LA" : (2, 8), "RGB" : (3, 8), "RGBA" : (4, 8), "CMYK" : (4, 8),
+			"I;16" : (1, 16), "I" : (1, 32), "F" : (1, 32)}
+
+class ImageInfo:
+	__slots__ = ("width", "height", "channels", "bits")
+
+	def __init__(self, width, height, channels, bits):
+		self.width = width
+		self.height = height
+		self.channels = channels
+		self.bits = bits
+
+	def Bytes(self):
+		return self.width * self.height * self.channels * max(1, self.bits // 8)
+
+	def MipBytes(self):
+		# every level down to 1x1, each half the size of the one above
+		total = 0
+		width, height = self.width, self.height
+		while (True):
+			total += width * height * self.channels * max(1, self.bits // 8)
+			if (width == 1 and height == 1):
+				return total
+			width, height = max(1, width // 2), max(1, height // 2)
+
+class TextureMemory:
+	def __init__(self, directory = "", plan = None, budget = 0.0, resolver = None):
+		self.directory = directory	# relative images are found from here, the folder of the .stmat
+		self.plan = plan	# MaterialPlan of the translator, to know the channels its networks read
+		self.budget = budget	# megabytes of one mip chain, 0 for no budget
+		self.resolver = resolver or TextureResolver(directory)
+		self.images = { }	# full path -> ImageInfo, None when it can't be read
+		self.materials = { }	# material name -> full paths of its images
+		self.singleChannel = { }	# full path -> every map that uses it reads one channel
+
+	def Analyze(self, aMaterials):
+		aMaps = []
+		for stMaterial in aMaterials:
+			aUse = self.plan.ChannelUse(stMaterial) if (self.plan != None) else { }
+			aImages = self.materials.setdefault(stMaterial.name, [])
+			for mapName, stMap in stMaterial.maps.items():
+				if (not stMap.file):
+					continue
+				filename, aTiles = self.resolver.Resolve(stMap.file)
+				if (filename == None):
+					continue
+				# UDIM sets count their tiles one by one
+				for tile in (aTiles or [None]):
+					image = filename.replace("<UDIM>", str(tile)) if (tile != None) else filename
+					if (image not in aImages):
+						aImages.append(image)
+					outputs = aUse.get(mapName)
+					single = bool(outputs) and all(output in SINGLE_CHANNEL_OUTPUTS for output in outputs)
+					self.singleChannel[image] = self.singleChannel.get(image, True) and single
+					aMaps.append(image)
+
+		aNew = [image for image in set(aMaps) if image not in self.images]
+		if (aNew):
+			with concurrent.futures.ThreadPoolExecutor(min(len(aNew), 2 * (os.cpu_count() or 1))) as pool:
+				for image, info in zip(aNew, pool.map(ReadImageInfo, aNew)):
+					self.images[image] = info
+		return self.Report()
+
+	def Report(self):
+		aTextures = { }
+		aWarnings = []
+		for image, info in sorted(self.images.items()):
+			if (info == None):
+				aTextures[image] = { "readable" : False }
+				aWarnings.append("Could not read the header of [" + image + "]")
+				continue
+			texture = { "width" : info.width, "height" : info.height, "channels" : info.channels, "bits" : info.bits,
+						"bytes" : info.Bytes(), "mipBytes" : info.MipBytes() }
+			if (self.budget > 0 and info.MipBytes() > self.budget * MEGABYTE):
+				texture["overBudget"] = True
+				aWarnings.append("[" + image + "] needs %.1f MB with mipmaps, the budget is %.1f MB" % (info.MipBytes() / float(MEGABYTE), self.budget))
+			if (self.singleChannel.get(image) and info.channels >= 3):
+				texture["singleChannelData"] = True
+				aWarnings.append("[" + image + "] is read as one channel but has " + str(info.channels) + ", a single channel file would need " +
+								"%.1f MB less" % ((info.MipBytes() - info.MipBytes() // info.channels) / float(MEGABYTE)))
+			aTextures[image] = texture
+
+		aMaterials = { }
+		for name, aImages in self.materials.items():
+			aInfos = [self.images.get(image) for image in aImages if self.images.get(image) != None]
+			aMaterials[name] = { "textures" : len(aImages), "bytes" : sum(info.Bytes() for info in aInfos), "mipBytes" : sum(info.MipBytes() for info in aInfos) }
+
+		aInfos = [info for info in self.images.values() if info != None]
+		return { "textures" : aTextures,
+				"materials" : aMaterials,
+				"bytes" : sum(info.Bytes() for info in aInfos),
+				"mipBytes" : sum(info.MipBytes() for info in aInfos),
+				"budgetMB" : self.budget,
+				"warnings" : aWarnings }
+
+
+def AnalyzeMaterialFile(filename, plan = None, budget = 0.0):
+	# texture memory report of a .stmat without importing it, None when it can't be parsed
+	stFile = ParseMaterialFile(filename)
+	if (stFile == None):
+		return None
+	return TextureMemory(path.dirname(path.abspath(filename)), plan, budget).Analyze(stFile.materials.values())
+
+def Summary(report):
+	return ("SpeedTree: textures need %.1f MB, %.1f MB with mipmaps" % (report["bytes"] / float(MEGABYTE), report["mipBytes"] / float(MEGABYTE)) +
+			", " + str(len(report["warnings"])) + " warnings")
+
+
+################################################################
+# Image headers
+
+def ReadImageInfo(filename):
+	# ImageInfo from the header of an image, None when it can't be read
+	try:
+		with open(filename, "rb") as stream:
+			header = stream.read(HEADER_BYTES)
+			try:
+				info = HeaderInfo(stream, header, path.splitext(filename)[1].lower())
+			except (ValueError, IndexError, KeyError, struct.error):
+				info = None
+		# headers that are not parsed here, or that the parsers can't make sense of, are left to Pillow
+		if (info == None):
+			return PilInfo(filename)
+		return info
+	except (OSError, ValueError, IndexError, KeyError, struct.error):
+		return None
+
+def HeaderInfo(stream, header, extension):
+	if (header[:8] == b"\x89PNG\r\n\x1a\n"):
+		return PngInfo(header)
+	if (header[:2] == b"\xff\xd8"):
+		return JpegInfo(header)
+	if (header[:4] in (b"II*\x00", b"MM\x00*")):
+		return TiffInfo(stream, header)
+	if (header[:4] == b"\x76\x2f\x31\x01"):
+		return ExrInfo(header)
+	if (header[:2] == b"BM"):
+		return BmpInfo(header)
+	if (header[:2] == b"#?"):
+		return HdrInfo(header)
+	if (extension == ".tga"):
+		return TgaInfo(header)
+	return None
+
+def PngInfo(header):
+	width, height, bits, colorType = struct.unpack(">IIBB", header[16:26])
+	if (colorType == 3):
+		# palette images are expanded to RGB
+		return ImageInfo(width, height, 3, 8)
+	return ImageInfo(width, height, {0 : 1, 2 : 3, 4 : 2, 6 : 4}[colorType], max(8, bits))
+
+def JpegInfo(header):
+	offset = 2
+	while (offset + 9 < len(header)):
+		if (header[offset] != 0xff):
+			offset += 1
+			continue
+		marker = header[offset + 1]
+		if (marker in (0xd8, 0x01) or 0xd0 <= marker <= 0xd7 or marker == 0xff):
+			offset += 1 if marker == 0xff else 2
+			continue
+		length = struct.unpack(">H", header[offset + 2:offset + 4])[0]
+		# start of frame, except DHT, JPG and DAC that share the range
+		if (0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc)):
+			bits, height, width, channels = struct.unpack(">BHHB", header[offset + 4:offset + 10])
+			return ImageInfo(width, height, channels, max(8, bits))
+		offset += 2 + length
+	raise ValueError("no JPEG frame header")
+
+def TiffInfo(stream, header):
+	# the first directory is wherever the header points, often after the pixels
+	order = "<" if header[:2] == b"II" else ">"
+	offset = struct.unpack(order + "I", header[4:8])[0]
+	count = struct.unpack(order + "H", ReadAt(stream, offset, 2))[0]
+	entries = ReadAt(stream, offset + 2, count * 12)
+	aTags = { }
+	for index in range(count):
+		entry = index * 12
+		tag, valueType, valueCount = struct.unpack(order + "HHI", entries[entry:entry + 8])
+		if (tag not in TIFF_TAGS):
+			continue
+		size = 2 if valueType == 3 else 4
+		value = entries[entry + 8:entry + 8 + size]
+		if (size * valueCount > 4):
+			# the values are elsewhere, the first one is enough
+			value = ReadAt(stream, struct.unpack(order + "I", entries[entry + 8:entry + 12])[0], size)
+		aTags[tag] = struct.unpack(order + ("H" if size == 2 else "I"), value)[0]
+	return ImageInfo(aTags[256], aTags[257], aTags.get(277, 1), max(8, aTags.get(258, 8)))
+
+def ReadAt(stream, offset, size):
+	stream.seek(offset)
+	data = stream.read(size)
+	if (len(data) != size):
+		raise ValueError("unexpected end of file")
+	return data
+
+def ExrInfo(header):
+	offset = 8
+	channels = 0
+	bits = 16
+	width = height = None
+	while (header[offset] != 0):
+		nameEnd = header.index(b"\x00", offset)
+		typeEnd = header.index(b"\x00", nameEnd + 1)
+		name = header[offset:nameEnd]
+		size = struct.unpack("<i", header[typeEnd + 1:typeEnd + 5])[0]
+		value = header[typeEnd + 5:typeEnd + 5 + size]
+		if (name == b"channels"):
+			# name, pixel type (0 uint, 1 half, 2 float), pLinear, 3 reserved, x and y sampling; ends with an empty name
+			position = 0
+			while (value[position] != 0):
+				position = value.index(b"\x00", position) + 1
+				pixelType = struct.unpack("<i", value[position:position + 4])[0]
+				bits = max(bits, 16 if pixelType == 1 else 32)
+				channels += 1
+				position += 16
+		elif (name == b"dataWindow"):
+			xMin, yMin, xMax, yMax = struct.unpack("<iiii", value[:16])
+			width, height = xMax - xMin + 1, yMax - yMin + 1
+		offset = typeEnd + 5 + size
+	if (width == None or channels == 0):
+		raise ValueError("incomplete EXR header")
+	return ImageInfo(width, height, channels, bits)
+
+def BmpInfo(header):
+	width, height = struct.unpack("<ii", header[18:26])
+	bitCount = struct.unpack("<H", header[28:30])[0]
+	return ImageInfo(width, abs(height), 4 if bitCount == 32 else 3, 8)
+
+def HdrInfo(header):
+	# text lines up to an empty one, then the resolution line "-Y height +X width"
+	aLines = header.split(b"\n")
+	for index, line in enumerate(aLines):
+		if (not line.strip()):
+			aSize = aLines[index + 1].split()
+			return ImageInfo(int(aSize[3]), int(aSize[1]), 3, 32)
+	raise ValueError("no HDR resolution line")
+
+def TgaInfo(header):
+	imageType = header[2]
+	width, height, depth = struct.unpack("<HHB", header[12:17])
+	if (imageType in (3, 11)):
+		return ImageInfo(width, height, 1, 8)
+	if (imageType in (1, 9)):
+		return ImageInfo(width, height, 3, 8)
+	return ImageInfo(width, height, 4 if depth == 32 else 3, 8)
+
+def PilInfo(filename):
+	if (Image == None):
+		return None
+	# opening only reads the header, the pixels are loaded when asked for
+	with Image.open(filename) as image:
+		channels, bits = PIL_MODES.get(image.mode, (len(image.getbands()), 8))
+		return ImageInfo(image.width, image.height, channels, bits)
+
+
+################################################################
+# TagTextureMemory
+
+def TagTextureMemory(node, report):
+	if (not mc.objExists(node + "." + MEMORY_ATTRIBUTE)):
+		mc.addAttr(node, longName = MEMORY_ATTRIBUTE, dataType = "string")
+	mc.setAttr(node + "." + MEMORY_ATTRIBUTE, json.dumps(report), type = "string")
@@ -0,0 +1,161 @@
+################################################################
+# Imports
+
+import concurrent.futures
+import hashlib
+import os
+import os.path as path
+import shutil
+import subprocess
+
+from speedtree.opacity import HashFile
+
+
+################################################################
+# TexturePreparer
+#
+# Converts the images an import uses into tiled, mipmapped textures, so
+# renderers page in the tiles and mip levels they need instead of loading
+# whole images. Every image and color space is converted once, by maketx or
+# oiiotool (from OpenImageIO, maketx also comes with Arnold), each conversion
+# in its own process and as many at a time as there are cores. The image is
+# not changed, the color space the translator gives the file node is written
+# into the texture as oiio:ColorSpace.
+#
+# A converted texture is named after the content hash of its image and the
+# conversion settings, so a texture that exists is up to date and is never
+# converted again, whatever the path of the image it came from. Textures go
+# to a "tx" folder next to their image unless an output folder is given.
+# EXR and HDR images become .exr textures, all others tiled TIFF .tx files.
+#
+# Submit() starts a conversion, Assign() waits for all of them and sets the
+# file nodes to the converted textures, or to the images where a conversion
+# failed.
+
+TOOLS = ("maketx", "oiiotool")
+TEXTURE_FOLDER = "tx"
+FLOAT_EXTENSIONS = (".exr", ".hdr")
+
+# bump when the conversion changes, so older textures are converted again
+PREP_VERSION = 1
+
+# seconds a single conversion may take
+CONVERSION_TIMEOUT = 600
+
+fileHashes = { }	# (filename, size, mtime) -> content hash, for the session
+
+def FindTool(tool = ""):
+	# full path of maketx or oiiotool, tool picks one by name or path
+	if (tool):
+		return tool if path.isfile(tool) else shutil.which(tool)
+	for name in TOOLS:
+		found = shutil.which(name)
+		if (found):
+			return found
+	mtoa = os.environ.get("MTOA_PATH") or os.environ.get("MTOA_LOCATION")
+	if (mtoa):
+		found = shutil.which("maketx", path = path.join(mtoa, "bin"))
+		if (found):
+			return found
+	return None
+
+def ContentHash(filename):
+	stat = os.stat(filename)
+	key = (path.normcase(filename), stat.st_size, stat.st_mtime_ns)
+	if (key not in fileHashes):
+		fileHashes[key] = HashFile(filename)
+	return fileHashes[key]
+
+def ConversionCommand(tool, source, destination, colorSpace):
+	if (path.splitext(path.basename(tool))[0].lower() == "oiiotool"):
+		command = [tool, source]
+		if (colorSpace):
+			command += ["--attrib", "oiio:ColorSpace", colorSpace]
+		return command + ["-otex", destination]
+	command = [tool, "--oiio", source]
+	if (colorSpace):
+		command += ["--attrib", "oiio:ColorSpace", colorSpace]
+	return command + ["-o", destination]
+
+def Convert(tool, source, destination, colorSpace):
+	# write to a temporary name first so other sessions never pick up half a texture
+	stem, extension = path.splitext(destination)
+	partial = stem + ".partial" + str(os.getpid()) + extension
+	try:
+		# no console window for every conversion on Windows
+		result = subprocess.run(ConversionCommand(tool, source, partial, colorSpace), stdout = subprocess.PIPE, stderr = subprocess.STDOUT,
+								timeout = CONVERSION_TIMEOUT, creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0))
+		if (result.returncode != 0 or not path.isfile(partial)):
+			raise RuntimeError(result.stdout.decode("utf-8", "replace").strip() or ("exit code " + str(result.returncode)))
+		os.replace(partial, destination)
+	finally:
+		if (path.isfile(partial)):
+			os.remove(partial)
+	return destination
+
+class TexturePreparer:
+	def __init__(self, tool, directory = "", outputDirectory = "", jobs = None):
+		self.tool = tool
+		self.directory = directory	# relative images are found from here, the folder of the .stmat
+		self.outputDirectory = outputDirectory
+		self.pool = concurrent.futures.ThreadPoolExecutor(jobs or os.cpu_count() or 1)
+		self.textures = { }	# (image, color space) -> future of the texture path, None when there is nothing to convert
+		self.files = []	# (file node, filename, key of its texture) to assign
+		self.converted = 0
+		self.upToDate = 0
+		self.failed = 0
+
+	def Source(self, filename):
+		return path.normpath(filename if path.isabs(filename) else path.join(self.directory, filename))
+
+	def Destination(self, source, colorSpace):
+		settings = (ContentHash(source), colorSpace or "", path.basename(self.tool).lower(), PREP_VERSION)
+		name, extension = path.splitext(path.basename(source))
+		key = hashlib.sha1(repr(settings).encode("utf-8")).hexdigest()[:16]
+		folder = self.outputDirectory or path.join(path.dirname(source), TEXTURE_FOLDER)
+		return path.join(folder, name + "_" + key + (".exr" if extension.lower() in FLOAT_EXTENSIONS else ".tx"))
+
+	def Submit(self, texFile, filename, colorSpace = None):
+		# start converting the image of a new file node, False when it is not converted (UDIM tiles)
+		if ("<UDIM>" in filename):
+			return False
+		source = self.Source(filename)
+		key = (source, colorSpace)
+		if (key not in self.textures):
+			self.textures[key] = None
+			try:
+				destination = self.Destination(source, colorSpace)
+				if (path.isfile(destination)):
+					self.upToDate += 1
+					self.textures[key] = destination
+				else:
+					if (not path.isdir(path.dirname(destination))):
+						os.makedirs(path.dirname(destination))
+					self.textures[key] = self.pool.submit(Convert, self.tool, source, destination, colorSpace)
+			except OSError as e:
+				print("SpeedTree ERROR: Could not prepare texture [" + source + "]: " + str(e))
+				self.failed += 1
+		self.files.append((texFile, filename, key))
+		return True
+
+	def Assign(self, graph):
+		for texFile, filename, key in self.files:
+			texture = self.textures[key]
+			if (isinstance(texture, concurrent.futures.Future)):
+				try:
+					texture = texture.result()
+					self.converted += 1
+				except Exception as e:
+					print("SpeedTree ERROR: Could not convert texture [" + key[0] + "]: " + str(e))
+					self.failed += 1
+					texture = None
+				self.textures[key] = texture
+			graph.SetAttr(texFile + ".fileTextureName", texture or filename, type = "string")
+		self.files = []
+
+	def Close(self):
+		self.pool.shutdown(wait = True)
+
+	def Report(self):
+		return ("SpeedTree: prepared textures, " + str(self.converted) + " converted, " + str(self.upToDate) + " up to date, " +
+				str(self.failed) + " failed")
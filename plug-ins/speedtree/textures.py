@@ -0,0 +1,92 @@
+################################################################
+# Imports
+
+import maya.cmds as mc
+import os.path as path
+
+from speedtree.resolver import UdimPattern
+
+
+################################################################
+# TextureCache
+#
+# Remembers the file and place2dTexture nodes made by CreateFileTexture so maps
+# that point at the same image with the same settings share one node network.
+# A cache lives for one import; with sceneScope the file nodes that already
+# exist in the scene are registered as well. exists tells whether a cached
+# node is still there, the graph backends pass their own so nodes that are
+# not committed yet still count.
+
+DEFAULT_UV_TRANSFORM = (1.0, 1.0, 0.0, 0.0, 0.0)	# repeatU, repeatV, offsetU, offsetV, rotateFrame
+UV_TRANSFORM_ATTRIBUTES = ("repeatU", "repeatV", "offsetU", "offsetV", "rotateFrame")
+
+class TextureCache:
+	def __init__(self, sceneScope = False, exists = None):
+		self.exists = exists or mc.objExists
+		self.files = { }
+		self.placements = { }
+		self.filesReused = 0
+		self.placementsReused = 0
+		if (sceneScope):
+			self.ScanScene()
+
+	def FileKey(self, filename, colorSpace = None, ignoreFileRules = False, invert = False, colorManagement = True):
+		udim = (filename.find("<UDIM>") > -1)
+		resolved = path.normcase(path.normpath(filename)) if filename else filename
+		return (resolved, colorSpace or "", bool(ignoreFileRules), bool(invert), udim, bool(colorManagement))
+
+	def FindFile(self, key):
+		texFile = self.files.get(key)
+		if (texFile != None):
+			if (not self.exists(texFile)):
+				del self.files[key]
+				return None
+			self.filesReused += 1
+		return texFile
+
+	def AddFile(self, key, texFile):
+		self.files[key] = texFile
+
+	def FindPlacement(self, uvTransform = DEFAULT_UV_TRANSFORM):
+		placement = self.placements.get(tuple(uvTransform))
+		if (placement != None):
+			if (not self.exists(placement)):
+				del self.placements[tuple(uvTransform)]
+				return None
+			self.placementsReused += 1
+		return placement
+
+	def AddPlacement(self, placement, uvTransform = DEFAULT_UV_TRANSFORM):
+		self.placements[tuple(uvTransform)] = placement
+
+	def Commit(self, name):
+		# once a graph is committed its nodes go by their real names, for the imports that share the cache
+		self.files = dict((key, name(texFile)) for key, texFile in self.files.items())
+		self.placements = dict((uvTransform, name(placement)) for uvTransform, placement in self.placements.items())
+
+	def NodesSaved(self):
+		# every reused file node also saves the placement it would have needed
+		return self.filesReused * 2 + self.placementsReused
+
+	def Report(self):
+		return ("SpeedTree: reused " + str(self.filesReused) + " file textures and " + str(self.placementsReused) +
+				" placements, " + str(self.NodesSaved()) + " nodes saved")
+
+	def ScanScene(self):
+		for texFile in mc.ls(type = "file") or []:
+			filename = mc.getAttr(texFile + ".fileTextureName") or ""
+			if (mc.getAttr(texFile + ".uvTilingMode") == 3):
+				filename = UdimPattern(filename)
+			key = self.FileKey(filename,
+								mc.getAttr(texFile + ".colorSpace"),
+								mc.getAttr(texFile + ".ignoreColorSpaceFileRules"),
+								mc.getAttr(texFile + ".invert"),
+								bool(mc.listConnections(texFile + ".colorManagementEnabled", source = True, destination = False)))
+			if (key not in self.files):
+				self.files[key] = texFile
+
+			aPlacements = mc.listConnections(texFile + ".uvCoord", source = True, destination = False, type = "place2dTexture") or []
+			for placement in aPlacements:
+				uvTransform = tuple(mc.getAttr(placement + "." + attr) for attr in UV_TRANSFORM_ATTRIBUTES)
+				if (uvTransform not in self.placements):
+					self.placements[uvTransform] = placement
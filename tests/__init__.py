@@ -0,0 +1,16 @@
+################################################################
+# Tests
+#
+# Unit tests of the importer. They run on a plain Python install, against
+# the stand-in maya package of the benchmarks (benchmarks/fakemaya):
+#
+#   python -m unittest discover -s tests -t .
+
+import os.path as path
+import sys
+
+testDir = path.dirname(path.abspath(__file__))
+rootDir = path.dirname(testDir)
+for directory in (path.join(rootDir, "plug-ins"), path.join(rootDir, "benchmarks"), path.join(rootDir, "benchmarks", "fakemaya")):
+	if (directory not in sys.path):
+		sys.path.insert(0, directory)
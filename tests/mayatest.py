@@ -0,0 +1,57 @@
+################################################################
+# Imports
+
+import contextlib
+import io
+import os.path as path
+import shutil
+import tempfile
+import unittest
+
+import maya.cmds as mc
+from maya._scene import scene
+
+import synthetic
+import SpeedTreeImporter
+from speedtree.session import ImportFiles
+
+# the translators and commands, like loading the plug-in does
+SpeedTreeImporter.initializePlugin(None)
+
+
+################################################################
+# MayaTestCase
+#
+# Tests that import trees into the fake scene. Every test starts from a new
+# scene and a temporary folder for its trees, what the importer prints is
+# kept in self.output.
+
+class MayaTestCase(unittest.TestCase):
+	def setUp(self):
+		scene.Reset()
+		self.directory = tempfile.mkdtemp()
+		self.output = io.StringIO()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors = True)
+
+	def MakeTree(self, name = "tree", **kwargs):
+		# a synthetic tree in its own folder, returns its .stmat
+		return synthetic.MakeTree(path.join(self.directory, name), name = name, **kwargs)
+
+	def Import(self, aFiles, translator = "arnold", **options):
+		# ImportFiles without the on-disk parse cache, the summaries of the files
+		options.setdefault("parseCache", False)
+		with contextlib.redirect_stdout(self.output):
+			return ImportFiles(aFiles, translator, **options)
+
+	def Run(self, function, *args, **kwargs):
+		with contextlib.redirect_stdout(self.output):
+			return function(*args, **kwargs)
+
+	def Lines(self, text):
+		# the printed lines that hold text
+		return [line for line in self.output.getvalue().splitlines() if text in line]
+
+	def Nodes(self, nodeType):
+		return mc.ls(type = nodeType) or []
@@ -0,0 +1,77 @@
+################################################################
+# Imports
+
+import unittest
+
+from speedtree.filters import ImportFilter, ParsePatterns
+from speedtree.options import ImportOptions
+from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial
+
+
+################################################################
+# Test data
+
+def Material(name, aMaps, vertexOpacity = True):
+	stMaterial = SpeedTreeMaterial(name, True, vertexOpacity, "data")
+	for mapName in aMaps:
+		stMaterial.maps[mapName] = SpeedTreeMap(file = name + "_" + mapName + ".png")
+	return stMaterial
+
+def Materials():
+	aMaterials = { }
+	for stMaterial in (Material("Bark", ("Color", "Normal", "Gloss")),
+						Material("Leaves", ("Color", "Opacity", "SubsurfaceColor", "SubsurfaceAmount")),
+						Material("Fronds", ("Color", "Opacity")),
+						Material("Billboard_0", ("Color",), vertexOpacity = False)):
+		aMaterials[stMaterial.name] = stMaterial
+	return aMaterials
+
+
+################################################################
+# ImportFilter
+
+class ImportFilterTest(unittest.TestCase):
+	def testParsePatterns(self):
+		self.assertEqual(ParsePatterns(" *Frond*, ,Billboard* "), ["*frond*", "billboard*"])
+		self.assertEqual(ParsePatterns(""), [])
+
+	def testInactive(self):
+		importFilter = ImportFilter(ImportOptions())
+		self.assertFalse(importFilter.Active())
+		aMaterials = Materials()
+		self.assertIs(importFilter.Materials(aMaterials), aMaterials)
+
+	def testSkipMaterials(self):
+		importFilter = ImportFilter(ImportOptions(skipMaterials = "*FROND*, billboard*"))
+		self.assertTrue(importFilter.Active())
+		self.assertTrue(importFilter.SkipMaterial("Billboard_0"))
+		self.assertFalse(importFilter.SkipMaterial("Bark"))
+		aFiltered = importFilter.Materials(Materials())
+		self.assertEqual(list(aFiltered), ["Bark", "Leaves"])
+
+	def testSkipMaps(self):
+		aMaterials = Materials()
+		aFiltered = ImportFilter(ImportOptions(skipMaps = "subsurface*, Gloss")).Materials(aMaterials)
+		self.assertEqual(list(aFiltered), list(aMaterials))
+		self.assertEqual(list(aFiltered["Bark"].maps), ["Color", "Normal"])
+		self.assertEqual(list(aFiltered["Leaves"].maps), ["Color", "Opacity"])
+		# materials the filter doesn't change are not copied, the ones it does keep everything else
+		self.assertIs(aFiltered["Fronds"], aMaterials["Fronds"])
+		self.assertIsNot(aFiltered["Bark"], aMaterials["Bark"])
+		self.assertEqual((aFiltered["Bark"].name, aFiltered["Bark"].twoSided, aFiltered["Bark"].vertexOpacity, aFiltered["Bark"].userData),
+						("Bark", True, True, "data"))
+		self.assertIs(aFiltered["Bark"].maps["Color"], aMaterials["Bark"].maps["Color"])
+
+	def testOriginalsAreKept(self):
+		# the parse cache holds the materials, filtering must not change them
+		aMaterials = Materials()
+		ImportFilter(ImportOptions(skipMaps = "*", vertexOpacity = False)).Materials(aMaterials)
+		self.assertEqual(list(aMaterials["Bark"].maps), ["Color", "Normal", "Gloss"])
+		self.assertTrue(aMaterials["Bark"].vertexOpacity)
+
+	def testVertexOpacity(self):
+		aMaterials = Materials()
+		aFiltered = ImportFilter(ImportOptions(vertexOpacity = False)).Materials(aMaterials)
+		self.assertEqual([stMaterial.vertexOpacity for stMaterial in aFiltered.values()], [False] * 4)
+		self.assertIs(aFiltered["Billboard_0"], aMaterials["Billboard_0"])
+		self.assertEqual(list(aFiltered["Leaves"].maps), list(aMaterials["Leaves"].maps))
@@ -0,0 +1,71 @@
+################################################################
+# Imports
+
+import maya.cmds as mc
+from maya._scene import scene
+
+from speedtree.graph import CommandGraph, ModifierGraph, PLACEHOLDER_PREFIX, COLOR_MANAGEMENT_GLOBALS
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# Graph backends
+
+def BuildNetwork(graph):
+	# a textured lambert, returns the names of the file, the placement and the shader
+	texFile = graph.ShadingNode("file", asTexture = True, isColorManaged = True)
+	placement = graph.ShadingNode("place2dTexture", asUtility = True)
+	shader = graph.ShadingNode("lambert", asShader = True)
+	graph.DefaultNavigation(placement, texFile)
+	graph.SetAttr(texFile + ".fileTextureName", "bark.png", type = "string")
+	graph.SetAttr(shader + ".diffuse", 0.5)
+	graph.ConnectAttr(texFile + ".outColor", shader + ".color")
+	graph.Commit()
+	return [graph.Name(node) for node in (texFile, placement, shader)]
+
+class GraphTest(MayaTestCase):
+	def Network(self, graph):
+		# what BuildNetwork made: node types, values and connections
+		texFile, placement, shader = BuildNetwork(graph)
+		return { "types" : [mc.nodeType(node) for node in (texFile, placement, shader)],
+				"file" : mc.getAttr(texFile + ".fileTextureName"),
+				"diffuse" : mc.getAttr(shader + ".diffuse"),
+				"color" : mc.listConnections(shader + ".color", source = True, destination = False),
+				"placement" : sorted(set(mc.listConnections(placement, source = False, destination = True, type = "file") or [])),
+				"colorManagement" : sorted(set(mc.listConnections(texFile, source = True, destination = False) or [])),
+				"counts" : dict(graph.counts) }
+
+	def testSameNetwork(self):
+		commands = self.Network(CommandGraph())
+		scene.Reset()
+		modifier = self.Network(ModifierGraph())
+		self.assertEqual(modifier, commands)
+		self.assertEqual(commands["types"], ["file", "place2dTexture", "lambert"])
+		self.assertEqual(commands["color"], ["file1"])
+		self.assertIn(COLOR_MANAGEMENT_GLOBALS, commands["colorManagement"])
+
+	def testHypershadeLists(self):
+		# the modifier adds the nodes to the lists mc.shadingNode adds them to
+		shader = BuildNetwork(ModifierGraph())[2]
+		self.assertEqual(mc.listConnections(shader + ".message", source = False, destination = True), ["defaultShaderList1"])
+
+	def testPlaceholders(self):
+		graph = ModifierGraph()
+		shader = graph.ShadingNode("lambert", asShader = True)
+		self.assertTrue(shader.startswith(PLACEHOLDER_PREFIX))
+		self.assertTrue(graph.Exists(shader))
+		# nothing is in the scene before the commit
+		self.assertEqual(self.Nodes("lambert"), ["lambert1"])
+		graph.Commit()
+		self.assertEqual(sorted(self.Nodes("lambert")), ["lambert1", graph.Name(shader)])
+		self.assertTrue(graph.Exists(shader))
+
+	def testConnectedDestination(self):
+		graph = ModifierGraph()
+		aShaders = [graph.ShadingNode("lambert", asShader = True) for index in range(3)]
+		graph.ConnectAttr(aShaders[0] + ".outColor", aShaders[2] + ".color")
+		# the recorded connection counts before the commit
+		self.assertRaises(RuntimeError, graph.ConnectAttr, aShaders[1] + ".outColor", aShaders[2] + ".color")
+		graph.ConnectAttr(aShaders[1] + ".outColor", aShaders[2] + ".color", force = True)
+		graph.Commit()
+		self.assertEqual(mc.listConnections(graph.Name(aShaders[2]) + ".color", source = True, destination = False), [graph.Name(aShaders[1])])
@@ -0,0 +1,75 @@
+################################################################
+# Imports
+
+import os
+
+import maya.cmds as mc
+
+from speedtree.instances import SourceKey, FindImport, SOURCE_ATTRIBUTE
+from speedtree.options import ImportOptions
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# SourceKey
+
+class SourceKeyTest(MayaTestCase):
+	def setUp(self):
+		MayaTestCase.setUp(self)
+		self.stmat = self.MakeTree("oak", materials = 2)
+		self.mesh = os.path.splitext(self.stmat)[0] + ".fbx"
+
+	def Key(self, translator = "SpeedTree", **options):
+		return SourceKey(self.stmat, self.mesh, translator, ImportOptions(**options))
+
+	def testSameImport(self):
+		self.assertEqual(self.Key(), self.Key())
+
+	def testTranslators(self):
+		self.assertNotEqual(self.Key("SpeedTree"), self.Key("SpeedTree for V-Ray"))
+
+	def testOptions(self):
+		for name, value in (("skipMaps", "Gloss"), ("lods", "0"), ("meshProxy", True), ("opacityAnalysis", True),
+							("prepareTextures", True), ("proxyTextures", True)):
+			self.assertNotEqual(self.Key(**{name : value}), self.Key(), name)
+		# options that don't change the tree don't count
+		self.assertEqual(self.Key(stats = False, textureMemory = True), self.Key())
+
+	def testEditedFile(self):
+		key = self.Key()
+		os.utime(self.mesh, ns = (1, 1))
+		self.assertNotEqual(self.Key(), key)
+
+	def testMissingFile(self):
+		self.assertIsNone(SourceKey(self.stmat, self.mesh + ".gone", "SpeedTree", ImportOptions()))
+
+
+################################################################
+# Instancing
+
+class InstancingTest(MayaTestCase):
+	def testInstance(self):
+		stmat = self.MakeTree("oak", materials = 3)
+		first, second = self.Import([stmat, stmat], instancing = "instance")
+		self.assertNotIn("instancedRoots", first["counters"])
+		self.assertEqual(second["counters"]["instancedRoots"], 3)
+		self.assertEqual(len(FindImport(mc.getAttr(first["roots"][0] + "." + SOURCE_ATTRIBUTE))), 3)
+
+	def testPlacement(self):
+		stmat = self.MakeTree("oak", materials = 3)
+		first, second = self.Import([stmat, stmat], instancing = "placement")
+		self.assertEqual(len(second["roots"]), 1)
+		self.assertEqual(len(mc.listRelatives(second["roots"][0], children = True)), 3)
+
+	def testOtherTranslator(self):
+		stmat = self.MakeTree("oak", materials = 3)
+		self.Import([stmat], "arnold", instancing = "instance")
+		result = self.Import([stmat], "vray", instancing = "instance")[0]
+		self.assertNotIn("instancedRoots", result["counters"])
+		self.assertTrue(self.Nodes("VRayMtl"))
+
+	def testOtherOptions(self):
+		stmat = self.MakeTree("oak", materials = 3)
+		self.Import([stmat], instancing = "instance")
+		self.assertNotIn("instancedRoots", self.Import([stmat], instancing = "instance", skipMaps = "Gloss")[0]["counters"])
+		self.assertEqual(self.Import([stmat], instancing = "instance", skipMaps = "Gloss")[0]["counters"]["instancedRoots"], 3)
@@ -0,0 +1,80 @@
+################################################################
+# Imports
+
+import maya.cmds as mc
+
+from speedtree.library import ShaderLibrary, HASH_ATTRIBUTE
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# ShaderLibrary
+
+class ShaderLibraryTest(MayaTestCase):
+	def setUp(self):
+		MayaTestCase.setUp(self)
+		self.library = ShaderLibrary()
+		self.library.Start()
+
+	def tearDown(self):
+		self.library.Stop()
+		MayaTestCase.tearDown(self)
+
+	def testTagAndFind(self):
+		shader = mc.shadingNode("lambert", asShader = True)
+		self.library.Tag(shader, "SpeedTree", "abc")
+		self.assertEqual(mc.getAttr(shader + "." + HASH_ATTRIBUTE), "abc")
+		self.assertEqual(self.library.Find("SpeedTree", "abc"), shader)
+		# the shaders of another translator are not reused
+		self.assertIsNone(self.library.Find("SpeedTree for V-Ray", "abc"))
+		self.assertIsNone(self.library.Find("SpeedTree", "def"))
+
+	def testSceneIndex(self):
+		# shaders tagged before the library was made, like the ones of an opened scene
+		shader = mc.shadingNode("lambert", asShader = True)
+		ShaderLibrary(sceneScope = False).Tag(shader, "SpeedTree", "abc")
+		self.assertEqual(self.library.Find("SpeedTree", "abc"), shader)
+		self.assertIsNone(ShaderLibrary(sceneScope = False).Find("SpeedTree", "abc"))
+
+	def testDeletedShader(self):
+		shader = mc.shadingNode("lambert", asShader = True)
+		self.library.Tag(shader, "SpeedTree", "abc")
+		self.assertEqual(self.library.Find("SpeedTree", "abc"), shader)
+		mc.delete(shader)
+		self.assertIsNone(self.library.Find("SpeedTree", "abc"))
+
+	def testRenamedShader(self):
+		shader = mc.shadingNode("lambert", asShader = True)
+		self.library.Tag(shader, "SpeedTree", "abc")
+		self.library.Find("SpeedTree", "abc")
+		mc.rename(shader, "bark_shader")
+		self.assertEqual(self.library.Find("SpeedTree", "abc"), "bark_shader")
+
+
+################################################################
+# Imports into one scene
+
+class LibraryImportTest(MayaTestCase):
+	def testReuse(self):
+		stmat = self.MakeTree("oak", materials = 4, images = 1)
+		first = self.Import([stmat])[0]["counters"]
+		second = self.Import([stmat])[0]["counters"]
+		self.assertEqual(second.get("newShaders", 0), 0)
+		self.assertEqual(second["reusedShaders"], first["newShaders"])
+
+	def testOtherTranslator(self):
+		stmat = self.MakeTree("oak", materials = 4, images = 1)
+		self.Import([stmat])
+		self.assertEqual(self.Import([stmat], "vray")[0]["counters"].get("reusedShaders", 0), 0)
+
+	def testTextureOptions(self):
+		# prepared and proxy textures change the file nodes, the shaders of a plain import are not reused
+		stmat = self.MakeTree("oak", materials = 4, images = 1)
+		self.Import([stmat])
+		self.assertEqual(self.Import([stmat], proxyTextures = True)[0]["counters"].get("reusedShaders", 0), 0)
+		self.assertGreater(self.Import([stmat], proxyTextures = True)[0]["counters"].get("reusedShaders", 0), 0)
+
+	def testWithoutLibrary(self):
+		stmat = self.MakeTree("oak", materials = 4, images = 1)
+		self.Import([stmat])
+		self.assertEqual(self.Import([stmat], shaderLibrary = False)[0]["counters"].get("reusedShaders", 0), 0)
@@ -0,0 +1,74 @@
+################################################################
+# Imports
+
+import json
+import os.path as path
+import unittest
+
+import maya.cmds as mc
+import maya.OpenMaya as OpenMaya
+import maya.OpenMayaMPx as OpenMayaMPx
+
+import SpeedTreeImporter
+from speedtree.lods import ParseLods
+from speedtree.options import ImportOptions
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# ParseLods
+
+class ParseLodsTest(unittest.TestCase):
+	def testLevels(self):
+		self.assertEqual(ParseLods("0, LOD2;lod3"), set([0, 2, 3]))
+
+	def testAll(self):
+		self.assertIs(ParseLods(""), None)
+		self.assertIs(ParseLods(" , "), None)
+
+	def testBadLevel(self):
+		self.assertRaises(ValueError, ParseLods, "0, one")
+
+
+################################################################
+# LOD imports
+
+class LodImportTest(MayaTestCase):
+	def MakeLodTree(self, levels = 3):
+		# a tree with one object and material per level, oak_LOD0 uses oak0_Mat and so on
+		stmat = self.MakeTree("oak", materials = levels)
+		meshFile = path.join(path.dirname(stmat), "oak.fbx")
+		with open(meshFile) as stream:
+			spec = json.load(stream)
+		for index, obj in enumerate(spec["objects"]):
+			obj["name"] = "oak_LOD" + str(index)
+		with open(meshFile, "w") as stream:
+			json.dump(spec, stream)
+		return stmat
+
+	def testKeepLevels(self):
+		result = self.Import([self.MakeLodTree()], lods = "0,2")[0]
+		self.assertEqual(result["status"], "ok")
+		self.assertEqual(sorted(self.Nodes("transform")), ["oak_LOD0", "oak_LOD2"])
+		self.assertEqual((result["counters"]["lodNodesDropped"], result["counters"]["lodMaterialsSkipped"]), (1, 1))
+		# the material of the dropped level is not built
+		self.assertFalse([sg for sg in self.Nodes("shadingEngine") if sg.startswith("oak1_")])
+
+	def testLodGroup(self):
+		result = self.Import([self.MakeLodTree()], lodGroup = True, lodDistance = 10.0)[0]
+		self.assertEqual(result["roots"], ["oak_lodGroup"])
+		self.assertEqual(mc.listRelatives("oak_lodGroup", children = True), ["oak_LOD0", "oak_LOD1", "oak_LOD2"])
+		self.assertEqual([mc.getAttr("oak_lodGroup.threshold[" + str(index) + "]") for index in range(2)], [10.0, 20.0])
+
+	def testBadLods(self):
+		# ImportFiles turns the value down, a translator can still be handed it by the file dialog
+		translator = SpeedTreeImporter.SpeedTreeImporterTranslator()
+		translator.options = ImportOptions(parseCache = False, lods = "0, one")
+		fileObject = OpenMaya.MFileObject()
+		fileObject.setRawFullName(self.MakeLodTree())
+		self.Run(translator.reader, fileObject, "", OpenMayaMPx.MPxFileTranslator.kImportAccessMode)
+		self.assertNotEqual(translator.stats.Report()["status"], "ok")
+		self.assertEqual(self.Lines("SpeedTree ERROR: Bad LOD levels [0, one]"), ["SpeedTree ERROR: Bad LOD levels [0, one]"])
+		# nothing was imported
+		self.assertEqual(self.Nodes("transform"), [])
+		self.assertEqual(self.Nodes("mesh"), [])
@@ -0,0 +1,134 @@
+################################################################
+# Imports
+
+import unittest
+
+import maya.cmds as mc
+
+import SpeedTreeImporter
+from speedtree.graph import CommandGraph
+from speedtree.mapping import (Rule, MaterialPlan, Node, Texture, Set, Connect, ShapeFlag, Result,
+								FILE, VALUE, RED, RGB, MAP_FILE, SHADER, TEXTURE)
+from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# Rules
+
+MAPS = { "Color" : True, "Gloss" : False }
+
+class RuleTest(unittest.TestCase):
+	def testMap(self):
+		self.assertTrue(Rule([], map = "Color").Matches(MAPS, False, False))
+		self.assertFalse(Rule([], map = "Normal").Matches(MAPS, False, False))
+		self.assertTrue(Rule([], map = "Color", source = FILE).Matches(MAPS, False, False))
+		self.assertFalse(Rule([], map = "Color", source = VALUE).Matches(MAPS, False, False))
+		self.assertTrue(Rule([], map = "Gloss", source = VALUE).Matches(MAPS, False, False))
+
+	def testFlags(self):
+		self.assertTrue(Rule([], twoSided = True).Matches(MAPS, True, False))
+		self.assertFalse(Rule([], twoSided = True).Matches(MAPS, False, False))
+		self.assertFalse(Rule([], vertexOpacity = False).Matches(MAPS, False, True))
+
+	def testOtherMaps(self):
+		self.assertTrue(Rule([], requires = ("Color", "Gloss")).Matches(MAPS, False, False))
+		self.assertFalse(Rule([], requires = ("Color", "Normal")).Matches(MAPS, False, False))
+		self.assertFalse(Rule([], without = ("Gloss",)).Matches(MAPS, False, False))
+		self.assertTrue(Rule([], anyOf = ("Normal", "Gloss")).Matches(MAPS, False, False))
+		self.assertFalse(Rule([], anyOf = ("Normal", "Opacity")).Matches(MAPS, False, False))
+
+
+################################################################
+# MaterialPlan
+
+RULES = [
+	Rule([Node("shader", "lambert", SHADER)]),
+	Rule([Texture("color", "sRGB"),
+			Connect("color.outColor", "shader.color")], map = "Color", source = FILE),
+	Rule([Set("shader.color", RGB)], map = "Color", source = VALUE),
+	Rule([Texture("opacity", "Raw", ignoreFileRules = True),
+			Connect("opacity.outColorR", "shader.transparencyR"),
+			ShapeFlag("aiOpaque", 0)], map = "Opacity", source = FILE),
+	Rule([Set("shader.diffuse", RED)], map = "Gloss"),
+	Rule([Node("note", "file", TEXTURE),
+			Set("note.fileTextureName", MAP_FILE, "string"),
+			Result("shader")], map = "Normal"),
+]
+
+def Material(twoSided = False, **aMaps):
+	# maps as name = "file.png" or name = value
+	stMaterial = SpeedTreeMaterial("Test_Mat", twoSided)
+	for name, value in aMaps.items():
+		stMaterial.maps[name] = SpeedTreeMap(file = value) if isinstance(value, str) else SpeedTreeMap(value, value, value)
+	return stMaterial
+
+class MaterialPlanTest(unittest.TestCase):
+	def testCompiledOnce(self):
+		plan = MaterialPlan(RULES)
+		aOperations = plan.Operations(Material(Color = "a.png"))
+		# materials of the same kind share the plan, the images and values don't matter
+		self.assertIs(plan.Operations(Material(Color = "b.png")), aOperations)
+		self.assertIsNot(plan.Operations(Material(Color = 0.5)), aOperations)
+		self.assertEqual(len(plan.plans), 2)
+
+	def testCost(self):
+		plan = MaterialPlan(RULES)
+		self.assertEqual(plan.Cost(Material(Color = "a.png", Opacity = "o.png")), { "node" : 1, "texture" : 2, "connect" : 2, "shape" : 1 })
+		self.assertEqual(plan.Cost(Material(Color = 0.5, Gloss = 0.2)), { "node" : 1, "set" : 2 })
+
+	def testChannelUse(self):
+		plan = MaterialPlan(RULES)
+		self.assertEqual(plan.ChannelUse(Material(Color = "a.png", Opacity = "o.png", Gloss = "g.png")), { "Color" : set(["outColor"]), "Opacity" : set(["outColorR"]) })
+
+
+################################################################
+# Building
+
+class Translator:
+	# what MaterialPlan.Build uses of a SpeedTree translator
+	def __init__(self):
+		self.graph = CommandGraph()
+		self.shapeFlags = []
+
+	def CreateFileTexture(self, filename, colorSpace = None, ignoreFileRules = False, invert = False):
+		texFile = self.graph.ShadingNode("file", asTexture = True)
+		self.graph.SetAttr(texFile + ".fileTextureName", filename, type = "string")
+		if (colorSpace):
+			self.graph.SetAttr(texFile + ".colorSpace", colorSpace, type = "string")
+		return texFile
+
+	def ResolveTexture(self, filename):
+		return "/trees/" + filename
+
+	def SetShapeFlag(self, aShapes, attr, value, guard):
+		self.shapeFlags.append((tuple(aShapes), attr, value, guard))
+
+class BuildTest(MayaTestCase):
+	def testBuild(self):
+		translator = Translator()
+		shader = MaterialPlan(RULES).Build(translator, Material(Color = "a.png", Opacity = "o.png", Gloss = 0.25), ["leaf"], 1)
+		self.assertEqual(mc.nodeType(shader), "lambert")
+		color = mc.listConnections(shader + ".color", source = True, destination = False)[0]
+		self.assertEqual((mc.getAttr(color + ".fileTextureName"), mc.getAttr(color + ".colorSpace")), ("a.png", "sRGB"))
+		self.assertEqual(len(mc.listConnections(shader + ".transparencyR", source = True, destination = False)), 1)
+		self.assertEqual(mc.getAttr(shader + ".diffuse"), 0.25)
+		self.assertEqual(translator.shapeFlags, [(("leaf",), "aiOpaque", 0, "aiOpaque")])
+
+	def testValuesAndResult(self):
+		translator = Translator()
+		shader = MaterialPlan(RULES).Build(translator, Material(Color = 0.5, Normal = "n.png"), [], 1)
+		self.assertEqual(mc.nodeType(shader), "lambert")
+		self.assertEqual(mc.getAttr(shader + ".color"), [(0.5, 0.5, 0.5)])
+		# the file of a Set() goes through the translator's resolver
+		note = self.Nodes("file")[0]
+		self.assertEqual(mc.getAttr(note + ".fileTextureName"), "/trees/n.png")
+
+	def testTranslatorTables(self):
+		# every renderer reads the color, opacity and gloss images of a material
+		stMaterial = Material(Color = "c.png", Normal = "n.png", Opacity = "o.png", Gloss = "g.png", SubsurfaceAmount = "s.png", SubsurfaceColor = "sc.png")
+		for translatorClass in (SpeedTreeImporter.SpeedTreeImporterTranslator, SpeedTreeImporter.SpeedTreeImporterVRayTranslator,
+								SpeedTreeImporter.SpeedTreeImporterRendermanTranslator, SpeedTreeImporter.SpeedTreeImporterRedshiftTranslator):
+			plan = MaterialPlan(translatorClass.mapping)
+			self.assertLessEqual(set(["Color", "Opacity", "Gloss"]), set(plan.ChannelUse(stMaterial)), translatorClass.description)
+			self.assertGreater(plan.Cost(stMaterial)["node"], 0)
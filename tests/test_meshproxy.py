@@ -0,0 +1,109 @@
+################################################################
+# Imports
+
+import json
+import os.path as path
+
+import maya.cmds as mc
+
+from speedtree.meshproxy import ProxySets, IsMeshProxy, ExpandMeshProxies, MATERIALS_ATTRIBUTE, OPTIONS_ATTRIBUTE
+from speedtree.options import ImportOptions
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# Mesh proxies
+
+class MeshProxyTest(MayaTestCase):
+	def Shader(self, sg):
+		return mc.listConnections(sg + ".surfaceShader", source = True, destination = False)
+
+	def testGpuCache(self):
+		stmat = self.MakeTree("oak", materials = 1, extension = ".abc")
+		result = self.Import([stmat], meshProxy = True)[0]
+		self.assertEqual(result["roots"], ["oak"])
+		self.assertEqual(result["counters"]["meshProxiesShaded"], 1)
+		self.assertTrue(IsMeshProxy("oak"))
+		self.assertEqual(self.Nodes("gpuCache"), ["oakShape"])
+
+	def testSecondProxyOfATree(self):
+		# the names of the second proxy's shading groups are taken, it finds them through its connections
+		stmat = self.MakeTree("oak", materials = 1, extension = ".abc")
+		first, second = self.Import([stmat, stmat], meshProxy = True)
+		self.assertEqual(second["counters"]["meshProxiesShaded"], 1)
+		for root in (first["roots"][0], second["roots"][0]):
+			aSets = ProxySets(root)
+			self.assertEqual(list(aSets.values()), ["oak0_Mat"])
+			self.assertTrue(self.Shader(list(aSets)[0]))
+		self.assertEqual(self.Lines("WARNING"), [])
+
+	def testSeveralMaterials(self):
+		stmat = self.MakeTree("oak", materials = 3, extension = ".abc")
+		self.Import([stmat], meshProxy = True)
+		second = self.Import([stmat], meshProxy = True, shaderLibrary = False)[0]
+		aSets = ProxySets(second["roots"][0])
+		self.assertEqual(sorted(aSets.values()), ["oak0_Mat", "oak1_Mat", "oak2_Mat"])
+		for sg in aSets:
+			self.assertTrue(self.Shader(sg))
+		# a gpuCache is shaded as one object
+		self.assertNotIn("meshProxiesShaded", second["counters"])
+		self.assertEqual(len(self.Lines("No material is assigned to the mesh proxy")), 2)
+
+	def testUsd(self):
+		stmat = self.MakeTree("oak", materials = 1, extension = ".usd")
+		result = self.Import([stmat], meshProxy = True)[0]
+		self.assertEqual(self.Nodes("mayaUsdProxyShape"), ["oakShape"])
+		self.assertNotIn("meshProxiesShaded", result["counters"])
+
+	def testFbxIsImported(self):
+		stmat = self.MakeTree("oak", materials = 2)
+		result = self.Import([stmat], meshProxy = True)[0]
+		self.assertEqual(result["roots"], ["oak0", "oak1"])
+		self.assertEqual(len(self.Lines("No mesh proxy for [.fbx] files")), 1)
+
+	def testMissingShadingGroup(self):
+		stmat = self.MakeTree("oak", materials = 2, extension = ".abc")
+		root = self.Import([stmat], meshProxy = True)[0]["roots"][0]
+		sg = list(ProxySets(root))[0]
+		mc.disconnectAttr(sg + ".message", root + "." + MATERIALS_ATTRIBUTE + "[0]")
+		self.assertIsNone(ProxySets(root))
+
+
+################################################################
+# speedTreeExpand
+
+class ExpandTest(MayaTestCase):
+	def testExpand(self):
+		stmat = self.MakeTree("oak", materials = 3, extension = ".abc")
+		root = self.Import([stmat], meshProxy = True)[0]["roots"][0]
+		self.assertEqual(self.Run(ExpandMeshProxies, [root]), [root])
+		self.assertFalse(IsMeshProxy(root))
+		self.assertEqual(self.Nodes("gpuCache"), [])
+		self.assertEqual(sorted(mc.listRelatives(root, children = True)), ["oak0", "oak1", "oak2"])
+		# every shading group is used, by the expanded tree
+		for sg in mc.ls(type = "shadingEngine"):
+			if (sg not in ("initialShadingGroup", "initialParticleSE")):
+				self.assertTrue(mc.sets(sg, q = True), sg)
+
+	def testExpandKeepsTheImportOptions(self):
+		# an .abc tree with two levels, the proxy was made of LOD0 only
+		stmat = self.MakeTree("oak", materials = 2, extension = ".abc")
+		meshFile = path.join(path.dirname(stmat), "oak.abc")
+		with open(meshFile) as stream:
+			spec = json.load(stream)
+		for index, obj in enumerate(spec["objects"]):
+			obj["name"] = "oak_LOD" + str(index)
+		with open(meshFile, "w") as stream:
+			json.dump(spec, stream)
+		root = self.Import([stmat], meshProxy = True, lods = "0", skipMaps = "Gloss")[0]["roots"][0]
+		options = ImportOptions.FromString(mc.getAttr(root + "." + OPTIONS_ATTRIBUTE))
+		self.assertEqual((options.meshProxy, options.lods, options.skipMaps), (True, "0", "Gloss"))
+		self.Run(ExpandMeshProxies, [root])
+		self.assertEqual(mc.listRelatives(root, children = True), ["oak_LOD0"])
+		self.assertFalse(mc.objExists("oak_LOD1"))
+
+	def testNotAProxy(self):
+		stmat = self.MakeTree("oak", materials = 1)
+		root = self.Import([stmat])[0]["roots"][0]
+		self.assertEqual(self.Run(ExpandMeshProxies, [root]), [])
+		self.assertEqual(len(self.Lines("is not a SpeedTree mesh proxy")), 1)
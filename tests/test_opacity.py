@@ -0,0 +1,73 @@
+################################################################
+# Imports
+
+import os.path as path
+import shutil
+import tempfile
+import unittest
+
+from speedtree.opacity import OpacityAnalyzer, OPACITY_MAP, numpy
+from speedtree.resolver import TextureResolver
+from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial
+
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+
+################################################################
+# OpacityAnalyzer
+
+def Material(opacityFile):
+	stMaterial = SpeedTreeMaterial("Leaves_Mat")
+	stMaterial.maps["Color"] = SpeedTreeMap(file = "leaves_color.png")
+	stMaterial.maps[OPACITY_MAP] = SpeedTreeMap(file = opacityFile)
+	return stMaterial
+
+@unittest.skipUnless(numpy != None and Image != None, "needs NumPy and Pillow")
+class OpacityAnalyzerTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.analyzer = OpacityAnalyzer(path.join(self.directory, "cache"))
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors = True)
+
+	def Image(self, name, value):
+		Image.new("L", (8, 8), value).save(path.join(self.directory, name))
+
+	def testOpaqueImage(self):
+		self.Image("white.png", 255)
+		stMaterial = Material("white.png")
+		opaque = self.analyzer.Analyze(stMaterial, [], self.directory)
+		self.assertIsNot(opaque, stMaterial)
+		self.assertEqual(list(opaque.maps), ["Color"])
+		# the parsed material is not changed
+		self.assertIn(OPACITY_MAP, stMaterial.maps)
+
+	def testCutout(self):
+		image = Image.new("L", (8, 8), 255)
+		image.putpixel((3, 3), 0)
+		image.save(path.join(self.directory, "leaves.png"))
+		stMaterial = Material("leaves.png")
+		self.assertIs(self.analyzer.Analyze(stMaterial, [], self.directory), stMaterial)
+
+	def testResolvedImage(self):
+		# the .stmat name only matches the image on disk through the resolver
+		self.Image("White.PNG", 255)
+		stMaterial = Material("white.png")
+		resolver = TextureResolver(self.directory)
+		self.assertIsNot(self.analyzer.Analyze(stMaterial, [], self.directory, resolver = resolver), stMaterial)
+
+	def testMissingImage(self):
+		stMaterial = Material("gone.png")
+		self.assertIs(self.analyzer.Analyze(stMaterial, [], self.directory, resolver = TextureResolver(self.directory)), stMaterial)
+		self.assertIs(self.analyzer.Analyze(stMaterial, [], self.directory), stMaterial)
+
+	def testCache(self):
+		self.Image("white.png", 255)
+		self.analyzer.Analyze(Material("white.png"), [], self.directory)
+		self.analyzer.Save()
+		analyzer = OpacityAnalyzer(path.join(self.directory, "cache"))
+		self.assertEqual(list(analyzer.Results().values()), [True])
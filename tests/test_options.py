@@ -0,0 +1,107 @@
+################################################################
+# Imports
+
+import contextlib
+import io
+import unittest
+
+from speedtree.options import ImportOptions, ParseValue, FormatValue
+
+
+################################################################
+# ImportOptions
+
+def FromString(optionString, base = None):
+	# the options and the warnings printed on the way
+	output = io.StringIO()
+	with contextlib.redirect_stdout(output):
+		options = ImportOptions.FromString(optionString, base)
+	return options, output.getvalue().splitlines()
+
+class ImportOptionsTest(unittest.TestCase):
+	def testDefaultsRoundTrip(self):
+		options, aWarnings = FromString(ImportOptions().ToString())
+		self.assertEqual(vars(options), vars(ImportOptions()))
+		self.assertEqual(aWarnings, [])
+
+	def testValuesRoundTrip(self):
+		changed = ImportOptions(resolveTextures = False, graphBackend = "commands", proxyScale = 0.5, textureBudget = 128.0,
+								instancing = "placement", lods = "0,2", skipMaterials = "*Frond*, *Billboard*", cacheDirectory = "/tmp/st cache")
+		options, aWarnings = FromString(changed.ToString())
+		self.assertEqual(vars(options), vars(changed))
+		self.assertEqual(aWarnings, [])
+
+	def testEveryOptionIsWritten(self):
+		aNames = [part.split("=", 1)[0] for part in ImportOptions().ToString().split(";")]
+		self.assertEqual(aNames, [name for name, default in ImportOptions.defaults])
+
+	def testTypes(self):
+		options, aWarnings = FromString("meshProxy=true;lodGroup=on;vertexOpacity=0;lodDistance=35;proxyScale= 0.5 ")
+		self.assertIs(options.meshProxy, True)
+		self.assertIs(options.lodGroup, True)
+		self.assertIs(options.vertexOpacity, False)
+		self.assertEqual(options.lodDistance, 35.0)
+		self.assertIsInstance(options.lodDistance, float)
+		self.assertEqual(options.proxyScale, 0.5)
+
+	def testBase(self):
+		base = ImportOptions(lods = "1", textureMemory = True)
+		options, aWarnings = FromString("skipMaps=Gloss", base)
+		self.assertEqual((options.lods, options.textureMemory, options.skipMaps), ("1", True, "Gloss"))
+		# the base is not changed
+		self.assertEqual(base.skipMaps, "")
+
+	def testEmptyParts(self):
+		options, aWarnings = FromString(";;lods=0;novalue;=1;")
+		self.assertEqual(options.lods, "0")
+		self.assertEqual(aWarnings, [])
+
+	def testUnknownOption(self):
+		options, aWarnings = FromString("lods=0;fastMode=1")
+		self.assertEqual(options.lods, "0")
+		self.assertEqual(aWarnings, ["SpeedTree WARNING: Unknown import option [fastMode]"])
+
+	def testBadValues(self):
+		base = ImportOptions(proxyScale = 0.5, meshProxy = True)
+		options, aWarnings = FromString("proxyScale=half;meshProxy=maybe;lods=2", base)
+		self.assertEqual((options.proxyScale, options.meshProxy, options.lods), (0.5, True, "2"))
+		self.assertEqual(len(aWarnings), 2)
+
+	def testGraphBackend(self):
+		self.assertEqual(FromString("graphBackend=modifier")[0].graphBackend, "modifier")
+		options, aWarnings = FromString("graphBackend=fast")
+		self.assertEqual(options.graphBackend, "commands")
+		self.assertEqual(aWarnings, ["SpeedTree WARNING: Bad value for import option [graphBackend]: fast"])
+
+	def testBadLods(self):
+		self.assertEqual(FromString("lods=LOD0, 2")[0].lods, "LOD0, 2")
+		options, aWarnings = FromString("lods=0,one", ImportOptions(lods = "1"))
+		self.assertEqual(options.lods, "1")
+		self.assertEqual(aWarnings, ["SpeedTree WARNING: Bad value for import option [lods]: 0,one"])
+
+	def testFromKeywords(self):
+		options = ImportOptions.FromKeywords(graphBackend = "modifier", lodDistance = 30)
+		self.assertEqual(options.graphBackend, "modifier")
+		self.assertIsInstance(options.lodDistance, float)
+		self.assertRaises(ValueError, ImportOptions.FromKeywords, graphBackend = "foo")
+		self.assertRaises(ValueError, ImportOptions.FromKeywords, stats = 1)
+		self.assertRaises(TypeError, ImportOptions.FromKeywords, fastMode = True)
+
+	def testUnknownKeyword(self):
+		with self.assertRaises(TypeError):
+			ImportOptions(fastMode = True)
+
+
+################################################################
+# Option strings
+
+class OptionStringTest(unittest.TestCase):
+	def testParseValue(self):
+		self.assertIs(ParseValue("Yes", bool), True)
+		self.assertIs(ParseValue("", bool), False)
+		self.assertEqual(ParseValue("7", int), 7)
+		self.assertRaises(ValueError, ParseValue, "2", bool)
+		self.assertRaises(ValueError, ParseValue, "x", float)
+
+	def testFormatValue(self):
+		self.assertEqual([FormatValue(value) for value in (True, False, 0.25, 64.0, "a, b")], ["1", "0", "0.25", "64.0", "a, b"])
@@ -0,0 +1,107 @@
+################################################################
+# Imports
+
+import os
+import os.path as path
+import shutil
+import tempfile
+import unittest
+
+from speedtree.parsecache import ParseCache, CACHE_EXTENSION
+
+
+################################################################
+# Test data
+
+def Stmat(name, value = "0.5"):
+	return ('<Materials Mesh="' + name + '.abc"><Material Name="' + name + '"><Map Name="Gloss" Value="' + value + '"/>'
+			'<Map Name="Color" File="' + name + '_Color.png"/></Material></Materials>').encode("utf-8")
+
+
+################################################################
+# ParseCache
+
+class ParseCacheTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.cache = ParseCache(path.join(self.directory, "cache"))
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors = True)
+
+	def Write(self, name, data, mtime = 1000000000):
+		filename = path.join(self.directory, name + ".stmat")
+		with open(filename, "wb") as stream:
+			stream.write(data)
+		os.utime(filename, ns = (mtime, mtime))
+		return filename
+
+	def Counts(self):
+		counters = self.cache.Counters()
+		return (counters["hits"], counters["misses"], counters["stores"])
+
+	def testMissThenHit(self):
+		filename = self.Write("oak", Stmat("oak"))
+		first = self.cache.Load(filename)
+		self.assertEqual(self.Counts(), (0, 1, 1))
+		second = self.cache.Load(filename)
+		self.assertEqual(self.Counts(), (1, 1, 1))
+		self.assertEqual(second.mesh, first.mesh)
+		self.assertEqual(list(second.materials), ["oak"])
+		self.assertEqual(second.materials["oak"].maps["Gloss"].red, 0.5)
+		self.assertEqual(second.materials["oak"].maps["Color"].file, "oak_Color.png")
+
+	def testChangedFileIsParsedAgain(self):
+		filename = self.Write("oak", Stmat("oak", "0.5"))
+		self.cache.Load(filename)
+		self.Write("oak", Stmat("oak", "0.25"), mtime = 2000000000)
+		stFile = self.cache.Load(filename)
+		self.assertEqual(self.Counts(), (0, 2, 2))
+		self.assertEqual(stFile.materials["oak"].maps["Gloss"].red, 0.25)
+
+	def testSameSizeNewContentIsParsedAgain(self):
+		filename = self.Write("oak", Stmat("oak", "0.5"))
+		self.cache.Load(filename)
+		self.Write("oak", Stmat("oak", "0.7"), mtime = 2000000000)
+		self.assertEqual(self.cache.Load(filename).materials["oak"].maps["Gloss"].red, 0.7)
+		self.assertEqual(self.Counts(), (0, 2, 2))
+
+	def testTouchedFileIsAHit(self):
+		filename = self.Write("oak", Stmat("oak"))
+		self.cache.Load(filename)
+		os.utime(filename, ns = (2000000000, 2000000000))
+		self.cache.Load(filename)
+		self.assertEqual(self.Counts(), (1, 1, 1))
+		# the entry now carries the new mtime
+		self.cache.Load(filename)
+		self.assertEqual(self.Counts(), (2, 1, 1))
+
+	def testCorruptEntryIsAMiss(self):
+		filename = self.Write("oak", Stmat("oak"))
+		self.cache.Load(filename)
+		with open(self.cache.EntryPath(path.abspath(filename)), "r+b") as stream:
+			stream.seek(8)
+			stream.write(b"garbage")
+		self.assertEqual(list(self.cache.Load(filename).materials), ["oak"])
+		self.assertEqual(self.cache.errors, 1)
+		self.assertEqual(self.Counts(), (0, 2, 2))
+
+	def testEviction(self):
+		aFiles = [self.Write("tree" + str(index), Stmat("tree" + str(index))) for index in range(4)]
+		self.cache.Load(aFiles[0])
+		self.cache.maxBytes = self.cache.TotalBytes() * 2
+		for index, filename in enumerate(aFiles):
+			if (index > 0):
+				self.cache.Load(filename)
+			# the entries are used in file order, the oldest ones go first
+			os.utime(self.cache.EntryPath(path.abspath(filename)), (index + 1, index + 1))
+		self.assertEqual(self.cache.evictions, 2)
+		self.assertLessEqual(self.cache.TotalBytes(), self.cache.maxBytes)
+		aNames = sorted(path.basename(entryPath) for lastUse, size, entryPath in self.cache.Entries())
+		aKept = sorted(path.basename(self.cache.EntryPath(path.abspath(filename))) for filename in aFiles[2:])
+		self.assertEqual(aNames, aKept)
+
+	def testClear(self):
+		self.cache.Load(self.Write("oak", Stmat("oak")))
+		self.cache.Clear()
+		self.assertEqual([name for name in os.listdir(self.cache.directory) if name.endswith(CACHE_EXTENSION)], [])
@@ -0,0 +1,101 @@
+################################################################
+# Imports
+
+import os.path as path
+import unittest
+
+import maya.cmds as mc
+
+import SpeedTreeImporter
+import speedtree.proxies as proxies
+from speedtree.proxies import ProxyTextures, MakeProxy, GetProxyTextures, ReleaseProxyTextures
+from tests.mayatest import MayaTestCase
+
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+
+################################################################
+# Plug-in load and unload
+
+class ProxyLifetimeTest(MayaTestCase):
+	def tearDown(self):
+		ReleaseProxyTextures()
+		SpeedTreeImporter.initializePlugin(None)
+		MayaTestCase.tearDown(self)
+
+	def testNotAtLoad(self):
+		ReleaseProxyTextures()
+		SpeedTreeImporter.initializePlugin(None)
+		self.assertIsNone(proxies.proxyTextures)
+
+	def testReleasedAtUnload(self):
+		instance = GetProxyTextures(self.directory)
+		SpeedTreeImporter.uninitializePlugin(None)
+		self.assertIsNone(proxies.proxyTextures)
+		self.assertEqual(instance.callbackIds, [])
+
+	def testUseProxyTextures(self):
+		# switching to the proxies by hand needs the callbacks that switch back before a save
+		ReleaseProxyTextures()
+		proxies.UseProxyTextures()
+		self.assertIsNotNone(proxies.proxyTextures)
+
+
+################################################################
+# Switching
+
+class SwitchTest(MayaTestCase):
+	def testSwitch(self):
+		full = path.join(self.directory, "bark.png")
+		proxy = path.join(self.directory, "bark_proxy.png")
+		open(proxy, "wb").close()
+		texFile = mc.shadingNode("file", asTexture = True)
+		mc.setAttr(texFile + ".fileTextureName", full, type = "string")
+		textures = ProxyTextures(self.directory)
+		textures.Tag(texFile, proxy)
+		self.assertEqual(textures.UseProxyTextures(), 1)
+		self.assertEqual(mc.getAttr(texFile + ".fileTextureName"), proxy)
+		self.assertEqual(textures.UseFullTextures(), 1)
+		self.assertEqual(mc.getAttr(texFile + ".fileTextureName"), full)
+
+	def testMissingProxy(self):
+		texFile = mc.shadingNode("file", asTexture = True)
+		mc.setAttr(texFile + ".fileTextureName", "bark.png", type = "string")
+		textures = ProxyTextures(self.directory)
+		textures.Tag(texFile, path.join(self.directory, "not_made_yet.png"))
+		self.assertEqual(textures.UseProxyTextures(), 0)
+
+	def testChangedByHand(self):
+		proxy = path.join(self.directory, "bark_proxy.png")
+		open(proxy, "wb").close()
+		texFile = mc.shadingNode("file", asTexture = True)
+		mc.setAttr(texFile + ".fileTextureName", "bark.png", type = "string")
+		textures = ProxyTextures(self.directory)
+		textures.Tag(texFile, proxy)
+		mc.setAttr(texFile + ".fileTextureName", "leaf.png", type = "string")
+		self.assertEqual(textures.UseProxyTextures(), 0)
+		self.assertEqual(mc.getAttr(texFile + ".fileTextureName"), "leaf.png")
+
+
+################################################################
+# MakeProxy
+
+@unittest.skipUnless(Image != None, "needs Pillow")
+class MakeProxyTest(MayaTestCase):
+	def testScale(self):
+		source = path.join(self.directory, "bark.png")
+		Image.new("RGB", (512, 256)).save(source)
+		proxy = path.join(self.directory, "bark_proxy.png")
+		self.assertEqual(MakeProxy(source, proxy, 0.5), proxy)
+		with Image.open(proxy) as image:
+			self.assertEqual(image.size, (256, 128))
+
+	def testTooSmall(self):
+		source = path.join(self.directory, "bark.png")
+		Image.new("RGB", (128, 128)).save(source)
+		proxy = path.join(self.directory, "bark_proxy.png")
+		self.assertIsNone(MakeProxy(source, proxy, 0.25))
+		self.assertFalse(path.exists(proxy))
@@ -0,0 +1,83 @@
+################################################################
+# Imports
+
+import os
+import os.path as path
+import shutil
+import tempfile
+import unittest
+
+from speedtree.resolver import TextureResolver, UdimPattern
+from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial
+
+
+################################################################
+# TextureResolver
+
+class TextureResolverTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.textures = path.join(self.directory, "textures")
+		os.makedirs(self.textures)
+		for name in ("Bark_Color.png", "Leaf_Normal.PNG", "trunk_1001.exr", "trunk_1002.exr", "Branch_1003.tx", "Branch_1011.tx", "notes_100.txt"):
+			open(path.join(self.textures, name), "w").close()
+		self.resolver = TextureResolver(self.directory)
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors = True)
+
+	def Expected(self, name):
+		return path.join(self.textures, name).replace(os.sep, "/")
+
+	def testExactName(self):
+		self.assertEqual(self.resolver.Resolve("textures/Bark_Color.png"), (self.Expected("Bark_Color.png"), None))
+
+	def testOtherCase(self):
+		# resolves to the name on disk
+		self.assertEqual(self.resolver.Resolve("textures/bark_color.PNG"), (self.Expected("Bark_Color.png"), None))
+		self.assertEqual(self.resolver.Resolve("textures/leaf_normal.png"), (self.Expected("Leaf_Normal.PNG"), None))
+
+	def testAbsolutePath(self):
+		self.assertEqual(self.resolver.Resolve(path.join(self.textures, "BARK_COLOR.png")), (self.Expected("Bark_Color.png"), None))
+
+	def testMissing(self):
+		self.assertEqual(self.resolver.Resolve("textures/Missing.png"), (None, None))
+		self.assertEqual(self.resolver.Resolve("nowhere/Bark_Color.png"), (None, None))
+		self.assertEqual(self.resolver.missing, ["textures/Missing.png", "nowhere/Bark_Color.png"])
+
+	def testUdimTiles(self):
+		self.assertEqual(self.resolver.Resolve("textures/trunk_<UDIM>.exr"), (self.Expected("trunk_<UDIM>.exr"), [1001, 1002]))
+
+	def testUdimOtherCase(self):
+		# the pattern follows the case of the first tile
+		self.assertEqual(self.resolver.Resolve("textures/branch_<UDIM>.TX"), (self.Expected("Branch_<UDIM>.tx"), [1003, 1011]))
+
+	def testUdimWithoutTiles(self):
+		self.assertEqual(self.resolver.Resolve("textures/leaf_<UDIM>.png"), (None, None))
+		self.assertEqual(self.resolver.missing, ["textures/leaf_<UDIM>.png"])
+
+	def testUdimPattern(self):
+		self.assertEqual(UdimPattern("textures/trunk_1002.exr"), "textures/trunk_<UDIM>.exr")
+		self.assertEqual(UdimPattern("textures/notes_100.txt"), "textures/notes_100.txt")
+
+	def testUdimPatternLastNumber(self):
+		self.assertEqual(UdimPattern("D:/tex/bark_1024_1001.png"), "D:/tex/bark_1024_<UDIM>.png")
+		self.assertEqual(UdimPattern("D:/tex/bark_1001_v2.png"), "D:/tex/bark_<UDIM>_v2.png")
+		# not in the folders
+		self.assertEqual(UdimPattern("D:/1001/bark.png"), "D:/1001/bark.png")
+
+	def testCheck(self):
+		stMaterial = SpeedTreeMaterial("Bark")
+		stMaterial.maps["Color"] = SpeedTreeMap(file = "textures/BARK_color.png")
+		stMaterial.maps["Normal"] = SpeedTreeMap(file = "textures/Bark_Normal.png")
+		stMaterial.maps["Gloss"] = SpeedTreeMap(0.5, 0.5, 0.5)
+		self.assertEqual(self.resolver.Check([stMaterial]), ["textures/Bark_Normal.png"])
+		# one listing for the folder
+		self.assertEqual(list(self.resolver.listings), [self.textures])
+
+	def testNewFileAfterListing(self):
+		self.assertEqual(self.resolver.Resolve("textures/New.png"), (None, None))
+		open(path.join(self.textures, "New.png"), "w").close()
+		# the folder's mtime moved, a new resolver lists it again
+		os.utime(self.textures, ns = (1, 1))
+		self.assertEqual(TextureResolver(self.directory).Resolve("textures/new.png"), (self.Expected("New.png"), None))
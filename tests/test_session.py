@@ -0,0 +1,63 @@
+################################################################
+# Imports
+
+import os.path as path
+
+from maya._scene import scene
+
+from speedtree.session import ImportFiles
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# ImportFiles
+
+class ImportFilesTest(MayaTestCase):
+	def testForest(self):
+		aFiles = [self.MakeTree(name, materials = 3) for name in ("oak", "birch")]
+		aResults = self.Import(aFiles)
+		self.assertEqual([result["file"] for result in aResults], aFiles)
+		self.assertEqual([result["status"] for result in aResults], ["ok", "ok"])
+		self.assertEqual([result["roots"] for result in aResults], [["oak0", "oak1", "oak2"], ["birch0", "birch1", "birch2"]])
+		# one undo chunk for the whole forest
+		self.assertEqual(scene.undoChunks, 1)
+
+	def testSharedShaders(self):
+		# the same tree twice, the second one reuses the networks of the first
+		stmat = self.MakeTree("oak", materials = 3, images = 1)
+		aResults = self.Import([stmat, stmat], shaderLibrary = False)
+		self.assertGreater(aResults[0]["counters"]["newShaders"], 0)
+		self.assertEqual(aResults[1]["counters"]["reusedShaders"], aResults[0]["counters"]["newShaders"])
+
+	def testTranslatorNames(self):
+		stmat = self.MakeTree("oak", materials = 1)
+		self.assertEqual(self.Import([stmat], "VRay")[0]["status"], "ok")
+		self.assertEqual(self.Import([stmat], "SpeedTree for Redshift")[0]["status"], "ok")
+		self.assertRaises(ValueError, ImportFiles, [stmat], "mentalray")
+
+	def testMissingFile(self):
+		result = self.Import([path.join(self.directory, "gone.stmat")])[0]
+		self.assertEqual(result["status"], "failed")
+		self.assertEqual(result["roots"], [])
+
+
+################################################################
+# Keyword options
+
+class KeywordOptionsTest(MayaTestCase):
+	def testBadValues(self):
+		stmat = self.MakeTree("oak", materials = 1)
+		for options in ({ "graphBackend" : "foo" }, { "lods" : "0, one" }, { "lods" : 0 }, { "meshProxy" : "yes" }):
+			with self.assertRaises(ValueError) as context:
+				ImportFiles([stmat], "arnold", **options)
+			self.assertIn(list(options)[0], str(context.exception))
+		# nothing was imported
+		self.assertEqual(self.Nodes("mesh"), [])
+
+	def testUnknownOption(self):
+		self.assertRaises(TypeError, ImportFiles, [self.MakeTree("oak", materials = 1)], "arnold", fastMode = True)
+
+	def testNumbers(self):
+		# whole numbers are taken for float options
+		result = self.Import([self.MakeTree("oak", materials = 1)], lodDistance = 30, textureBudget = 128)[0]
+		self.assertEqual(result["status"], "ok")
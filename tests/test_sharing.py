@@ -0,0 +1,61 @@
+################################################################
+# Imports
+
+import unittest
+
+import maya.cmds as mc
+
+from speedtree.stmat import SpeedTreeMap, SpeedTreeMaterial
+from tests.mayatest import MayaTestCase
+
+
+################################################################
+# Content hashes
+
+def Material(name = "Bark_Mat", twoSided = False, vertexOpacity = False, userData = "", colorFile = "bark.png", gloss = 0.5):
+	stMaterial = SpeedTreeMaterial(name, twoSided, vertexOpacity, userData)
+	stMaterial.maps["Color"] = SpeedTreeMap(file = colorFile)
+	stMaterial.maps["Gloss"] = SpeedTreeMap(gloss, gloss, gloss)
+	return stMaterial
+
+class ContentHashTest(unittest.TestCase):
+	def testNameDoesNotCount(self):
+		self.assertEqual(Material("Bark_Mat", userData = "a").ContentHash(), Material("Bark2_Mat", userData = "b").ContentHash())
+
+	def testRelativeFiles(self):
+		self.assertEqual(Material(colorFile = "bark.png").ContentHash("/trees/oak"), Material(colorFile = "/trees/oak/bark.png").ContentHash("/trees/oak"))
+		self.assertNotEqual(Material().ContentHash("/trees/oak"), Material().ContentHash("/trees/birch"))
+
+	def testNetworkChanges(self):
+		base = Material().ContentHash()
+		for stMaterial in (Material(twoSided = True), Material(vertexOpacity = True), Material(colorFile = "leaf.png"), Material(gloss = 0.25)):
+			self.assertNotEqual(stMaterial.ContentHash(), base)
+		self.assertNotEqual(Material().ContentHash(extra = 0), Material().ContentHash(extra = 1))
+
+
+################################################################
+# Shared shaders
+
+class SharingImportTest(MayaTestCase):
+	def Shaders(self):
+		# shading group -> shader of the tree
+		return dict((sg, mc.listConnections(sg + ".surfaceShader")[0]) for sg in self.Nodes("shadingEngine") if sg.startswith("oak"))
+
+	def testIdenticalMaterials(self):
+		# one image per map, six materials make three distinct networks
+		stmat = self.MakeTree("oak", materials = 6, files = 1.0, images = 1)
+		counters = self.Import([stmat], shaderLibrary = False)[0]["counters"]
+		self.assertEqual((counters["newShaders"], counters["sharedShaders"]), (3, 3))
+		self.assertEqual(len(self.Shaders()), 3)
+		self.assertEqual(self.Lines("share the shader of an identical material"), ["SpeedTree: 3 materials share the shader of an identical material"])
+		# every object is still shaded
+		for index in range(6):
+			aSets = mc.listConnections("oak" + str(index) + "_Shape", type = "shadingEngine")
+			self.assertEqual(len(aSets), 1)
+			self.assertIn(aSets[0], self.Shaders())
+
+	def testShareMaterialsOff(self):
+		stmat = self.MakeTree("oak", materials = 6, files = 1.0, images = 1)
+		counters = self.Import([stmat], shaderLibrary = False, shareMaterials = False)[0]["counters"]
+		self.assertEqual((counters["newShaders"], counters.get("sharedShaders", 0)), (6, 0))
+		self.assertEqual(len(self.Shaders()), 6)
@@ -0,0 +1,115 @@
+################################################################
+# Imports
+
+import io
+import os
+import tempfile
+import unittest
+
+from speedtree.stmat import ParseMap, ParseMaterialFile, ParseMaterialStream
+
+
+################################################################
+# Test data
+
+STMAT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<SpeedTreeMaterials>
+	<Materials Mesh="Oak.abc">
+		<Material Name="Bark" TwoSided="0" VertexOpacity="0" UserData="bark">
+			<Map Name="Color" File="Bark_Color.png"/>
+			<Map Name="Gloss" Value="0.25"/>
+			<Map Name="SubsurfaceColor" ColorR="0.5" ColorG="0.25" ColorB="0.125"/>
+		</Material>
+		<Material Name="Leaves" TwoSided="1" VertexOpacity="1">
+			<Map Name="Opacity" File="Leaves_Opacity.png"/>
+			<Map File="NoName.png"/>
+		</Material>
+	</Materials>
+	<Materials Mesh="Second.abc">
+		<Material Name="Ignored"/>
+	</Materials>
+</SpeedTreeMaterials>
+"""
+
+def Parse(data):
+	return ParseMaterialStream(io.BytesIO(data))
+
+def Colors(stmap):
+	return (stmap.red, stmap.green, stmap.blue)
+
+
+################################################################
+# ParseMaterialStream
+
+class ParseMaterialStreamTest(unittest.TestCase):
+	def testMaterials(self):
+		stFile = Parse(STMAT)
+		self.assertEqual(stFile.mesh, "Oak.abc")
+		self.assertEqual(list(stFile.materials), ["Bark", "Leaves"])
+		bark = stFile.materials["Bark"]
+		self.assertFalse(bark.twoSided)
+		self.assertFalse(bark.vertexOpacity)
+		self.assertEqual(bark.userData, "bark")
+		leaves = stFile.materials["Leaves"]
+		self.assertTrue(leaves.twoSided)
+		self.assertTrue(leaves.vertexOpacity)
+		self.assertEqual(leaves.userData, "")
+
+	def testMaps(self):
+		bark = Parse(STMAT).materials["Bark"]
+		self.assertEqual(list(bark.maps), ["Color", "Gloss", "SubsurfaceColor"])
+		self.assertEqual(bark.maps["Color"].file, "Bark_Color.png")
+		self.assertEqual(Colors(bark.maps["Gloss"]), (0.25, 0.25, 0.25))
+		self.assertEqual(bark.maps["Gloss"].file, "")
+		self.assertEqual(Colors(bark.maps["SubsurfaceColor"]), (0.5, 0.25, 0.125))
+
+	def testMapWithoutName(self):
+		self.assertEqual(list(Parse(STMAT).materials["Leaves"].maps), ["Opacity"])
+
+	def testFirstMaterialsOnly(self):
+		self.assertNotIn("Ignored", Parse(STMAT).materials)
+
+	def testNoMaterials(self):
+		self.assertIsNone(Parse(b"<SpeedTreeMaterials/>"))
+
+	def testMaterialFile(self):
+		handle, filename = tempfile.mkstemp(suffix = ".stmat")
+		with os.fdopen(handle, "wb") as stream:
+			stream.write(STMAT)
+		try:
+			self.assertEqual(list(ParseMaterialFile(filename).materials), ["Bark", "Leaves"])
+		finally:
+			os.remove(filename)
+
+
+################################################################
+# ParseMap
+
+class ParseMapTest(unittest.TestCase):
+	def testFileBeforeValues(self):
+		stmap = ParseMap({"File" : "a.png", "Value" : "0.5"})
+		self.assertEqual(stmap.file, "a.png")
+		self.assertEqual(Colors(stmap), (1.0, 1.0, 1.0))
+
+	def testValueBeforeColor(self):
+		self.assertEqual(Colors(ParseMap({"Value" : "0.5", "ColorR" : "0.1", "ColorG" : "0.2", "ColorB" : "0.3"})), (0.5, 0.5, 0.5))
+
+	def testEmptyValue(self):
+		self.assertEqual(Colors(ParseMap({"Value" : ""})), (1.0, 1.0, 1.0))
+
+	def testMalformedValueFallsBackToColor(self):
+		self.assertEqual(Colors(ParseMap({"Value" : "n/a", "ColorR" : "0.1", "ColorG" : "0.2", "ColorB" : "0.3"})), (0.1, 0.2, 0.3))
+
+	def testMalformedColorKeepsDefaults(self):
+		self.assertEqual(Colors(ParseMap({"ColorR" : "0.1", "ColorG" : "", "ColorB" : "0.3"})), (1.0, 1.0, 1.0))
+		self.assertEqual(Colors(ParseMap({"ColorR" : "0.1", "ColorG" : "green", "ColorB" : "0.3"})), (1.0, 1.0, 1.0))
+
+	def testIncompleteColorKeepsDefaults(self):
+		self.assertEqual(Colors(ParseMap({"ColorR" : "0.1", "ColorG" : "0.2"})), (1.0, 1.0, 1.0))
+
+	def testMalformedValueInFile(self):
+		data = b'<Materials Mesh="m.fbx"><Material Name="A"><Map Name="Gloss" Value="x"/><Map Name="Color" ColorR="" ColorG="" ColorB=""/></Material></Materials>'
+		stMaterial = Parse(data).materials["A"]
+		self.assertEqual(Colors(stMaterial.maps["Gloss"]), (1.0, 1.0, 1.0))
+		self.assertEqual(Colors(stMaterial.maps["Color"]), (1.0, 1.0, 1.0))
+
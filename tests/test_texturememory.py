@@ -0,0 +1,154 @@
+################################################################
+# Imports
+
+import io
+import os.path as path
+import shutil
+import struct
+import tempfile
+import unittest
+import warnings
+
+from speedtree.texturememory import ReadImageInfo, HEADER_BYTES
+
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+
+################################################################
+# Image headers
+#
+# The smallest files the header parsers accept, the pixels are left out
+# unless a parser needs the file to go on past them.
+
+def Png(width, height, bits, colorType):
+	return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">IIBBBBB", width, height, bits, colorType, 0, 0, 0)
+
+def JpegComments(size):
+	# comment segments of about size bytes
+	data = b""
+	while (size > 0):
+		length = min(size, 65533)
+		data += b"\xff\xfe" + struct.pack(">H", length + 2) + bytes(length)
+		size -= length
+	return data
+
+def Jpeg(width, height, channels, comments = b""):
+	return b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + bytes(9) + comments + b"\xff\xc0" + struct.pack(">HBHHB", 8 + 3 * channels, 8, height, width, channels) + bytes(3 * channels) + b"\xff\xd9"
+
+def Tiff(width, height, samples, bits, order = "<", pixelBytes = 0):
+	# the directory after pixelBytes of pixels, the bits per sample of RGB(A) images after the directory
+	aEntries = [(256, 3, 1, width), (257, 3, 1, height), (259, 3, 1, 1), (262, 3, 1, 2 if samples >= 3 else 1),
+				(273, 4, 1, 8), (277, 3, 1, samples), (278, 3, 1, height), (279, 4, 1, pixelBytes)]
+	directory = 8 + pixelBytes
+	bitsOffset = directory + 2 + 12 * (len(aEntries) + 1) + 4
+	aEntries.append((258, 3, samples, bits if samples <= 2 else bitsOffset))
+	aEntries.sort()
+	data = (b"II*\x00" if order == "<" else b"MM\x00*") + struct.pack(order + "I", directory) + bytes(pixelBytes)
+	data += struct.pack(order + "H", len(aEntries))
+	for tag, valueType, count, value in aEntries:
+		if (valueType == 3 and count * 2 <= 4):
+			data += struct.pack(order + "HHIHH", tag, valueType, count, value, 0)
+		else:
+			data += struct.pack(order + "HHII", tag, valueType, count, value)
+	data += struct.pack(order + "I", 0)
+	if (samples > 2):
+		data += struct.pack(order + "H" * samples, *([bits] * samples))
+	return data
+
+def Exr(width, height, aChannels):
+	def Attribute(name, attributeType, value):
+		return name + b"\x00" + attributeType + b"\x00" + struct.pack("<i", len(value)) + value
+	channels = b"".join(name + b"\x00" + struct.pack("<iB3xii", pixelType, 0, 1, 1) for name, pixelType in aChannels) + b"\x00"
+	return (b"\x76\x2f\x31\x01" + struct.pack("<i", 2) + Attribute(b"channels", b"chlist", channels) +
+			Attribute(b"compression", b"compression", b"\x00") + Attribute(b"dataWindow", b"box2i", struct.pack("<iiii", 0, 0, width - 1, height - 1)) + b"\x00")
+
+def Bmp(width, height, bitCount):
+	return b"BM" + bytes(16) + struct.pack("<iiHH", width, height, 1, bitCount) + bytes(24)
+
+def Hdr(width, height):
+	return b"#?RADIANCE\nFORMAT=32-bit_rle_rgbe\n\n-Y " + str(height).encode() + b" +X " + str(width).encode() + b"\n"
+
+def Tga(width, height, imageType, depth):
+	return struct.pack("<BBBHHBHHHHBB", 0, 0, imageType, 0, 0, 0, 0, 0, width, height, depth, 0)
+
+
+################################################################
+# ReadImageInfo
+
+class ReadImageInfoTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory, ignore_errors = True)
+
+	def Read(self, name, data):
+		filename = path.join(self.directory, name)
+		with open(filename, "wb") as stream:
+			stream.write(data)
+		info = ReadImageInfo(filename)
+		return None if info == None else (info.width, info.height, info.channels, info.bits)
+
+	def testPng(self):
+		self.assertEqual(self.Read("a.png", Png(1024, 512, 8, 2)), (1024, 512, 3, 8))
+		self.assertEqual(self.Read("b.png", Png(256, 256, 16, 6)), (256, 256, 4, 16))
+		self.assertEqual(self.Read("c.png", Png(64, 32, 1, 0)), (64, 32, 1, 8))
+		# palette images are expanded to RGB
+		self.assertEqual(self.Read("d.png", Png(64, 64, 4, 3)), (64, 64, 3, 8))
+
+	def testJpeg(self):
+		self.assertEqual(self.Read("a.jpg", Jpeg(2048, 1024, 3)), (2048, 1024, 3, 8))
+		self.assertEqual(self.Read("b.jpg", Jpeg(100, 50, 1, JpegComments(1000))), (100, 50, 1, 8))
+
+	def testTiff(self):
+		self.assertEqual(self.Read("a.tif", Tiff(640, 480, 3, 8)), (640, 480, 3, 8))
+		self.assertEqual(self.Read("b.tif", Tiff(640, 480, 4, 16, order = ">")), (640, 480, 4, 16))
+		self.assertEqual(self.Read("c.tif", Tiff(300, 200, 1, 16)), (300, 200, 1, 16))
+
+	def testTiffDirectoryAtTheEnd(self):
+		pixelBytes = 1024 * 1024 * 3
+		self.assertGreater(pixelBytes, HEADER_BYTES)
+		self.assertEqual(self.Read("a.tif", Tiff(1024, 1024, 3, 8, pixelBytes = pixelBytes)), (1024, 1024, 3, 8))
+		self.assertEqual(self.Read("b.tif", Tiff(1024, 1024, 3, 8, order = ">", pixelBytes = pixelBytes)), (1024, 1024, 3, 8))
+
+	def testTruncatedTiff(self):
+		with warnings.catch_warnings():
+			# Pillow, which gets it next, warns about it
+			warnings.simplefilter("ignore")
+			self.assertIsNone(self.Read("a.tif", Tiff(1024, 1024, 3, 8, pixelBytes = 4096)[:4096]))
+
+	def testExr(self):
+		self.assertEqual(self.Read("a.exr", Exr(512, 256, [(b"A", 1), (b"B", 1), (b"G", 1), (b"R", 1)])), (512, 256, 4, 16))
+		self.assertEqual(self.Read("b.exr", Exr(128, 128, [(b"Y", 2)])), (128, 128, 1, 32))
+
+	def testBmp(self):
+		self.assertEqual(self.Read("a.bmp", Bmp(320, -240, 24)), (320, 240, 3, 8))
+		self.assertEqual(self.Read("b.bmp", Bmp(32, 32, 32)), (32, 32, 4, 8))
+
+	def testHdr(self):
+		self.assertEqual(self.Read("a.hdr", Hdr(2048, 1024)), (2048, 1024, 3, 32))
+
+	def testTga(self):
+		self.assertEqual(self.Read("a.tga", Tga(256, 128, 2, 32)), (256, 128, 4, 8))
+		self.assertEqual(self.Read("b.tga", Tga(256, 128, 10, 24)), (256, 128, 3, 8))
+		self.assertEqual(self.Read("c.tga", Tga(64, 64, 3, 8)), (64, 64, 1, 8))
+
+	def testUnreadable(self):
+		self.assertIsNone(self.Read("a.png", b"\x89PNG\r\n\x1a\n"))
+		self.assertIsNone(self.Read("b.xyz", b"not an image"))
+		self.assertIsNone(ReadImageInfo(path.join(self.directory, "missing.png")))
+
+	@unittest.skipIf(Image == None, "needs Pillow")
+	def testPillowFallback(self):
+		# formats that are not parsed here
+		stream = io.BytesIO()
+		Image.new("RGBA", (40, 20)).save(stream, "GIF")
+		self.assertEqual(self.Read("a.gif", stream.getvalue()), (40, 20, 3, 8))
+		# and headers the parsers give up on: the frame header of this JPEG is past HEADER_BYTES
+		stream = io.BytesIO()
+		Image.new("RGB", (48, 24)).save(stream, "JPEG")
+		data = stream.getvalue()
+		self.assertEqual(self.Read("b.jpg", data[:2] + JpegComments(HEADER_BYTES) + data[2:]), (48, 24, 3, 8))